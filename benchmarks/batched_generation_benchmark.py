@@ -0,0 +1,81 @@
+"""
+Batched vs one-at-a-time generation with the in-process transformers backend.
+
+Builds mutation prompts for synthetic classes of different sizes, then
+generates them once per prompt (the previous `model.generate` loop) and once
+through TransformersBackend.complete_batch (length buckets, left padding,
+per-sequence stopping). Both answers go through the engine's parsing and
+validation. Runs on CPU with a tiny model.
+
+Requires torch and transformers.
+
+Usage:
+    python benchmarks/batched_generation_benchmark.py --model sshleifer/tiny-gpt2 --classes 16
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import build_java_class
+from micro_benchmark import ensure_config
+
+ensure_config()
+
+from llm.backends import TransformersBackend
+from llm.llm_mutation_engine_module import LLMMutationEngine
+from llm.source_file import SourceFile
+
+
+def run(label, engine, sources, generate):
+    """Generate answers for every source and parse them; return the timing row."""
+    start = time.time()
+    texts = generate([engine._build_prompt(source) for source in sources])
+    elapsed = time.time() - start
+    valid = sum(len(engine._parse_mutations(text, source.code_index)) for text, source in zip(texts, sources))
+    return {
+        "label": label,
+        "seconds": elapsed,
+        "sequences_per_sec": len(sources) / elapsed if elapsed else 0.0,
+        "valid_mutations": valid,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sshleifer/tiny-gpt2", help="Hugging Face model name")
+    parser.add_argument("--classes", type=int, default=16, help="Number of class prompts")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    backend = TransformersBackend(args.model, device=args.device, batch_size=args.batch_size,
+                                  max_new_tokens=args.max_new_tokens)
+    engine = LLMMutationEngine(args.model, backend=backend)
+
+    # Classes of 1..4 methods, so buckets see different prompt lengths
+    sources = [SourceFile(build_java_class(f"Class{i}", 1 + i % 4)) for i in range(args.classes)]
+
+    rows = [
+        run("one-at-a-time", engine, sources, lambda prompts: [backend.complete(p) for p in prompts]),
+        run("batched", engine, sources, backend.complete_batch),
+    ]
+
+    print("\n=== BATCHED GENERATION BENCHMARK ===")
+    print(f"Model: {args.model}  Device: {args.device}  Prompts: {args.classes}  "
+          f"Batch size: {args.batch_size}  Max new tokens: {args.max_new_tokens}")
+    for row in rows:
+        print(f"  {row['label']:<14} {row['seconds']:8.2f}s  {row['sequences_per_sec']:8.2f} sequences/sec  "
+              f"valid mutations: {row['valid_mutations']}")
+    if rows[1]["seconds"]:
+        print(f"Speedup: {rows[0]['seconds'] / rows[1]['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Hermetic end-to-end throughput benchmark.
+
+Builds a synthetic Java project, puts stand-in `defects4j` and `mvn`
+executables on the PATH, starts a local fake OpenRouter server and drives
+`main.py` and `main_llm.py` unchanged inside a throw-away workspace. Reports
+wall time, mutants/sec and a per-stage breakdown taken from the trace that
+the fakes write for every invocation.
+
+Usage:
+    python benchmarks/e2e_benchmark.py --classes 20 --methods 5 --latency-test 0.2
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+FAKE_TOOLS_DIR = os.path.join(BENCH_DIR, "fake_tools")
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import FIXTURE_PACKAGE, create_java_project
+from fake_openrouter import FakeOpenRouter
+
+PROJECT_ID = "Bench"
+
+# Repository entries never linked into the benchmark workspace
+WORKSPACE_EXCLUDES = {".git", "environment", "benchmarks", "results", "mutants", "requests.jsonl"}
+
+CONFIG_TEMPLATE = """D4J_BIN_PATH      = {d4j_bin!r}
+JAVA_HOME_11_PATH = {java_home!r}
+RESULTS_FOLDER    = 'results'
+OPENROUTER_API_KEY = "benchmark"
+"""
+
+
+def prepare_workspace(root, bugs):
+    """
+    Create a workspace that mirrors the repository sources next to a
+    benchmark-specific environment/config.py and projects.csv.
+
+    Top-level scripts are copied (Python resolves symlinked scripts back to
+    the repository, which would pick up the real configuration) while
+    package directories are linked.
+    """
+    workspace = os.path.join(root, "workspace")
+    os.makedirs(os.path.join(workspace, "environment"))
+    for entry in os.listdir(REPO_ROOT):
+        if entry in WORKSPACE_EXCLUDES or entry.startswith("."):
+            continue
+        source = os.path.join(REPO_ROOT, entry)
+        if os.path.isdir(source):
+            os.symlink(source, os.path.join(workspace, entry))
+        elif entry.endswith(".py"):
+            shutil.copy(source, os.path.join(workspace, entry))
+
+    java_home = os.path.join(root, "jdk")
+    os.makedirs(os.path.join(java_home, "bin"))
+    with open(os.path.join(workspace, "environment", "config.py"), "w") as f:
+        f.write(CONFIG_TEMPLATE.format(d4j_bin=FAKE_TOOLS_DIR, java_home=java_home))
+
+    with open(os.path.join(workspace, "environment", "projects.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["project_id", "project_path", "bug_id", "fixed_version", "test_dir"])
+        for bug_id in range(1, bugs + 1):
+            writer.writerow([PROJECT_ID, FIXTURE_PACKAGE, bug_id, "f", ""])
+    return workspace
+
+
+def working_dirs(bugs):
+    """Working directories main.py and main_llm.py use for the benchmark project."""
+    return [f"/tmp/{PROJECT_ID.lower()}_{bug_id}_f" for bug_id in range(1, bugs + 1)]
+
+
+def count_rows(path, header=False):
+    """Count non-empty rows of a CSV file."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        rows = sum(1 for line in f if line.strip())
+    return max(rows - (1 if header else 0), 0)
+
+
+def run_pipeline(name, script, workspace, env, log_dir):
+    """Run one pipeline script and return its wall-clock interval."""
+    log_path = os.path.join(log_dir, f"{name}.log")
+    start = time.time()
+    with open(log_path, "w") as log:
+        returncode = subprocess.call([sys.executable, script], cwd=workspace, env=env,
+                                     stdout=log, stderr=subprocess.STDOUT)
+    end = time.time()
+    if returncode != 0:
+        print(f"[WARN] {script} exited with {returncode}, see {log_path}")
+    return {"start": start, "end": end, "wall_seconds": end - start, "returncode": returncode, "log": log_path}
+
+
+def stage_breakdown(trace_path, start, end):
+    """Aggregate trace records whose start falls within [start, end]."""
+    stages = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+    if not os.path.exists(trace_path):
+        return {}
+    with open(trace_path) as f:
+        for line in f:
+            record = json.loads(line)
+            if not start <= record["start"] <= end:
+                continue
+            key = f"{record['tool']}:{record['stage']}"
+            stages[key]["calls"] += 1
+            stages[key]["seconds"] += record["end"] - record["start"]
+    return dict(stages)
+
+
+def print_report(report):
+    """Print a human-readable summary of the benchmark report."""
+    print("\n=== END-TO-END BENCHMARK ===")
+    print(f"Classes: {report['classes']}  Methods/class: {report['methods']}  Bugs: {report['bugs']}")
+    for name, result in report["pipelines"].items():
+        wall = result["wall_seconds"]
+        print(f"\n--- {name} ---")
+        print(f"Wall time: {wall:.2f}s  Mutants: {result['mutants']}  "
+              f"Throughput: {result['mutants_per_second']:.2f} mutants/sec")
+        for stage, data in sorted(result["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            share = (data["seconds"] / wall * 100) if wall > 0 else 0.0
+            print(f"  {stage:<24} calls={data['calls']:<6} {data['seconds']:8.2f}s ({share:5.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hermetic end-to-end pipeline benchmark")
+    parser.add_argument("--classes", type=int, default=10, help="Classes in the synthetic project")
+    parser.add_argument("--methods", type=int, default=5, help="Methods per class")
+    parser.add_argument("--bugs", type=int, default=1, help="Bug versions listed in projects.csv")
+    parser.add_argument("--pipeline", choices=["all", "classic", "llm"], default="all",
+                        help="classic = main.py (PIT + Major), llm = main_llm.py")
+    parser.add_argument("--mutants-per-class", type=int, default=10, help="Major/PIT mutants per class")
+    parser.add_argument("--kill-rate", type=float, default=0.7)
+    parser.add_argument("--build-fail-rate", type=float, default=0.05)
+    parser.add_argument("--assertion-rate", type=float, default=0.0,
+                        help="Share of kills reported without a frame in the mutated class")
+    parser.add_argument("--cross-kill-rate", type=float, default=0.0,
+                        help="Share of kills failing the test of another class")
+    parser.add_argument("--latency-checkout", type=float, default=0.0)
+    parser.add_argument("--latency-compile", type=float, default=0.0)
+    parser.add_argument("--latency-test", type=float, default=0.0, help="Seconds per full test suite")
+    parser.add_argument("--latency-test-startup", type=float, default=0.0, help="Seconds per test JVM start")
+    parser.add_argument("--latency-mutation", type=float, default=0.0, help="Seconds per Major mutant")
+    parser.add_argument("--latency-pit", type=float, default=0.0, help="Seconds per PIT mutant")
+    parser.add_argument("--latency-llm", type=float, default=0.0, help="Seconds per LLM request")
+    parser.add_argument("--latency-llm-token", type=float, default=0.0, help="Seconds per completion token")
+    parser.add_argument("--trivial-rate", type=float, default=0.0,
+                        help="Share of synthesized LLM mutations with an equivalent and a duplicate variant")
+    parser.add_argument("--llm-tail-rate", type=float, default=0.0, help="Share of LLM requests stalling")
+    parser.add_argument("--latency-llm-tail", type=float, default=0.0, help="Seconds a stalling LLM request waits")
+    parser.add_argument("--recordings", help="JSON-lines file of recorded completions to replay")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary benchmark directory")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="mutationcompare_bench_")
+    fixtures_dir = os.path.join(root, "fixtures")
+    create_java_project(os.path.join(fixtures_dir, PROJECT_ID.lower()), args.classes, args.methods)
+    workspace = prepare_workspace(root, args.bugs)
+    log_dir = os.path.join(root, "logs")
+    os.makedirs(log_dir)
+    trace_path = os.path.join(root, "trace.jsonl")
+
+    for tool in ("defects4j", "mvn"):
+        tool_path = os.path.join(FAKE_TOOLS_DIR, tool)
+        os.chmod(tool_path, os.stat(tool_path).st_mode | 0o111)
+
+    server = FakeOpenRouter(recordings=args.recordings, latency=args.latency_llm,
+                            token_latency=args.latency_llm_token, trace_path=trace_path,
+                            trivial_rate=args.trivial_rate, tail_rate=args.llm_tail_rate,
+                            tail_latency=args.latency_llm_tail).start()
+
+    env = dict(os.environ)
+    env.update({
+        "PATH": FAKE_TOOLS_DIR + os.pathsep + env.get("PATH", ""),
+        "OPENROUTER_API_URL": server.url,
+        "FAKE_TOOLS_TRACE": trace_path,
+        "FAKE_D4J_FIXTURES": fixtures_dir,
+        "FAKE_KILL_RATE": str(args.kill_rate),
+        "FAKE_BUILD_FAIL_RATE": str(args.build_fail_rate),
+        "FAKE_ASSERTION_RATE": str(args.assertion_rate),
+        "FAKE_CROSS_KILL_RATE": str(args.cross_kill_rate),
+        "FAKE_MUTANTS_PER_CLASS": str(args.mutants_per_class),
+        "FAKE_LATENCY_CHECKOUT": str(args.latency_checkout),
+        "FAKE_LATENCY_COMPILE": str(args.latency_compile),
+        "FAKE_LATENCY_TEST": str(args.latency_test),
+        "FAKE_LATENCY_TEST_STARTUP": str(args.latency_test_startup),
+        "FAKE_LATENCY_MUTATION": str(args.latency_mutation),
+        "FAKE_LATENCY_PIT": str(args.latency_pit),
+    })
+
+    report = {"classes": args.classes, "methods": args.methods, "bugs": args.bugs, "pipelines": {}}
+    try:
+        if args.pipeline in ("all", "classic"):
+            result = run_pipeline("classic", "main.py", workspace, env, log_dir)
+            mutants = 0
+            for wd in working_dirs(args.bugs):
+                mutants += count_rows(os.path.join(wd, "target", "pit-reports", "mutations.csv"))
+                mutants += count_rows(os.path.join(wd, "kill.csv"), header=True)
+            result["mutants"] = mutants
+            report["pipelines"]["classic"] = result
+
+        if args.pipeline in ("all", "llm"):
+            result = run_pipeline("llm", "main_llm.py", workspace, env, log_dir)
+            result["mutants"] = sum(
+                count_rows(path, header=True)
+                for path in glob.glob(os.path.join(workspace, "results", "**", "llm_mutation_results.csv"), recursive=True)
+            )
+            report["pipelines"]["llm"] = result
+
+        for result in report["pipelines"].values():
+            result["stages"] = stage_breakdown(trace_path, result["start"], result["end"])
+            wall = result["wall_seconds"]
+            result["mutants_per_second"] = result["mutants"] / wall if wall > 0 else 0.0
+    finally:
+        server.stop()
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+            for wd in working_dirs(args.bugs):
+                shutil.rmtree(wd, ignore_errors=True)
+
+    print_report(report)
+    if args.keep:
+        print(f"\nBenchmark files kept in {root}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local stand-in for the OpenRouter chat completions endpoint.
+
+Replays recorded completions from a JSON-lines file ({"model": ..., "content": ...}
+per line, cycled per model). When no recording matches the requested model, a
+completion is synthesized from the Java class found in the prompt so that the
+pipeline always receives mutations that pass the engine validation. With a
+trivial rate, some lines also get a compiler-equivalent rewrite (a literal
+wrapped in parentheses) and a duplicate of their mutation written that way.
+
+Requests with "stream": true are answered with server-sent events, one chunk
+per completion line, the last one carrying the usage.
+
+A tail rate makes that share of requests stall for the tail latency before
+answering, and failing models get HTTP 503 errors, to exercise request
+hedging and circuit breakers.
+
+Usage:
+    python benchmarks/fake_openrouter.py --port 8099 --recordings completions.jsonl
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OPERATOR_SWAPS = [(" + ", " - "), (" - ", " + "), (" * ", " / "), (" > ", " >= "), (" < ", " <= "),
+                  (" == ", " != "), (" && ", " || ")]
+
+
+def load_recordings(path):
+    """Load recorded completions grouped by model."""
+    recordings = defaultdict(list)
+    if not path:
+        return recordings
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            recordings[record.get("model", "*")].append(record["content"])
+    return recordings
+
+
+def extract_java_class(prompt):
+    """Return the class under test embedded in an engine prompt."""
+    match = re.search(r"<CODE>(.*?)</CODE>", prompt, re.S)
+    if match:
+        return match.group(1)
+    if "Original Java class:" in prompt:
+        return prompt.split("Original Java class:", 1)[1]
+    return prompt
+
+
+LITERAL_RE = re.compile(r"(?<![\w.])(\d+)(?![\w.])")
+
+
+def _trivial(seed_text, rate):
+    digest = hashlib.sha256(seed_text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64 < rate
+
+
+def synthesize_completion(prompt, max_mutations=20, trivial_rate=0.0):
+    """Produce one JSON mutation per line for mutable lines of the prompt's class."""
+    lines = []
+    for code_line in extract_java_class(prompt).split("\n"):
+        stripped = code_line.strip()
+        if not stripped.endswith(";") or stripped.startswith(("import", "package")):
+            continue
+        for old, new in OPERATOR_SWAPS:
+            if old in stripped:
+                mutated = stripped.replace(old, new, 1)
+                lines.append(json.dumps({"original_code": stripped, "mutated_code": mutated}))
+                if LITERAL_RE.search(stripped) and _trivial(stripped, trivial_rate):
+                    for code in (stripped, mutated):
+                        lines.append(json.dumps({"original_code": stripped,
+                                                 "mutated_code": LITERAL_RE.sub(r"(\1)", code, count=1)}))
+                break
+        if len(lines) >= max_mutations:
+            break
+    return "\n".join(lines)
+
+
+class FakeOpenRouter:
+    """Threaded HTTP server answering chat completion requests."""
+
+    def __init__(self, host="127.0.0.1", port=0, recordings=None, latency=0.0, token_latency=0.0,
+                 trace_path=None, trivial_rate=0.0, tail_rate=0.0, tail_latency=0.0, failing_models=()):
+        self.recordings = load_recordings(recordings)
+        self._cycles = {model: itertools.cycle(items) for model, items in self.recordings.items()}
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.token_latency = token_latency
+        self.trace_path = trace_path
+        self.trivial_rate = trivial_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.failing_models = set(failing_models)
+        self._random = random.Random(0)
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/chat/completions"
+
+    def completion_for(self, model, prompt):
+        with self._lock:
+            self.requests += 1
+            cycle = self._cycles.get(model) or self._cycles.get("*")
+            if cycle:
+                return next(cycle)
+        return synthesize_completion(prompt, trivial_rate=self.trivial_rate)
+
+    def extra_latency(self):
+        """Stall of the next request: the tail latency for a `tail_rate` share of them."""
+        with self._lock:
+            return self.tail_latency if self._random.random() < self.tail_rate else 0.0
+
+    def record(self, model, start, prompt_tokens, completion_tokens):
+        if not self.trace_path:
+            return
+        with self._lock, open(self.trace_path, "a") as f:
+            f.write(json.dumps({"tool": "openrouter", "stage": "llm", "start": start, "end": time.time(),
+                                "model": model, "prompt_tokens": prompt_tokens,
+                                "completion_tokens": completion_tokens}) + "\n")
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                start = time.time()
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                model = body.get("model", "")
+                if model in fake.failing_models:
+                    self.send_error(503, "Model unavailable")
+                    return
+                time.sleep(fake.extra_latency())
+                prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+                content = fake.completion_for(model, prompt)
+
+                prompt_tokens = len(prompt) // 4
+                completion_tokens = len(content) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens}
+                if body.get("stream"):
+                    self.stream(model, content, usage)
+                    fake.record(model, start, prompt_tokens, completion_tokens)
+                    return
+                time.sleep(fake.latency + fake.token_latency * completion_tokens)
+
+                payload = json.dumps({
+                    "id": f"fake-{fake.requests}",
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": usage,
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                fake.record(model, start, prompt_tokens, completion_tokens)
+
+            def stream(self, model, content, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+
+                def send(chunk):
+                    self.wfile.write(f"data: {chunk}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                # The fixed latency is the time to the first token
+                time.sleep(fake.latency)
+                for piece in content.splitlines(keepends=True):
+                    time.sleep(fake.token_latency * (len(piece) // 4))
+                    send(json.dumps({"id": f"fake-{fake.requests}", "model": model,
+                                     "choices": [{"index": 0, "delta": {"content": piece}}]}))
+                send(json.dumps({"id": f"fake-{fake.requests}", "model": model,
+                                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                                 "usage": usage}))
+                send("[DONE]")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenRouter server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--recordings", help="JSON-lines file of recorded completions")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed seconds per request")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds per completion token")
+    parser.add_argument("--trace", help="JSON-lines file receiving one record per request")
+    parser.add_argument("--trivial-rate", type=float, default=0.0,
+                        help="Share of lines also getting an equivalent and a duplicate mutation")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Share of requests stalling")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="Seconds a stalling request waits")
+    parser.add_argument("--failing-model", action="append", default=[], help="Model answering 503 (repeatable)")
+    args = parser.parse_args()
+
+    fake = FakeOpenRouter(args.host, args.port, args.recordings, args.latency, args.token_latency, args.trace,
+                          args.trivial_rate, args.tail_rate, args.tail_latency, args.failing_model)
+    print(f"Fake OpenRouter listening on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Helpers shared by the stand-in `defects4j` and `mvn` executables.
+
+Every knob is read from the environment so that the benchmark driver can
+configure the fakes without touching the code under test:
+
+    FAKE_TOOLS_TRACE          JSON-lines file receiving one record per invocation
+    FAKE_D4J_FIXTURES         Directory holding one fixture project per project id
+    FAKE_LATENCY_<STAGE>      Seconds spent by a stage (CHECKOUT, COMPILE, TEST,
+                              TEST_STARTUP, MUTATION, PIT). MUTATION and PIT are
+                              per generated mutant, TEST is per full suite.
+    FAKE_KILL_RATE            Probability that a mutant is killed (default 0.7)
+    FAKE_BUILD_FAIL_RATE      Probability that a mutated source fails to compile (default 0.05)
+    FAKE_MUTANTS_PER_CLASS    Mutants generated per class by Major and PIT (default 10)
+    FAKE_ASSERTION_RATE       Share of kills reported as a plain assertion failure, without a
+                              frame in the mutated class (default 0)
+    FAKE_CROSS_KILL_RATE      Share of kills failing the test of another class, which depends on
+                              the mutated one, with an assertion-only trace (default 0)
+"""
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+import zlib
+
+FIXTURE_MARKER = ".fixture_path"
+
+
+def env_float(name, default):
+    """Read a float setting from the environment."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_int(name, default):
+    """Read an integer setting from the environment."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def simulate_latency(stage, multiplier=1.0):
+    """Sleep for the configured latency of a stage."""
+    delay = env_float(f"FAKE_LATENCY_{stage.upper()}", 0.0) * multiplier
+    if delay > 0:
+        time.sleep(delay)
+
+
+def chance(seed_text, rate):
+    """Deterministic coin flip: True with probability `rate` for a given seed."""
+    digest = hashlib.sha256(seed_text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64 < rate
+
+
+def trace(tool, stage, start, **extra):
+    """Append one invocation record to the trace file, if configured."""
+    trace_path = os.environ.get("FAKE_TOOLS_TRACE")
+    if not trace_path:
+        return
+    record = {"tool": tool, "stage": stage, "start": start, "end": time.time(), "pid": os.getpid()}
+    record.update(extra)
+    with open(trace_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def java_sources(root):
+    """Yield (relative path, absolute path) of every .java file under root."""
+    for dirpath, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.endswith(".java"):
+                full_path = os.path.join(dirpath, name)
+                yield os.path.relpath(full_path, root), full_path
+
+
+def fixture_path(working_dir):
+    """Return the fixture a working directory was checked out from, if known."""
+    marker = os.path.join(working_dir, FIXTURE_MARKER)
+    if not os.path.exists(marker):
+        return None
+    with open(marker) as f:
+        return f.read().strip()
+
+
+def mutated_sources(working_dir):
+    """
+    Compare the sources of a working directory against its fixture.
+
+    Returns:
+        list: (relative path, first differing 1-based line, source text) for every changed file.
+    """
+    fixture = fixture_path(working_dir)
+    src_root = os.path.join(working_dir, "src", "main", "java")
+    if not fixture or not os.path.isdir(src_root):
+        return []
+
+    changed = []
+    for rel_path, full_path in java_sources(src_root):
+        original_path = os.path.join(fixture, "src", "main", "java", rel_path)
+        with open(full_path) as f:
+            source = f.read()
+        original = ""
+        if os.path.exists(original_path):
+            with open(original_path) as f:
+                original = f.read()
+        if source == original:
+            continue
+        line_no = 1
+        for line_no, (a, b) in enumerate(zip(source.split("\n"), original.split("\n")), start=1):
+            if a != b:
+                break
+        changed.append((rel_path, line_no, source))
+    return changed
+
+
+def method_at_line(source, line_no):
+    """Return the name of the synthetic method enclosing a line, if any."""
+    lines = source.split("\n")
+    for line in reversed(lines[:line_no]):
+        line = line.strip()
+        if line.startswith("public int method") and "(" in line:
+            return line.split("public int ", 1)[1].split("(", 1)[0]
+    return "method0"
+
+
+def _utf8(text):
+    data = text.encode("utf-8")
+    return struct.pack(">BH", 1, len(data)) + data
+
+
+def fake_class_file(class_name, source):
+    """
+    Minimal well-formed class file standing in for javac output.
+
+    The "bytecode" is a FakeBody class attribute holding the hash of the
+    source without comments, whitespace and parentheses around literals,
+    so reformatted or trivially rewritten sources compile to the same
+    bytes. The LineNumberTable and SourceFile debug attributes change with
+    any edit of the source, like real ones do when lines move.
+    """
+    code = re.sub(r"//[^\n]*|/\*.*?\*/", "", source, flags=re.S)
+    code = re.sub(r"\s+", "", code)
+    code = re.sub(r"\((\d+)\)", r"\1", code)
+    body = hashlib.sha1(code.encode("utf-8")).digest()
+
+    internal_name = class_name.replace(".", "/")
+    pool = [_utf8(internal_name), struct.pack(">BH", 7, 1), _utf8("java/lang/Object"), struct.pack(">BH", 7, 3),
+            _utf8("Code"), _utf8("LineNumberTable"), _utf8("SourceFile"),
+            _utf8(internal_name.rsplit("/", 1)[-1] + ".java"), _utf8("run"), _utf8("()V"), _utf8("FakeBody")]
+
+    line_table = struct.pack(">HHH", 1, 0, zlib.crc32(source.encode("utf-8")) & 0xFFFF)
+    code_attribute = struct.pack(">HHI", 0, 0, 1) + b"\xb1" + struct.pack(">H", 0) + struct.pack(">H", 1) + \
+        struct.pack(">HI", 6, len(line_table)) + line_table
+    method = struct.pack(">HHHH", 0x0009, 9, 10, 1) + struct.pack(">HI", 5, len(code_attribute)) + code_attribute
+
+    return b"".join([
+        b"\xca\xfe\xba\xbe", struct.pack(">HH", 0, 55),
+        struct.pack(">H", len(pool) + 1), *pool,
+        struct.pack(">HHHH", 0x0021, 2, 4, 0),  # flags, this, super, no interfaces
+        struct.pack(">H", 0),  # fields
+        struct.pack(">H", 1), method,
+        struct.pack(">H", 2),
+        struct.pack(">HIH", 7, 2, 8),  # SourceFile
+        struct.pack(">HI", 11, len(body)), body,
+    ])
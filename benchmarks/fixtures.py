@@ -0,0 +1,107 @@
+import os
+
+# Package used by every synthetic project
+FIXTURE_PACKAGE = "org.bench"
+
+CLASS_TEMPLATE = """/*
+ * Synthetic benchmark class generated by benchmarks/fixtures.py
+ */
+package {package};
+
+import java.util.List;
+
+public class {class_name} {{
+
+    private int state;
+
+{methods}
+}}
+"""
+
+METHOD_TEMPLATE = """    /**
+     * Synthetic method {index}.
+     */
+    public int method{index}(int a, int b) {{
+        int result = a + {constant}; // offset
+        if (result > b) {{
+            result = result - b;
+        }}
+        state = state + 1;
+        return result * {factor};
+    }}
+"""
+
+TEST_TEMPLATE = """package {package};
+
+import org.junit.Test;
+import static org.junit.Assert.assertEquals;
+
+public class {class_name}Test {{
+
+{methods}
+}}
+"""
+
+TEST_METHOD_TEMPLATE = """    @Test
+    public void testMethod{index}() {{
+        {class_name} subject = new {class_name}();
+        assertEquals({expected}, subject.method{index}(1, 100));
+    }}
+"""
+
+
+def build_java_class(class_name, methods):
+    """
+    Build the source of a synthetic Java class with the given number of methods.
+    """
+    body = "\n".join(
+        METHOD_TEMPLATE.format(index=i, constant=i + 1, factor=(i % 5) + 2)
+        for i in range(methods)
+    )
+    return CLASS_TEMPLATE.format(package=FIXTURE_PACKAGE, class_name=class_name, methods=body)
+
+
+def build_java_test(class_name, methods):
+    """
+    Build the JUnit test class exercising every method of a synthetic class.
+    """
+    body = "\n".join(
+        TEST_METHOD_TEMPLATE.format(index=i, class_name=class_name, expected=(1 + i + 1) * ((i % 5) + 2))
+        for i in range(methods)
+    )
+    return TEST_TEMPLATE.format(package=FIXTURE_PACKAGE, class_name=class_name, methods=body)
+
+
+def create_java_project(project_dir, classes=10, methods=5):
+    """
+    Create a Maven-layout Java project with synthetic classes and matching tests.
+
+    Args:
+        project_dir (str): Destination directory (created if missing).
+        classes (int): Number of classes to generate.
+        methods (int): Number of methods per class.
+
+    Returns:
+        list: Fully-qualified names of the generated classes.
+    """
+    package_path = os.path.join(*FIXTURE_PACKAGE.split("."))
+    src_dir = os.path.join(project_dir, "src", "main", "java", package_path)
+    test_dir = os.path.join(project_dir, "src", "test", "java", package_path)
+    os.makedirs(src_dir, exist_ok=True)
+    os.makedirs(test_dir, exist_ok=True)
+
+    class_names = []
+    for i in range(classes):
+        class_name = f"Class{i}"
+        with open(os.path.join(src_dir, f"{class_name}.java"), "w") as f:
+            f.write(build_java_class(class_name, methods))
+        with open(os.path.join(test_dir, f"{class_name}Test.java"), "w") as f:
+            f.write(build_java_test(class_name, methods))
+        class_names.append(f"{FIXTURE_PACKAGE}.{class_name}")
+
+    with open(os.path.join(project_dir, "pom.xml"), "w") as f:
+        f.write("<project><modelVersion>4.0.0</modelVersion>"
+                "<groupId>org.bench</groupId><artifactId>bench</artifactId>"
+                "<version>1.0</version></project>\n")
+
+    return class_names
@@ -0,0 +1,320 @@
+"""
+Micro-benchmark and memory-regression suite for the pure-Python hot paths.
+
+Generates synthetic inputs at several scales and records, per function and
+scale, the wall time and the peak traced memory (tracemalloc). Results are
+compared against a stored baseline so regressions surface before a
+production sweep.
+
+Benchmarked paths:
+    - remove_comments          LLMMutationEngineWithTest._remove_comments
+    - parse_mutations          LLM output JSON-line parsing (_parse_mutations)
+    - analyze_defects4j_report Major kill.csv/mutants.log analysis (includes export)
+    - export_pit_like          covMap/testMap expansion to mutants_major.csv
+    - kill_matrix              KillMatrix from Major reports and greedy minimal test set
+    - analyze_pitest_report    PIT mutations.csv analysis
+
+Usage:
+    python benchmarks/micro_benchmark.py                       # compare with baseline (fails without one)
+    python benchmarks/micro_benchmark.py --save-baseline       # record a new baseline
+    python benchmarks/micro_benchmark.py --scales 1000,10000 --only parse_mutations
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "micro_baseline.json")
+# Scales of the committed baseline; 1_000_000 takes several minutes per benchmark, pass it
+# with --scales (and --baseline to a local file) when profiling at production size
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+
+def ensure_config():
+    """
+    The engines import environment.config at module level; provide
+    placeholder values when the local configuration has not been created.
+    """
+    try:
+        import environment.config  # noqa: F401
+    except ImportError:
+        config = types.ModuleType("environment.config")
+        config.D4J_BIN_PATH = ""
+        config.JAVA_HOME_11_PATH = ""
+        config.RESULTS_FOLDER = "results"
+        config.OPENROUTER_API_KEY = ""
+        sys.modules["environment.config"] = config
+
+
+# --- Synthetic input generators -------------------------------------------------
+
+def make_java_source(lines, rng):
+    """Java source of roughly `lines` lines mixing code, strings and comments."""
+    out = ["/*", " * License header", " */", "package org.bench;", "", "public class Big {"]
+    while len(out) < lines:
+        i = len(out)
+        kind = rng.randrange(6)
+        if kind == 0:
+            out.append(f"    /** Javadoc for method {i}. */")
+        elif kind == 1:
+            out.append(f"    int value{i} = a + {i}; // trailing comment")
+        elif kind == 2:
+            out.append(f"    String url{i} = \"http://host/{i}\"; /* inline */")
+        elif kind == 3:
+            out.append("    /*")
+            out.append(f"     * Block comment {i}")
+            out.append("     */")
+        else:
+            out.append(f"    if (value > {i}) {{ value = value - {i}; }}")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def make_llm_output(mutations, rng):
+    """LLM output with `mutations` JSON lines plus noise, and the matching line index."""
+    valid_lines = {}
+    out = ["```json"]
+    for i in range(mutations):
+        original = f"int value{i} = a + {i};"
+        valid_lines[original] = [i + 1]
+        roll = rng.random()
+        if roll < 0.05:
+            out.append("not json at all")
+        elif roll < 0.15:
+            out.append(json.dumps({"original_code": f"missing line {i}", "mutated_code": "x"}))
+        else:
+            out.append(json.dumps({"original_code": original, "mutated_code": f"int value{i} = a - {i};"}))
+    out.append("```")
+    return "\n".join(out), valid_lines
+
+
+def write_major_reports(base_dir, mutants, classes, tests_per_mutant, rng):
+    """Write kill.csv, mutants.log, testMap.csv and covMap.csv for `mutants` mutants."""
+    statuses = ["FAIL"] * 6 + ["LIVE"] * 2 + ["UNCOV", "TIME", "EXC"]
+    tests = max(classes * 5, tests_per_mutant)
+    with open(os.path.join(base_dir, "kill.csv"), "w") as f:
+        f.write("MutantNo,[FAIL | TIME | EXC | LIVE | UNCOV]\n")
+        for m in range(1, mutants + 1):
+            f.write(f"{m},{rng.choice(statuses)}\n")
+    with open(os.path.join(base_dir, "mutants.log"), "w") as f:
+        for m in range(1, mutants + 1):
+            cls = m % classes
+            f.write(f"{m}:ROR:<(int,int):<=(int,int):org.bench.Class{cls}@method{m % 7}(int):{m % 500}:"
+                    f"a < b |==> a <= b\n")
+    with open(os.path.join(base_dir, "testMap.csv"), "w") as f:
+        f.write("TestNo,TestName\n")
+        for t in range(1, tests + 1):
+            f.write(f"{t},org.bench.Class{t % classes}Test[test{t}]\n")
+    with open(os.path.join(base_dir, "covMap.csv"), "w") as f:
+        f.write("TestNo,MutantNo\n")
+        for m in range(1, mutants + 1):
+            for t in rng.sample(range(1, tests + 1), tests_per_mutant):
+                f.write(f"{t},{m}\n")
+    return os.path.join(base_dir, "kill.csv"), os.path.join(base_dir, "mutants.log")
+
+
+def write_pit_report(path, mutants, classes, rng):
+    """Write a PIT mutations.csv with `mutants` rows."""
+    statuses = ["KILLED"] * 6 + ["SURVIVED"] * 2 + ["NO_COVERAGE", "TIMED_OUT"]
+    with open(path, "w") as f:
+        for m in range(mutants):
+            cls = m % classes
+            status = rng.choice(statuses)
+            test = f"org.bench.Class{cls}Test.test{m % 9}(org.bench.Class{cls}Test)" if status == "KILLED" else "none"
+            f.write(f"Class{cls}.java,org.bench.Class{cls},"
+                    f"org.pitest.mutationtest.engine.gregor.mutators.MathMutator,method{m % 7},{m % 500},"
+                    f"{status},{test}\n")
+
+
+def make_major_dataframe(mutants, classes, rng):
+    """The DataFrame analyze_defects4j_report hands to export_pit_like."""
+    import pandas as pd
+    statuses = ["KILLED"] * 6 + ["SURVIVED"] * 2 + ["NO_COVERAGE", "TIMED_OUT"]
+    return pd.DataFrame({
+        "ID": [str(m) for m in range(1, mutants + 1)],
+        "Status": [rng.choice(statuses) for _ in range(mutants)],
+        "Class": [f"org.bench.Class{m % classes}" for m in range(1, mutants + 1)],
+        "Mutator": ["ROR"] * mutants,
+        "Method": [f"method{m % 7}" for m in range(1, mutants + 1)],
+        "Line": [str(m % 500) for m in range(1, mutants + 1)],
+    })
+
+
+# --- Benchmarks -----------------------------------------------------------------
+
+def prepare_remove_comments(scale, work_dir, args, rng):
+    from llm.llm_mutation_engine_with_test import LLMMutationEngineWithTest
+    engine = LLMMutationEngineWithTest("benchmark")
+    source = make_java_source(scale, rng)
+    return lambda: engine._remove_comments(source)
+
+
+def prepare_parse_mutations(scale, work_dir, args, rng):
+    from llm.llm_mutation_engine_with_test import LLMMutationEngineWithTest
+    engine = LLMMutationEngineWithTest("benchmark")
+    text, valid_lines = make_llm_output(scale, rng)
+    return lambda: engine._parse_mutations(text, valid_lines)
+
+
+def prepare_analyze_defects4j_report(scale, work_dir, args, rng):
+    from modules.major_test_module import analyze_defects4j_report
+    kill_csv, mutants_log = write_major_reports(work_dir, scale, args.classes, args.tests_per_mutant, rng)
+    return lambda: analyze_defects4j_report(kill_csv, mutants_log)
+
+
+def prepare_export_pit_like(scale, work_dir, args, rng):
+    from modules.major_test_module import export_pit_like
+    kill_csv, _ = write_major_reports(work_dir, scale, args.classes, args.tests_per_mutant, rng)
+    df = make_major_dataframe(scale, args.classes, rng)
+    return lambda: export_pit_like(df, kill_csv)
+
+
+def prepare_kill_matrix(scale, work_dir, args, rng):
+    from modules.kill_matrix import KillMatrix
+    write_major_reports(work_dir, scale, args.classes, args.tests_per_mutant, rng)
+    return lambda: KillMatrix.from_major(work_dir).minimal_test_set()
+
+
+def prepare_analyze_pitest_report(scale, work_dir, args, rng):
+    from modules.pit_test_module import analyze_pitest_report
+    path = os.path.join(work_dir, "mutations.csv")
+    write_pit_report(path, scale, args.classes, rng)
+    return lambda: analyze_pitest_report(path)
+
+
+BENCHMARKS = {
+    "remove_comments": prepare_remove_comments,
+    "parse_mutations": prepare_parse_mutations,
+    "analyze_defects4j_report": prepare_analyze_defects4j_report,
+    "export_pit_like": prepare_export_pit_like,
+    "kill_matrix": prepare_kill_matrix,
+    "analyze_pitest_report": prepare_analyze_pitest_report,
+}
+
+
+def measure(func, repeat):
+    """
+    Return (best wall seconds, peak traced bytes) for func.
+    Timing runs are done without tracemalloc, which slows allocation-heavy code.
+    """
+    best = float("inf")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    """Return a list of human-readable regressions against the baseline."""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline[key]
+        if current["seconds"] > reference["seconds"] * (1 + time_tolerance):
+            regressions.append(f"{key}: time {reference['seconds']:.4f}s -> {current['seconds']:.4f}s")
+        if current["peak_bytes"] > reference["peak_bytes"] * (1 + memory_tolerance):
+            regressions.append(f"{key}: peak memory {reference['peak_bytes'] / 2**20:.1f}MiB -> "
+                               f"{current['peak_bytes'] / 2**20:.1f}MiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for report parsing and prompt processing")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Comma-separated input sizes (mutants, LLM lines or source lines)")
+    parser.add_argument("--only", help="Comma-separated subset of benchmarks to run")
+    parser.add_argument("--classes", type=int, default=200, help="Distinct classes in generated reports")
+    parser.add_argument("--tests-per-mutant", type=int, default=3, help="covMap rows per mutant")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is kept)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="Allowed relative peak growth")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    ensure_config()
+    scales = [int(s) for s in args.scales.split(",") if s]
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {}
+    print(f"{'benchmark':<28}{'scale':>10}{'seconds':>12}{'peak MiB':>12}")
+    for name in selected:
+        for scale in scales:
+            work_dir = tempfile.mkdtemp(prefix="mutationcompare_micro_")
+            try:
+                func = BENCHMARKS[name](scale, work_dir, args, random.Random(args.seed))
+                seconds, peak = measure(func, args.repeat)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            results[f"{name}@{scale}"] = {"seconds": seconds, "peak_bytes": peak}
+            print(f"{name:<28}{scale:>10}{seconds:>12.4f}{peak / 2**20:>12.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": baseline}, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nERROR: no baseline found at {args.baseline}; run with --save-baseline to create one")
+        return 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f).get("results", {})
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"\nERROR: no baseline for {', '.join(missing)}; run with --save-baseline to add them")
+        return 2
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\n=== REGRESSIONS ===")
+        for regression in regressions:
+            print(regression)
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Single entry point for the mutation tools.
+
+    python cli.py pit|major|llm [--project ID] [--projects CSV]   run one tool
+    python cli.py run pit major llm [--project ID]                 run several on one checkout
+    python cli.py analyze pit|major|llm PATH                       statistics of a report
+    python cli.py compare [--project ID] [--tools pit major llm]   mutation scores side by side
+    python cli.py compare --stats                                  ... with bootstrap CIs and paired tests
+    python cli.py matrix pit|major [--path PATH]                   test x mutant kill matrix queries
+    python cli.py status                                           what RESULTS_FOLDER holds
+    python cli.py worker --queue FILE                              evaluate queued mutants
+
+`llm --queue FILE` leaves the evaluation of the mutants to any number of
+workers, on this or other hosts, sharing FILE.
+
+Only the standard library and the configuration are imported up front;
+pandas, requests and the LLM engines are loaded by the subcommands that
+need them (see modules/mutation_tools.py).
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+
+
+def _tool_options(name, args):
+    if name == "major" and getattr(args, "shards", None):
+        return {"shards": args.shards}
+    if name == "llm":
+        return {"models": getattr(args, "model", None), "queue": getattr(args, "queue", None)}
+    return {}
+
+
+def cmd_run(args):
+    from environment.config import D4J_BIN_PATH, JAVA_HOME_11_PATH
+    from modules.mutation_tools import get_tool, read_projects, run_tools
+    from utils import setup_environment
+
+    setup_environment(D4J_BIN_PATH, JAVA_HOME_11_PATH)
+    tools = [get_tool(name, **_tool_options(name, args)) for name in args.tools]
+    run_tools(tools, read_projects(args.projects, args.project))
+
+
+def cmd_analyze(args):
+    from modules.mutation_tools import get_tool, read_projects
+
+    project = read_projects(args.projects, args.project)[0] if args.project else None
+    get_tool(args.tool, **_tool_options(args.tool, args)).analyze(args.path, project)
+
+
+def _compare_groups(args):
+    """(label, tool) pairs to compare; with several models each LLM model is its own group."""
+    from modules.mutation_tools import get_tool
+
+    groups = []
+    for name in args.tools:
+        tool = get_tool(name, **_tool_options(name, args))
+        models = tool.model_names() if name == "llm" else []
+        if len(models) > 1:
+            groups += [(f"llm:{model}", get_tool(name, models=[model])) for model in models]
+        else:
+            groups.append((name, tool))
+    return groups
+
+
+def cmd_compare(args):
+    from modules.mutation_tools import OUTCOME_KILLED, OUTCOME_SURVIVED, read_projects, score
+
+    groups = _compare_groups(args)
+    results = {label: {} for label, _ in groups}
+    print(f"{'project':<12} {'bug':<5} {'tool':<6} {'mutants':>8} {'killed':>7} {'survived':>9} "
+          f"{'uncovered':>10} {'invalid':>8} {'equiv':>6} {'dup':>5} {'score':>7}")
+    for project in read_projects(args.projects, args.project):
+        for label, tool in groups:
+            outcomes = tool.outcomes(project)
+            if not outcomes:
+                continue
+            counts = score(outcomes)
+            bug = f"{project['project_id']}-{project['bug_id']}"
+            results[label][bug] = (counts[OUTCOME_KILLED], counts[OUTCOME_KILLED] + counts[OUTCOME_SURVIVED])
+            score_text = "-" if counts["score"] is None else f"{counts['score']:.1f}%"
+            print(f"{project['project_id']:<12} {project['bug_id']:<5} {label:<6} {len(outcomes):>8} "
+                  f"{counts['killed']:>7} {counts['survived']:>9} {counts['uncovered']:>10} "
+                  f"{counts['invalid']:>8} {counts['equivalent']:>6} {counts['duplicate']:>5} {score_text:>7}")
+
+    if args.stats:
+        from modules.stats_module import compare_groups
+        compare_groups({label: counts for label, counts in results.items() if counts},
+                       args.resamples, args.confidence, args.seed)
+
+
+def cmd_matrix(args):
+    from modules.mutation_tools import get_tool, read_projects
+
+    tool = get_tool(args.tool)
+    if args.path:
+        matrices = [(args.path, tool.build_kill_matrix(args.path))]
+        if args.save:
+            matrices[0][1].save(args.save)
+    else:
+        matrices = [(f"{project['project_id']} {project['bug_id']}", tool.kill_matrix(project))
+                    for project in read_projects(args.projects, args.project)]
+
+    for label, matrix in matrices:
+        if matrix is None:
+            print(f"{label}: no kill matrix")
+            continue
+        summary = matrix.summary()
+        print(f"=== {label} ({tool.name}) ===")
+        print(", ".join(f"{key}: {value}" for key, value in summary.items()))
+        kill_counts = matrix.kill_counts()
+        for i in kill_counts.argsort()[::-1][:args.top]:
+            if kill_counts[i]:
+                print(f"  {kill_counts[i]:>6}  {matrix.tests[i]}")
+        minimal = matrix.minimal_test_set()
+        print(f"Minimal killing test set: {len(minimal)} of {summary['killing_tests']} killing tests")
+
+
+def cmd_worker(args):
+    from environment.config import D4J_BIN_PATH, JAVA_HOME_11_PATH
+    from main_llm import evaluate_queued_mutant
+    from modules.work_queue import run_worker
+    from utils import setup_environment
+
+    setup_environment(D4J_BIN_PATH, JAVA_HOME_11_PATH)
+    run_worker(args.queue, evaluate_queued_mutant, worker=args.worker_id, sweep=args.sweep,
+               idle_exit=args.idle_exit, lease_seconds=args.lease_seconds)
+
+
+def _count_rows(path):
+    with open(path, newline="") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def cmd_status(args):
+    from environment.config import RESULTS_FOLDER
+
+    if not os.path.isdir(RESULTS_FOLDER):
+        print(f"{RESULTS_FOLDER} does not exist yet")
+        return
+
+    print(f"=== {RESULTS_FOLDER} ===")
+    for entry in sorted(os.listdir(RESULTS_FOLDER)):
+        path = os.path.join(RESULTS_FOLDER, entry)
+        if entry.endswith(".csv"):
+            print(f"{entry}: {_count_rows(path)} rows")
+        elif entry.endswith(".sqlite"):
+            connection = sqlite3.connect(path)
+            try:
+                (count,) = connection.execute("SELECT COUNT(*) FROM results").fetchone()
+                print(f"{entry}: {count} cached results")
+            except sqlite3.Error as e:
+                print(f"{entry}: unreadable ({e})")
+            finally:
+                connection.close()
+        elif os.path.isdir(path):
+            # LLM results are nested per model slug, e.g. openai/gpt-5.1-chat/
+            files = sorted(os.path.relpath(os.path.join(root, name), path)
+                           for root, _, names in os.walk(path) for name in names)
+            results = [f for f in files if f.endswith(".csv")]
+            details = ", ".join(f"{f}: {_count_rows(os.path.join(path, f))} rows" for f in results)
+            print(f"{entry}/: {len(files)} files" + (f" ({details})" if details else ""))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run and compare mutation testing tools on Defects4J projects")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_project_options(sub):
+        sub.add_argument("--projects", default="environment/projects.csv", help="Projects CSV")
+        sub.add_argument("--project", help="Only this project id")
+
+    def add_tool_options(sub):
+        sub.add_argument("--shards", type=int, help="Parallel Major shards")
+        sub.add_argument("--model", action="append", help="LLM model (repeatable)")
+        sub.add_argument("--queue", help="Shared job queue file evaluated by `worker` processes")
+
+    for name in ("pit", "major", "llm"):
+        sub = subparsers.add_parser(name, help=f"Run {name} on the projects")
+        add_project_options(sub)
+        add_tool_options(sub)
+        sub.set_defaults(func=cmd_run, tools=[name])
+
+    sub = subparsers.add_parser("run", help="Run several tools on each checkout, in order")
+    sub.add_argument("tools", nargs="+", choices=["pit", "major", "llm"])
+    add_project_options(sub)
+    add_tool_options(sub)
+    sub.set_defaults(func=cmd_run)
+
+    sub = subparsers.add_parser("analyze", help="Print the statistics of a report")
+    sub.add_argument("tool", choices=["pit", "major", "llm"])
+    sub.add_argument("path", help="PIT mutations.csv, Major working dir or kill.csv, LLM results CSV")
+    add_project_options(sub)
+    add_tool_options(sub)
+    sub.set_defaults(func=cmd_analyze)
+
+    sub = subparsers.add_parser("compare", help="Compare the mutation scores of the tools")
+    sub.add_argument("--tools", nargs="+", default=["pit", "major", "llm"], choices=["pit", "major", "llm"])
+    sub.add_argument("--stats", action="store_true",
+                     help="Pooled scores with bootstrap CIs over bugs and paired permutation tests")
+    sub.add_argument("--resamples", type=int, default=10_000, help="Bootstrap and permutation resamples")
+    sub.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals")
+    sub.add_argument("--seed", type=int, default=0, help="Random seed of the resampling")
+    add_project_options(sub)
+    add_tool_options(sub)
+    sub.set_defaults(func=cmd_compare)
+
+    sub = subparsers.add_parser("matrix", help="Query the test x mutant kill matrix of a tool")
+    sub.add_argument("tool", choices=["pit", "major"])
+    sub.add_argument("--path", help="Build from a PIT mutations.csv or Major working dir instead of RESULTS_FOLDER")
+    sub.add_argument("--save", help="Folder to save the matrix built from --path")
+    sub.add_argument("--top", type=int, default=10, help="Print the N tests killing most mutants")
+    add_project_options(sub)
+    sub.set_defaults(func=cmd_matrix)
+
+    sub = subparsers.add_parser("worker", help="Evaluate mutants from a shared job queue")
+    sub.add_argument("--queue", required=True, help="Job queue file, on storage shared by the hosts")
+    sub.add_argument("--worker-id", help="Worker name (host name and pid by default)")
+    sub.add_argument("--sweep", help="Only take the jobs of this sweep")
+    sub.add_argument("--idle-exit", type=float, help="Stop after this many seconds without jobs")
+    sub.add_argument("--lease-seconds", type=float, default=120,
+                     help="Seconds before a job of a dead worker goes back to the queue")
+    sub.set_defaults(func=cmd_worker)
+
+    sub = subparsers.add_parser("status", help="Summarize the contents of RESULTS_FOLDER")
+    sub.set_defaults(func=cmd_status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
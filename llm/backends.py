@@ -0,0 +1,494 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from environment.config import OPENROUTER_API_KEY
+from llm.telemetry import percentile
+
+# OpenRouter endpoint, overridable to point the engine at a local stand-in server
+OPENROUTER_API_URL = os.environ.get("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# Any OpenAI-compatible local server, e.g. llama.cpp:
+#   llama-server -m codellama-7b-instruct.Q4_K_M.gguf --port 8080 --parallel 8 --cont-batching
+LOCAL_LLM_URL = os.environ.get("LOCAL_LLM_URL", "http://localhost:8080/v1/chat/completions")
+
+# Model names starting with these prefixes are served by the local backends
+LOCAL_MODEL_PREFIX = "local/"
+TRANSFORMERS_MODEL_PREFIX = "hf/"
+
+# Seconds to connect, and at most for a whole remote request (first byte to last token)
+CONNECT_TIMEOUT = 10
+REQUEST_TIMEOUT = 300
+
+# Hedging of remote requests: a duplicate request is sent to a fallback model (see
+# FALLBACK_MODELS, never to the same paid model) when the first one is slower than this
+# percentile of the recent latencies of its model (after HEDGE_MIN_SAMPLES requests,
+# HEDGE_INITIAL_DELAY seconds before); None disables hedging
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 10
+HEDGE_INITIAL_DELAY = 60
+HEDGE_MAX_REQUESTS = 2
+LATENCY_WINDOW = 200
+
+# Circuit breakers: a model failing or timing out this many times in a row is skipped
+# for BREAKER_COOLDOWN seconds, then tried again with a single request
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 60
+
+# Models hedges and retries may be routed to when a model is slow or failing, e.g.
+# {"x-ai/grok-4.1-fast:free": ["openai/gpt-oss-20b:free"]}. Their mutants are then
+# attributed to the requested model, so leave empty when comparing models.
+FALLBACK_MODELS = {}
+
+
+class LLMBackend:
+    """
+    Base class of completion backends: keeps request and token statistics.
+
+    Attributes:
+        name (str): Label used in reports.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._first_start = None
+        self._last_end = None
+
+    def request(self, prompt: str) -> dict:
+        """
+        Run one completion.
+
+        Returns:
+            dict: 'text', 'prompt_tokens', 'completion_tokens',
+            'ttft_seconds' (None when unknown) and 'latency_seconds'.
+        """
+        raise NotImplementedError
+
+    def complete(self, prompt: str) -> str:
+        """Run one completion and return its text."""
+        return self.request(prompt)["text"]
+
+    def _record(self, start, end, prompt_tokens, completion_tokens, requests=1):
+        with self._lock:
+            self.request_count += requests
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self._first_start = start if self._first_start is None else min(self._first_start, start)
+            self._last_end = end if self._last_end is None else max(self._last_end, end)
+
+    def tokens_per_second(self):
+        """Completion tokens per second of wall time spent with requests in flight."""
+        if self._first_start is None or self._last_end <= self._first_start:
+            return 0.0
+        return self.completion_tokens / (self._last_end - self._first_start)
+
+    def report(self):
+        """Print throughput statistics of this backend."""
+        print(f"Backend {self.name}: {self.request_count} requests, {self.prompt_tokens} prompt tokens, "
+              f"{self.completion_tokens} completion tokens, {self.tokens_per_second():.1f} tokens/sec")
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Chat completions client for any OpenAI-compatible server.
+
+    Attributes:
+        url (str): Chat completions endpoint.
+        model (str): Model name sent with each request.
+    """
+
+    def __init__(self, url, model, api_key=None, timeout=None, name=None, stream=True):
+        super().__init__(name or model)
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.stream = stream
+
+    def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def request(self, prompt: str) -> dict:
+        """
+        Send a single-message chat completion request. With streaming the
+        answer is read as server-sent events, which gives the time to the
+        first token; usage comes from the final chunk.
+        """
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if self.stream:
+            payload.update(stream=True, stream_options={"include_usage": True})
+
+        # Imported here so that commands that never call an LLM do not load it
+        import requests
+
+        start = time.time()
+        response = requests.post(
+            url=self.url,
+            headers=self._headers(),
+            data=json.dumps(payload),
+            timeout=(CONNECT_TIMEOUT, self.timeout) if self.timeout else None,
+            stream=self.stream
+        )
+        response.raise_for_status()
+
+        ttft = None
+        if self.stream:
+            parts, usage = [], {}
+            for raw in response.iter_lines():
+                # The read timeout only bounds the wait for each line, not the whole answer
+                if self.timeout and time.time() - start > self.timeout:
+                    response.close()
+                    raise TimeoutError(f"{self.name}: no complete answer after {self.timeout}s")
+                line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+                # Other lines are keep-alive comments
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get("usage") or usage
+                for choice in chunk.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        if ttft is None:
+                            ttft = time.time() - start
+                        parts.append(delta)
+            text = "".join(parts).strip()
+        else:
+            body = response.json()
+            text = body["choices"][0]["message"]["content"].strip()
+            usage = body.get("usage") or {}
+        end = time.time()
+
+        result = {
+            "text": text,
+            "prompt_tokens": usage.get("prompt_tokens", len(prompt) // 4),
+            "completion_tokens": usage.get("completion_tokens", len(text) // 4),
+            "ttft_seconds": ttft,
+            "latency_seconds": end - start,
+        }
+        self._record(start, end, result["prompt_tokens"], result["completion_tokens"])
+        return result
+
+
+class OpenRouterBackend(OpenAICompatibleBackend):
+    """OpenRouter chat completions."""
+
+    def __init__(self, model, timeout=REQUEST_TIMEOUT):
+        super().__init__(OPENROUTER_API_URL, model, api_key=OPENROUTER_API_KEY, timeout=timeout,
+                         name=f"openrouter/{model}")
+
+
+class TransformersBackend(LLMBackend):
+    """
+    In-process generation with a Hugging Face causal language model.
+
+    Prompts are batched: request_batch sorts them by token length, splits
+    them into buckets of `batch_size` similar lengths (little padding), and
+    generates each bucket in one call. Sequences stop on their own EOS token
+    or stop string while the rest of the bucket keeps generating.
+
+    torch and transformers are only needed when this backend is used.
+    """
+
+    def __init__(self, model_name, device=None, batch_size=8, max_new_tokens=1000, stop=None, name=None):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        super().__init__(name or f"hf/{model_name}")
+        self.torch = torch
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = batch_size
+        self.max_new_tokens = max_new_tokens
+        self.stop = stop or []
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Decoder-only models must be padded on the left to generate in batch
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+
+    def request(self, prompt: str) -> dict:
+        return self.request_batch([prompt])[0]
+
+    def complete_batch(self, prompts: list) -> list:
+        """Generate completions for many prompts; texts in prompt order."""
+        return [result["text"] for result in self.request_batch(prompts)]
+
+    def _cut_at_stop(self, text):
+        for stop in self.stop:
+            index = text.find(stop)
+            if index != -1:
+                text = text[:index]
+        return text.strip()
+
+    def request_batch(self, prompts: list) -> list:
+        """
+        Generate completions for many prompts.
+
+        Returns:
+            list: One result dict per prompt (see LLMBackend.request), in
+            prompt order; latency is that of the whole bucket.
+        """
+        encoded = [self.tokenizer(prompt).input_ids for prompt in prompts]
+        order = sorted(range(len(prompts)), key=lambda i: len(encoded[i]))
+        results = [None] * len(prompts)
+
+        generate_kwargs = {
+            "max_new_tokens": self.max_new_tokens,
+            "do_sample": False,
+            "pad_token_id": self.tokenizer.pad_token_id,
+        }
+        if self.stop:
+            generate_kwargs.update(stop_strings=self.stop, tokenizer=self.tokenizer)
+
+        for offset in range(0, len(order), self.batch_size):
+            bucket = order[offset:offset + self.batch_size]
+            batch = self.tokenizer.pad({"input_ids": [encoded[i] for i in bucket]},
+                                       padding=True, return_tensors="pt").to(self.device)
+
+            start = time.time()
+            with self.torch.no_grad():
+                outputs = self.model.generate(**batch, **generate_kwargs)
+            end = time.time()
+
+            new_tokens = outputs[:, batch["input_ids"].shape[1]:]
+            generated = (new_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+            self._record(start, end, sum(len(encoded[i]) for i in bucket), sum(generated), requests=len(bucket))
+
+            texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+            for index, text, completion_tokens in zip(bucket, texts, generated):
+                results[index] = {
+                    "text": self._cut_at_stop(text),
+                    "prompt_tokens": len(encoded[index]),
+                    "completion_tokens": completion_tokens,
+                    "ttft_seconds": None,
+                    "latency_seconds": end - start,
+                }
+
+        return results
+
+
+class CircuitBreaker:
+    """
+    Consecutive failure counter of one backend. After `failures` failures
+    in a row the breaker opens: the backend is skipped for `cooldown`
+    seconds, then half-opens to let a single trial request through, which
+    closes it again on success.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.open_until = None
+        self.trial_in_flight = False
+
+    def allow(self):
+        """True if a request may be sent now (reserves the trial request when half-open)."""
+        with self._lock:
+            if self.open_until is None:
+                return True
+            if time.time() < self.open_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.open_until = None
+            self.trial_in_flight = False
+
+    def failure(self):
+        """Count a failure. Returns True if the breaker (re)opened."""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.consecutive_failures >= self.failures:
+                self.open_until = time.time() + self.cooldown
+                return True
+            return False
+
+
+class HedgedBackend(LLMBackend):
+    """
+    Remote backend wrapper cutting the latency tail of slow models.
+
+    Each request goes to the first backend whose circuit breaker is closed
+    (the requested model, then its FALLBACK_MODELS). When it has not
+    answered within the hedge delay, a percentile of the model's recent
+    latencies, a duplicate request is sent to the next available fallback
+    (never to the same model, which would pay twice for the prompt; without
+    fallbacks there is no hedging) and the first answer wins; the losing
+    request is abandoned and finishes in its thread. Errors and timeouts
+    count against the backend's breaker and are retried on the next one.
+    A request nobody answers returns an empty completion, so one class
+    without mutants does not stop the generation of a whole project.
+
+    Attributes:
+        backends (list): Primary backend first, then the fallbacks.
+        metrics (dict): Counters of requests, hedges and breaker events.
+    """
+
+    def __init__(self, backends, timeout=REQUEST_TIMEOUT, hedge_percentile=HEDGE_PERCENTILE,
+                 max_requests=HEDGE_MAX_REQUESTS, breaker_failures=BREAKER_FAILURES,
+                 breaker_cooldown=BREAKER_COOLDOWN):
+        super().__init__(backends[0].name)
+        self.backends = backends
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.max_requests = max_requests
+        self.breakers = {b.name: CircuitBreaker(breaker_failures, breaker_cooldown) for b in backends}
+        self.latencies = {b.name: deque(maxlen=LATENCY_WINDOW) for b in backends}
+        self.metrics = {"requests": 0, "hedges": 0, "hedge_wins": 0, "retries": 0, "fallback_answers": 0,
+                        "errors": 0, "timeouts": 0, "breaker_opens": 0, "short_circuits": 0, "unanswered": 0}
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.metrics[key] += amount
+
+    def hedge_delay(self, backend):
+        """Seconds to wait for `backend` before hedging."""
+        with self._lock:
+            latencies = list(self.latencies[backend.name])
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_INITIAL_DELAY
+        return percentile(latencies, self.hedge_percentile)
+
+    def _next_backend(self, tried, again=True):
+        """
+        Next backend to send a request to: untried and allowed first, then
+        (with `again`) one already tried, the primary first.
+        """
+        for backend in self.backends:
+            if backend.name not in tried and self.breakers[backend.name].allow():
+                return backend
+        if not again:
+            return None
+        for backend in self.backends:
+            if self.breakers[backend.name].allow():
+                return backend
+        return None
+
+    def _send(self, backend, prompt, answers, index):
+        """
+        Start request number `index` of a prompt in its own thread; its
+        outcome also updates the breaker and latencies of the backend.
+        """
+        def run():
+            try:
+                result = backend.request(prompt)
+            except Exception as e:
+                timed_out = isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+                print(f"LLM request to {backend.name} failed: {e}")
+                self._count("timeouts" if timed_out else "errors")
+                if self.breakers[backend.name].failure():
+                    self._count("breaker_opens")
+                    print(f"Circuit breaker opened for {backend.name}")
+                answers.put((index, backend, None))
+                return
+            self.breakers[backend.name].success()
+            with self._lock:
+                self.latencies[backend.name].append(result["latency_seconds"])
+            answers.put((index, backend, result))
+        threading.Thread(target=run, daemon=True).start()
+
+    def request(self, prompt: str) -> dict:
+        self._count("requests")
+        start = time.time()
+        deadline = start + self.timeout
+        answers = queue.Queue()
+        tried, kinds = [], []
+
+        def send(backend, kind):
+            if kind != "first":
+                self._count(kind)
+            tried.append(backend.name)
+            kinds.append(kind)
+            self._send(backend, prompt, answers, len(tried) - 1)
+            return time.time() + self.hedge_delay(backend) if self.hedge_percentile is not None else deadline
+
+        backend = self._next_backend(tried)
+        if backend is None:
+            # Every breaker is open: the requested model is tried anyway
+            self._count("short_circuits")
+            backend = self.backends[0]
+        next_hedge = send(backend, "first")
+        pending = 1
+
+        while pending and time.time() < deadline:
+            try:
+                index, backend, result = answers.get(timeout=max(min(next_hedge, deadline) - time.time(), 0.001))
+            except queue.Empty:
+                hedge = self._next_backend(tried, again=False) if len(tried) < self.max_requests else None
+                if hedge is None:
+                    next_hedge = deadline
+                else:
+                    next_hedge = send(hedge, "hedges")
+                    pending += 1
+                continue
+
+            pending -= 1
+            if result is None:
+                # Retry at once on another backend while the request budget allows
+                retry = self._next_backend(tried) if not pending and len(tried) < self.max_requests else None
+                if retry is not None:
+                    next_hedge = send(retry, "retries")
+                    pending += 1
+                continue
+
+            if kinds[index] == "hedges":
+                self._count("hedge_wins")
+            if backend is not self.backends[0]:
+                self._count("fallback_answers")
+            self._record(start, time.time(), result["prompt_tokens"], result["completion_tokens"])
+            return dict(result, latency_seconds=time.time() - start, backend=getattr(backend, "model", backend.name),
+                        requests_sent=len(tried))
+
+        self._count("unanswered")
+        print(f"LLM request unanswered after {time.time() - start:.0f}s ({', '.join(tried)})")
+        return {"text": "", "prompt_tokens": 0, "completion_tokens": 0, "ttft_seconds": None,
+                "latency_seconds": time.time() - start, "backend": None, "requests_sent": len(tried)}
+
+    def report(self):
+        for backend in self.backends:
+            backend.report()
+        metrics = self.metrics
+        hedge_rate = metrics["hedges"] / metrics["requests"] * 100 if metrics["requests"] else 0.0
+        print(f"Hedging {self.name}: {metrics['requests']} requests, {metrics['hedges']} hedges "
+              f"({hedge_rate:.1f}%), {metrics['hedge_wins']} won by a hedge, {metrics['retries']} retries, "
+              f"{metrics['fallback_answers']} answered by a fallback, {metrics['errors']} errors, "
+              f"{metrics['timeouts']} timeouts, {metrics['breaker_opens']} breaker opens, "
+              f"{metrics['short_circuits']} with every breaker open, {metrics['unanswered']} unanswered")
+
+
+def get_backend(model):
+    """
+    Return the backend serving a model name: "local/<model>" targets the
+    OpenAI-compatible server at LOCAL_LLM_URL, "hf/<model>" loads the model
+    in-process with transformers, anything else uses OpenRouter through a
+    HedgedBackend (timeouts, hedged requests and circuit breakers).
+    """
+    if model.startswith(TRANSFORMERS_MODEL_PREFIX):
+        return TransformersBackend(model[len(TRANSFORMERS_MODEL_PREFIX):])
+    if model.startswith(LOCAL_MODEL_PREFIX):
+        local_model = model[len(LOCAL_MODEL_PREFIX):]
+        return OpenAICompatibleBackend(LOCAL_LLM_URL, local_model, name=model)
+    return HedgedBackend([OpenRouterBackend(name) for name in [model, *FALLBACK_MODELS.get(model, [])]])
@@ -0,0 +1,101 @@
+import re
+
+# One alternative per lexical element that can contain comment-like text.
+# Text blocks come first so that '"""' is not read as an empty string literal;
+# the leading lookahead lets the scanner skip plain code quickly.
+_TOKEN_RE = re.compile(r'''
+    (?=["'/])
+    (?:
+        (?P<text_block>"""(?:[^"\\]+|\\[\s\S]|"(?!""))*+(?:"""|[\s\S]*\Z))
+      | (?P<string>"(?:[^"\\\n]+|\\.)*+"?)
+      | (?P<char>'(?:[^'\\\n]|\\.)*'?)
+      | (?P<line_comment>//[^\n]*)
+      | (?P<block_comment>/\*[\s\S]*?(?:\*/|\Z))
+    )
+''', re.VERBOSE)
+
+
+def strip_java_comments(source: str):
+    """
+    Remove comments from Java source in a single linear pass.
+
+    String literals, char literals and text blocks are copied verbatim, so
+    sequences such as "http://" or "/*" inside them are preserved. Lines
+    that only contained comments are dropped; every other line is kept.
+
+    Args:
+        source (str): Original Java source.
+
+    Returns:
+        tuple: (cleaned source, line map) where line_map[i] is the 1-based
+        line number in the original source of cleaned line i.
+    """
+    parts = []
+    comment_lines = set()
+    line = 0
+    line_pos = 0
+    pos = 0
+
+    for match in _TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        # Literals stay part of the surrounding code; only comments are cut out
+        if kind != "line_comment" and kind != "block_comment":
+            continue
+
+        start, end = match.span()
+        parts.append(source[pos:start])
+        line += source.count("\n", line_pos, start)
+        line_pos = start
+
+        if kind == "line_comment":
+            comment_lines.add(line)
+        else:
+            newlines = source.count("\n", start, end)
+            comment_lines.update(range(line, line + newlines + 1))
+            # Keep the line structure so positions still match the original
+            parts.append("\n" * newlines)
+        pos = end
+
+    parts.append(source[pos:])
+    lines = "".join(parts).split("\n")
+
+    dropped = set()
+    for index in comment_lines:
+        text = lines[index].rstrip()
+        if text.strip():
+            lines[index] = text
+        else:
+            dropped.add(index)
+
+    line_map = [index + 1 for index in range(len(lines)) if index not in dropped]
+    cleaned_lines = [lines[number - 1] for number in line_map]
+
+    return "\n".join(cleaned_lines), line_map
+
+
+def normalize_code_line(text: str) -> str:
+    """
+    Normalize a line of code for lookups: surrounding whitespace is removed
+    and inner whitespace runs (e.g. left behind by inline comments) collapse
+    to a single space.
+    """
+    return " ".join(text.split())
+
+
+def build_line_index(cleaned_source: str, line_map):
+    """
+    Index the non-empty lines of a cleaned source by their normalized text.
+
+    Args:
+        cleaned_source (str): Source returned by strip_java_comments.
+        line_map (list): Line map returned by strip_java_comments.
+
+    Returns:
+        dict: normalized line -> list of 1-based original line numbers.
+    """
+    index = {}
+    for text, original_line in zip(cleaned_source.split("\n"), line_map):
+        key = normalize_code_line(text)
+        if key:
+            index.setdefault(key, []).append(original_line)
+    return index
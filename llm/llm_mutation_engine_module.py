@@ -1,7 +1,9 @@
 import json
-import re
-import requests
-from environment.config import OPENROUTER_API_KEY
+from concurrent.futures import ThreadPoolExecutor
+from llm.backends import get_backend
+from llm.java_lexer import strip_java_comments, normalize_code_line
+from llm.source_file import SourceFile, get_source_file
+from llm.telemetry import new_parse_counts
 
 class LLMMutationEngine:
     """
@@ -25,13 +27,37 @@ class LLMMutationEngine:
     - MTD (Method Call Replacement): replace a method call with another valid one
     """
 
-    def __init__(self, model=""):
+    def __init__(self, model="", backend=None, telemetry=None):
         """
         Initialize the mutation engine.
         Args:
-            model (str): Model name to use with OpenRouter.
+            model (str): Model name, "local/<model>" for a local OpenAI-compatible server.
+            backend: Completion backend, resolved from the model name by default.
+            telemetry (LLMTelemetry): Receives one record per request, optional.
         """
         self.model = model
+        self.backend = backend or get_backend(model)
+        self.telemetry = telemetry
+
+    def mutate_java_files(self, jobs, concurrency: int = 1) -> list:
+        """
+        Generate mutations for several Java files, keeping up to `concurrency`
+        prompts in flight so a server with continuous batching stays busy.
+
+        Args:
+            jobs (list): Java file paths.
+            concurrency (int): Maximum number of concurrent requests.
+
+        Returns:
+            list: One list of mutation dictionaries per job, in job order.
+        """
+        # In-process backends generate all prompts together in length buckets
+        if hasattr(self.backend, "request_batch"):
+            return self._mutate_batch(jobs)
+        if concurrency <= 1 or len(jobs) <= 1:
+            return [self.mutate_java_file(job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(lambda job: self.mutate_java_file(job), jobs))
 
     def mutate_java_file(self, java_file_path: str):
         """
@@ -43,18 +69,38 @@ class LLMMutationEngine:
         Returns:
             list: A list of mutation dictionaries with 'original_code' and 'mutated_code'.
         """
+        source = self._read_source(java_file_path)
+        if source is None:
+            return []
+
+        return self._mutate_source(source)
+
+    def _read_source(self, java_file_path: str):
+        """Return the parsed Java file, or None if it cannot be read."""
         try:
-            with open(java_file_path, "r") as f:
-                java_class = f.read()
+            return get_source_file(java_file_path)
         except Exception as e:
             print(f" Error reading file {java_file_path}: {e}")
-            return []
+            return None
+
+    def _mutate_batch(self, jobs) -> list:
+        """
+        Generate mutations for several Java files with a single
+        complete_batch call.
+        """
+        sources = [self._read_source(path) for path in jobs]
+        readable = [i for i, source in enumerate(sources) if source is not None]
+        responses = self.backend.request_batch([self._build_prompt(sources[i]) for i in readable])
 
-        return self._mutate_java_class(java_class)
+        results = [[] for _ in jobs]
+        for i, response in zip(readable, responses):
+            results[i] = self._collect_mutations(response, sources[i])
+        return results
 
     def _remove_comments(self, java_class: str) -> str:
         """
         Remove comments from the Java class to prevent LLM from mutating them.
+        String and char literals and text blocks are left untouched.
 
         Args:
             java_class (str): Original Java class code.
@@ -62,9 +108,8 @@ class LLMMutationEngine:
         Returns:
             str: Java class code without comments.
         """
-        java_class = re.sub(r"/\*[\s\S]*?\*/", "", java_class, flags=re.MULTILINE)
-        java_class = re.sub(r"//.*", "", java_class)
-        return java_class
+        java_class_clean, _ = strip_java_comments(java_class)
+        return java_class_clean
 
     def _mutate_java_class(self, java_class: str):
         """
@@ -76,11 +121,33 @@ class LLMMutationEngine:
         Returns:
             list: A list of mutation dictionaries.
         """
-        # Remove comments before mutation
-        java_class_clean = self._remove_comments(java_class)
+        return self._mutate_source(SourceFile(java_class))
+
+    def _mutate_source(self, source: SourceFile):
+        """
+        Generate mutations for a parsed Java source using the selected LLM.
+
+        Args:
+            source (SourceFile): Parsed original Java class.
+
+        Returns:
+            list: A list of mutation dictionaries.
+        """
+        response = self.backend.request(self._build_prompt(source))
+        return self._collect_mutations(response, source)
 
-        # Keep only non-empty lines for validation
-        valid_lines = {line.strip() for line in java_class_clean.split("\n") if line.strip()}
+    def _build_prompt(self, source: SourceFile) -> str:
+        """
+        Build the mutation prompt for a parsed Java source.
+
+        Args:
+            source (SourceFile): Parsed original Java class.
+
+        Returns:
+            str: The prompt.
+        """
+        # Comment-free view of the class, cached on the parsed source
+        java_class_clean, _ = source.cleaned
 
         # Construct the LLM prompt with strict rules
         prompt = f"""
@@ -104,39 +171,60 @@ class LLMMutationEngine:
             {java_class_clean}
         """
 
-        # Send request to OpenRouter
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps({
-                "model": self.model,
-                "messages": [{"role": "user", "content": prompt}]
-            })
-        )
-        #print(response.json())
-        text = response.json()["choices"][0]["message"]["content"].strip()
+        return prompt
+
+    def _collect_mutations(self, response: dict, source: SourceFile) -> list:
+        """
+        Parse an LLM answer, validating the lines against the original class,
+        and record the request in the telemetry.
+        """
+        counts = new_parse_counts()
+        new_mutations = self._parse_mutations(response["text"], source.code_index, counts)
+        if self.telemetry is not None:
+            self.telemetry.record(self.model, response, counts, len(new_mutations))
+
+        print(f"Generated {len(new_mutations)} valid mutations")
+        return new_mutations
 
-        # Parse JSON lines from LLM output
+    def _parse_mutations(self, text: str, valid_lines, counts=None) -> list:
+        """
+        Parse the JSON lines returned by the LLM, keeping only mutations
+        whose original line exists in the class.
+
+        Args:
+            text (str): Raw LLM output, one JSON object per line.
+            valid_lines (dict): Line index built by build_line_index.
+            counts (dict): Optional counters of parsed lines, JSON failures
+                and lines rejected by validation (see new_parse_counts).
+
+        Returns:
+            list: A list of mutation dictionaries with 'original_code',
+            'mutated_code' and 'lines' (1-based original line numbers).
+        """
         new_mutations = []
         for line in text.split("\n"):
             try:
                 mutation_json = json.loads(line)
                 original = mutation_json.get("original_code", "").strip()
                 mutated = mutation_json.get("mutated_code", "").strip()
-
-                # Validate that the original line exists in the class
-                if original not in valid_lines:
-                    continue
-
-                new_mutations.append({
-                    "original_code": original,
-                    "mutated_code": mutated
-                })
             except Exception:
+                if counts is not None and line.strip():
+                    counts["json_failures"] += 1
+                continue
+            if counts is not None:
+                counts["lines_parsed"] += 1
+
+            # Validate that the original line exists in the class
+            positions = valid_lines.get(normalize_code_line(original))
+            if not positions:
+                if counts is not None:
+                    counts["rejected"] += 1
                 continue
 
-        print(f"Generated {len(new_mutations)} valid mutations")
+            new_mutations.append({
+                "original_code": original,
+                "mutated_code": mutated,
+                "lines": positions
+            })
+
         return new_mutations
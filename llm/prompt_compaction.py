@@ -0,0 +1,172 @@
+import re
+from llm.java_lexer import strip_java_comments
+
+# Rough token estimate for code: about four characters per token
+CHARS_PER_TOKEN = 4
+
+HEADER_LINE_RE = re.compile(r"^\s*(?:import|package)\s+[\w.*\s]+;\s*$")
+METHOD_DECL_RE = re.compile(
+    r"^\s*(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|protected|private|static|final|synchronized|abstract|native|default)\s+)*"
+    r"(?:<[^>]*>\s+)?[\w$.<>\[\],?\s]+?\s+([A-Za-z_$][\w$]*)\s*\("
+)
+TEST_ANNOTATION_RE = re.compile(r"@(?:Test|ParameterizedTest|RepeatedTest)\b")
+NOT_METHOD_NAMES = {"if", "for", "while", "switch", "catch", "return", "new", "throw", "synchronized"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens of a piece of code."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def minify_line(line: str) -> str:
+    """
+    Drop indentation and trailing blanks; inner whitespace runs are collapsed
+    only when the line holds no literal whose content could change.
+    """
+    line = line.strip()
+    if '"' in line or "'" in line:
+        return line
+    return " ".join(line.split())
+
+
+def compact_code(text: str, line_map=None):
+    """
+    Minify comment-free Java code and drop import/package lines.
+
+    Args:
+        text (str): Comment-free code.
+        line_map (list): Original line number of each line of `text`
+            (1-based); defaults to the line positions in `text`.
+
+    Returns:
+        tuple: (compacted code, line map of the kept lines)
+    """
+    lines = text.split("\n")
+    if line_map is None:
+        line_map = list(range(1, len(lines) + 1))
+
+    kept, kept_map = [], []
+    for line, number in zip(lines, line_map):
+        if not line.strip() or HEADER_LINE_RE.match(line):
+            continue
+        kept.append(minify_line(line))
+        kept_map.append(number)
+    return "\n".join(kept), kept_map
+
+
+def class_method_names(code: str) -> set:
+    """Names of the methods declared directly in the body of a class."""
+    names = set()
+    depth = 0
+    for line in code.split("\n"):
+        if depth == 1:
+            match = METHOD_DECL_RE.match(line)
+            if match and match.group(1) not in NOT_METHOD_NAMES:
+                names.add(match.group(1))
+        depth += line.count("{") - line.count("}")
+    return names
+
+
+def split_members(code: str):
+    """
+    Split a comment-free class into (header lines, members, footer lines),
+    where each member is the list of lines of one top-level declaration
+    (annotations included).
+    """
+    header, members, footer = [], [], []
+    current = []
+    depth = 0
+    for line in code.split("\n"):
+        before = depth
+        depth += line.count("{") - line.count("}")
+        if before == 0:
+            (header if not members and not current else footer).append(line)
+            continue
+        if before == 1 and depth == 0:
+            footer.append(line)
+            continue
+        current.append(line)
+        # A member ends when its braces close or at a field declaration
+        if depth == 1 and (line.rstrip().endswith(("}", ";"))):
+            members.append(current)
+            current = []
+    if current:
+        members.append(current)
+    return header, members, footer
+
+
+def _is_test_method(member):
+    return any(TEST_ANNOTATION_RE.search(line) for line in member)
+
+
+def _references(member, method_names):
+    text = "\n".join(member)
+    return any(re.search(rf"\b{re.escape(name)}\s*\(", text) for name in method_names)
+
+
+def compact_test_class(test_class: str, method_names: set):
+    """
+    Keep only the test methods that call at least one of the given methods,
+    plus every non-test member (fields, fixtures, helpers). If no test method
+    matches, all of them are kept.
+
+    Returns:
+        tuple: (header lines, kept members, footer lines)
+    """
+    cleaned, _ = strip_java_comments(test_class)
+    header, members, footer = split_members(cleaned)
+
+    relevant = [m for m in members if not _is_test_method(m) or _references(m, method_names)]
+    if not any(_is_test_method(m) for m in relevant):
+        relevant = members
+    return header, relevant, footer
+
+
+def compact_inputs(source, test_class: str = "", token_budget=None) -> dict:
+    """
+    Compact the class and test code sent to the LLM.
+
+    The class is minified and loses its imports; the test class also keeps
+    only the test methods that reference the class's methods. When the
+    result exceeds `token_budget`, test methods are dropped from the end;
+    when a single one is left the tests are left out altogether. The class
+    itself is never truncated.
+
+    Args:
+        source (SourceFile): Parsed original class.
+        test_class (str): Test class code, may be empty.
+        token_budget (int): Maximum estimated tokens for class + tests.
+
+    Returns:
+        dict: 'class_code', 'line_map' (original line of each class line),
+        'test_code', 'original_tokens' and 'compacted_tokens'.
+    """
+    cleaned, line_map = source.cleaned
+    class_code, class_map = compact_code(cleaned, line_map)
+
+    test_code = ""
+    if test_class:
+        header, members, footer = compact_test_class(test_class, class_method_names(cleaned))
+
+        def render(kept):
+            lines = header + [line for member in kept for line in member] + footer
+            return compact_code("\n".join(lines))[0]
+
+        test_code = render(members)
+        if token_budget is not None:
+            class_tokens = estimate_tokens(class_code)
+            while class_tokens + estimate_tokens(test_code) > token_budget:
+                tests = [i for i, member in enumerate(members) if _is_test_method(member)]
+                if len(tests) <= 1:
+                    test_code = ""
+                    break
+                del members[tests[-1]]
+                test_code = render(members)
+
+    return {
+        "class_code": class_code,
+        "line_map": class_map,
+        "test_code": test_code,
+        "original_tokens": estimate_tokens(source.text) + estimate_tokens(test_class),
+        "compacted_tokens": estimate_tokens(class_code) + estimate_tokens(test_code),
+    }
@@ -0,0 +1,133 @@
+import hashlib
+import os
+from collections import OrderedDict
+from llm.java_lexer import strip_java_comments, build_line_index, normalize_code_line
+
+# Parsed versions kept per path (original file plus a few variants)
+MAX_VERSIONS_PER_PATH = 4
+
+# path -> OrderedDict(sha1 -> SourceFile), most recently used last
+_cache = {}
+# path -> (mtime_ns, size, sha1) of the last read
+_stats = {}
+
+
+def mutate_line(line, original_code, mutated_code):
+    """
+    Replace the code of a source line with its mutated version, keeping the
+    line's indentation and ending. When the line also holds comments, only
+    the original code fragment is replaced so the comments stay balanced.
+    """
+    body = line.rstrip("\r\n")
+    ending = line[len(body):]
+    indent = body[:len(body) - len(body.lstrip())]
+
+    if normalize_code_line(body) != normalize_code_line(original_code) and original_code in body:
+        return body.replace(original_code, mutated_code, 1) + ending
+
+    return indent + mutated_code.strip() + ending
+
+
+class SourceFile:
+    """
+    Parsed view of a Java source file, shared by mutant generation and
+    mutant application so each file is read and cleaned once.
+
+    Attributes:
+        path (str): Path the source was read from (None for in-memory code).
+        text (str): Full source text.
+        lines (list): Source lines, with line endings.
+        sha1 (str): Hex SHA-1 of the source text.
+    """
+
+    def __init__(self, text, path=None):
+        self.path = path
+        self.text = text
+        self.lines = text.splitlines(keepends=True)
+        self.sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        self._cleaned = None
+        self._code_index = None
+        self._line_index = None
+
+    @property
+    def cleaned(self):
+        """(cleaned source, line map) as returned by strip_java_comments."""
+        if self._cleaned is None:
+            self._cleaned = strip_java_comments(self.text)
+        return self._cleaned
+
+    @property
+    def code_index(self):
+        """Normalized comment-free line -> 1-based line numbers."""
+        if self._code_index is None:
+            self._code_index = build_line_index(*self.cleaned)
+        return self._code_index
+
+    @property
+    def line_index(self):
+        """Normalized raw line -> 1-based line numbers."""
+        if self._line_index is None:
+            index = {}
+            for number, line in enumerate(self.lines, start=1):
+                key = normalize_code_line(line)
+                if key:
+                    index.setdefault(key, []).append(number)
+            self._line_index = index
+        return self._line_index
+
+    def positions_of(self, code):
+        """
+        Return the 1-based line numbers holding the given code, looking at the
+        comment-free view first and at the raw lines second.
+        """
+        key = normalize_code_line(code)
+        return self.code_index.get(key) or self.line_index.get(key) or []
+
+    def render_mutant(self, line_no, original_code, mutated_code):
+        """
+        Return the source text with a single line replaced by its mutation.
+
+        Args:
+            line_no (int): 1-based line number to mutate.
+            original_code (str): Code expected on that line.
+            mutated_code (str): Replacement code.
+        """
+        lines = list(self.lines)
+        lines[line_no - 1] = mutate_line(lines[line_no - 1], original_code, mutated_code)
+        return "".join(lines)
+
+
+def get_source_file(path):
+    """
+    Return the parsed SourceFile for a path, reading the file only when its
+    size or modification time changed and re-parsing only when its content
+    hash is new.
+    """
+    stat = os.stat(path)
+    versions = _cache.setdefault(path, OrderedDict())
+
+    last = _stats.get(path)
+    if last and last[:2] == (stat.st_mtime_ns, stat.st_size) and last[2] in versions:
+        versions.move_to_end(last[2])
+        return versions[last[2]]
+
+    with open(path, "r") as f:
+        text = f.read()
+    sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    _stats[path] = (stat.st_mtime_ns, stat.st_size, sha1)
+
+    if sha1 in versions:
+        versions.move_to_end(sha1)
+        return versions[sha1]
+
+    source = SourceFile(text, path)
+    versions[sha1] = source
+    while len(versions) > MAX_VERSIONS_PER_PATH:
+        versions.popitem(last=False)
+    return source
+
+
+def clear_source_cache():
+    """Drop every cached SourceFile."""
+    _cache.clear()
+    _stats.clear()
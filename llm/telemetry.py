@@ -0,0 +1,151 @@
+import csv
+import math
+import os
+import threading
+import time
+
+REQUESTS_FILE = "llm_requests.csv"
+SUMMARY_FILE = "llm_model_summary.csv"
+
+REQUEST_FIELDS = ["timestamp", "model", "prompt_tokens", "completion_tokens", "ttft_seconds", "latency_seconds",
+                  "lines_parsed", "json_failures", "rejected", "valid_mutations", "requests_sent", "backend"]
+SUMMARY_FIELDS = ["model", "requests", "prompt_tokens", "completion_tokens", "lines_parsed", "json_failures",
+                  "rejected", "valid_mutations", "latency_p50", "latency_p95", "ttft_p50", "ttft_p95",
+                  "valid_mutants_per_sec", "valid_mutants_per_1k_tokens", "hedged_requests", "fallback_answers",
+                  "unanswered"]
+
+
+def new_parse_counts():
+    """Counters filled by the engines' _parse_mutations."""
+    return {"lines_parsed": 0, "json_failures": 0, "rejected": 0}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a list of numbers, None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LLMTelemetry:
+    """
+    Per-request LLM measurements: model, token usage, time to first token,
+    latency and how many answer lines turned into valid mutations.
+
+    Records are kept in memory (thread-safe) until flush() appends them to
+    RESULTS_FOLDER/llm_requests.csv and rebuilds the per-model summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def record(self, model, response, counts, valid_mutations):
+        """
+        Add one request.
+
+        Args:
+            model (str): Model name.
+            response (dict): Result of LLMBackend.request.
+            counts (dict): Parse counters (see new_parse_counts).
+            valid_mutations (int): Mutations kept after validation.
+        """
+        row = {
+            "timestamp": round(time.time(), 3),
+            "model": model,
+            "prompt_tokens": response.get("prompt_tokens", 0),
+            "completion_tokens": response.get("completion_tokens", 0),
+            "ttft_seconds": "" if response.get("ttft_seconds") is None else round(response["ttft_seconds"], 4),
+            "latency_seconds": round(response.get("latency_seconds", 0.0), 4),
+            "valid_mutations": valid_mutations,
+            # Set by HedgedBackend: requests sent for this prompt and the model that answered
+            "requests_sent": response.get("requests_sent", 1),
+            "backend": response.get("backend", model) or "",
+        }
+        row.update(counts)
+        with self._lock:
+            self.records.append(row)
+
+    def flush(self, results_folder):
+        """Append the pending records to the request log and rewrite the summary."""
+        with self._lock:
+            records, self.records = self.records, []
+
+        os.makedirs(results_folder, exist_ok=True)
+        requests_path = os.path.join(results_folder, REQUESTS_FILE)
+        write_header = not os.path.exists(requests_path)
+        fieldnames = REQUEST_FIELDS
+        if not write_header:
+            # Logs started before newer columns keep their own
+            with open(requests_path, newline="") as f:
+                fieldnames = next(csv.reader(f), None) or REQUEST_FIELDS
+        with open(requests_path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+            writer.writerows(records)
+
+        write_summary(results_folder)
+
+
+def summarize(rows):
+    """
+    Aggregate request rows per model.
+
+    Returns:
+        list: One dict per model with the SUMMARY_FIELDS keys.
+    """
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(row["model"], []).append(row)
+
+    summary = []
+    for model, model_rows in sorted(by_model.items()):
+        def total(key):
+            return sum(int(r[key] or 0) for r in model_rows)
+
+        latencies = [float(r["latency_seconds"]) for r in model_rows if r["latency_seconds"] != ""]
+        ttfts = [float(r["ttft_seconds"]) for r in model_rows if r["ttft_seconds"] != ""]
+        valid = total("valid_mutations")
+        tokens = total("prompt_tokens") + total("completion_tokens")
+        busy = sum(latencies)
+
+        summary.append({
+            "model": model,
+            "requests": len(model_rows),
+            "prompt_tokens": total("prompt_tokens"),
+            "completion_tokens": total("completion_tokens"),
+            "lines_parsed": total("lines_parsed"),
+            "json_failures": total("json_failures"),
+            "rejected": total("rejected"),
+            "valid_mutations": valid,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "ttft_p50": percentile(ttfts, 50),
+            "ttft_p95": percentile(ttfts, 95),
+            # Per second of request latency, independent of how many ran concurrently
+            "valid_mutants_per_sec": round(valid / busy, 4) if busy else 0.0,
+            "valid_mutants_per_1k_tokens": round(1000 * valid / tokens, 4) if tokens else 0.0,
+            "hedged_requests": sum(1 for r in model_rows if int(r.get("requests_sent") or 1) > 1),
+            "fallback_answers": sum(1 for r in model_rows if r.get("backend") not in (None, "", model)),
+            "unanswered": sum(1 for r in model_rows if r.get("backend") == ""),
+        })
+    return summary
+
+
+def write_summary(results_folder):
+    """Rebuild RESULTS_FOLDER/llm_model_summary.csv from the full request log."""
+    requests_path = os.path.join(results_folder, REQUESTS_FILE)
+    if not os.path.exists(requests_path):
+        return []
+    with open(requests_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    summary = summarize(rows)
+    with open(os.path.join(results_folder, SUMMARY_FILE), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summary)
+    return summary
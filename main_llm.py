@@ -1,23 +1,539 @@
 import os
 import csv
 import shutil
+import time
+import uuid
 from environment.config import *
-from modules.defects4j_module import defects4j_checkout, defects4j_compile
-from modules.llm_test_module import generate_mutants_for_project, apply_single_mutant, run_test_for_class_with_d4j
-
-# Environment setup
-os.environ["PATH"] += os.pathsep + D4J_BIN_PATH
-os.environ["JAVA_HOME"] = JAVA_HOME_11_PATH
-os.environ["PATH"] = os.environ["JAVA_HOME"] + "/bin:" + os.environ["PATH"]
+from modules.defects4j_module import defects4j_compile
+from modules.checkout_cache import fresh_checkout
+from modules.llm_test_module import (generate_mutants_for_project, apply_single_mutant, evaluate_mutant,
+                                    prioritize_tests, read_mutant_header, mutation_operator,
+                                    TEST_MODE_FAIL_FAST, TEST_MODE_FULL_MATRIX)
+from modules.schemata_module import run_schema_for_class
+from modules.group_testing import GroupTester
+from llm.telemetry import LLMTelemetry
+from modules.test_prioritization import KillHistory
+from modules.result_cache import ResultCache, mutant_cache_key, test_suite_hash
+from modules.tce_module import TrivialCompilerEquivalence
+from modules.work_queue import WorkQueue, STATUS_DONE
+from modules.sampling_module import SequentialEstimate, sampling_order
+from modules.mutation_tools import LLM_MODELS, model_results_dir
+from utils import setup_environment
 
 RESULTS_FILE = "llm_mutation_results.csv"
 
-os.makedirs(RESULTS_FOLDER, exist_ok=True)
+# Persistent memo of mutant results shared by models and re-runs
+RESULT_CACHE_FILE = "result_cache.sqlite"
+
+# Compile all mutants of a class once as a mutant schema instead of one build per mutant
+USE_MUTANT_SCHEMATA = False
+
+# Group testing: activate non-interfering mutants (one per class) together, run the
+# tests once per batch and split the batches whose failures cannot be attributed (uses mutant schemata)
+USE_GROUP_TESTING = False
+
+# Stop at the first failing test (TEST_MODE_FAIL_FAST) or run the whole suite (TEST_MODE_FULL_MATRIX)
+# Fail-fast records only the first killing test of each mutant, full-matrix all of them as before.
+# Fail-fast runs up to FAIL_FAST_SINGLE_RUNS test classes before the full suite, so a surviving
+# mutant costs up to FAIL_FAST_SINGLE_RUNS + 1 (4) test runs instead of 1: it pays off when most are killed
+TEST_MODE = TEST_MODE_FULL_MATRIX
+
+# Skip the tests of mutants compiling to the original bytecode or to an earlier mutant's
+USE_TCE = True
+
+# Class prompts in flight at once; "local/<model>" names use the local OpenAI-compatible server
+LLM_CONCURRENCY = 4
+
+# Estimated token budget for class + test code in each prompt, e.g. 6000 (None disables compaction,
+# keeping the full prompts of the earlier results)
+PROMPT_TOKEN_BUDGET = None
+
+# SQLite job queue on storage shared by every host: when set, mutants are evaluated by
+# `python cli.py worker --queue <file>` processes instead of this one (None = evaluate locally)
+EVALUATION_QUEUE = None
+
+# Seconds between two checks of the queue while the workers evaluate a sweep
+QUEUE_POLL_SECONDS = 5
+
+# Sampling mode: evaluate the mutants in random order and stop once the mutation score
+# is known to +/- this proportion, e.g. 0.02 (None evaluates every mutant)
+SAMPLING_HALF_WIDTH = None
+
+# Confidence level of the sampling interval
+SAMPLING_CONFIDENCE = 0.95
+
+# Stratify the sampling order by "class" (None: simple random order)
+SAMPLING_STRATA = "class"
+
+# Seed of the sampling order, so that a sweep can be reproduced
+SAMPLING_SEED = 0
+
+# Sample size and achieved precision of every sampled run, per model folder
+SAMPLING_REPORT_FILE = "sampling_report.csv"
+
+
+def evaluation_mode():
+    """
+    Settings a mutant result depends on, part of its cache key: the test
+    mode, TCE (equivalent mutants are only found with it) and how mutants
+    are compiled and run (mutant schemata, or group testing, which only
+    records the killing tests attributed to each mutant).
+    """
+    parts = [TEST_MODE]
+    if USE_TCE:
+        parts.append("tce")
+    if USE_GROUP_TESTING:
+        parts.append("group")
+    elif USE_MUTANT_SCHEMATA:
+        parts.append("schemata")
+    return "+".join(parts)
+
+
+def list_mutant_files(mutants_base_dir):
+    """
+    List the generated mutant files of a project.
+    """
+    mutant_files = []
+    for root, _, files in os.walk(mutants_base_dir):
+        for mutant_file in files:
+            if mutant_file.endswith(".java"):
+                mutant_files.append(os.path.join(root, mutant_file))
+    return mutant_files
+
+
+def qualified_class_name(mutant_path, mutants_base_dir):
+    """Fully-qualified name of the class a mutant file mutates."""
+    mutated_class = os.path.basename(mutant_path).split("_Mutant_")[0]
+    package = os.path.relpath(os.path.dirname(mutant_path), mutants_base_dir)
+    return mutated_class if package == "." else package.replace(os.sep, ".") + "." + mutated_class
+
+
+def append_result(model, project_id, bug_id, mutant_file, mutated_class, result, killing_tests=()):
+    """
+    Append the result of a mutant to the model-specific results file.
+    `killing_tests` lists the failing tests ("Class::method") that killed it.
+    """
+    # Directory for results based on model name
+    result_model_dir = model_results_dir(model)
+    result_file_path = os.path.join(result_model_dir, RESULTS_FILE)
+    os.makedirs(result_model_dir, exist_ok=True)
+
+    # Create model-specific results file if missing
+    if not os.path.exists(result_file_path):
+        with open(result_file_path, "w") as f:
+            f.write("project_id,bug_id,mutant_name,class,result,killing_test\n")
+
+    # Files created before the killing_test column keep their five columns
+    with open(result_file_path, "r") as f:
+        has_killing_test = "killing_test" in f.readline()
+
+    # Append results
+    with open(result_file_path, "a") as f:
+        row = f"{project_id},{bug_id},{mutant_file},{mutated_class},{result}"
+        if has_killing_test:
+            row += f",{' '.join(killing_tests)}"
+        f.write(row + "\n")
+
+
+def append_sampling_report(model, project_id, bug_id, report):
+    """
+    Print the sample size and achieved precision of a sampled run and
+    append them to the model's sampling report.
+    """
+    print(f"Sampling: {report['sampled']} of {report['population']} mutants, score {report['score']}% "
+          f"[{report['low']}, {report['high']}] at {report['confidence']:.0%}"
+          + (" (stopped early)" if report["stopped_early"] else ""))
+
+    report_path = os.path.join(model_results_dir(model), SAMPLING_REPORT_FILE)
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    new_file = not os.path.exists(report_path)
+    with open(report_path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["project_id", "bug_id", *report])
+        if new_file:
+            writer.writeheader()
+        writer.writerow({"project_id": project_id, "bug_id": bug_id, **report})
+
+
+def reuse_cached_results(model, project_id, bug_id, mutant_files, result_cache, cache_keys, estimate=None):
+    """
+    Record the results of mutants already evaluated in an earlier run.
+    Returns the mutant files that still have to be evaluated.
+
+    Cached results cost nothing, so in sampling mode they all feed the
+    `estimate`: a mutant being cached does not depend on its outcome, so
+    they are as good a sample as the evaluated mutants.
+    """
+    remaining = []
+    for full_mutant_path in mutant_files:
+        cached = result_cache.get(cache_keys.get(full_mutant_path))
+        if cached is None:
+            remaining.append(full_mutant_path)
+            continue
+        mutant_file = os.path.basename(full_mutant_path)
+        result, killing_tests = cached
+        print(f"Cached result for {mutant_file}: {result}")
+        append_result(model, project_id, bug_id, mutant_file, mutant_file.split("_Mutant_")[0], result, killing_tests)
+        if estimate is not None:
+            estimate.add(result)
+
+    print(f"Result cache: {len(mutant_files) - len(remaining)} of {len(mutant_files)} mutants reused")
+    return remaining
+
+
+def evaluate_with_schemata(project_id, bug_id, fixed_version, working_dir, mutant_files, model,
+                           result_cache=None, cache_keys=None, estimate=None, kill_history=None,
+                           mutants_base_dir=None):
+    """
+    Evaluate mutants class by class through mutant schemata.
+    Returns the mutant files that must still be evaluated individually,
+    in their original order.
+    """
+    by_class = {}
+    for full_mutant_path in mutant_files:
+        class_key = full_mutant_path.split("_Mutant_")[0]
+        by_class.setdefault(class_key, []).append(full_mutant_path)
+
+    remaining = []
+    for class_key, class_mutants in by_class.items():
+        mutated_class = os.path.basename(class_key)
+
+        if not fresh_checkout(project_id, bug_id, fixed_version, working_dir):
+            print("Checkout failed during schema evaluation.")
+            remaining.extend(class_mutants)
+            continue
+
+        results, isolated = run_schema_for_class(working_dir, class_mutants)
+        for full_mutant_path, (result, killing_tests) in results.items():
+            append_result(model, project_id, bug_id, os.path.basename(full_mutant_path), mutated_class, result,
+                          killing_tests)
+            if result_cache is not None:
+                result_cache.put(cache_keys.get(full_mutant_path), result, killing_tests)
+            if kill_history is not None:
+                learn_result(kill_history, full_mutant_path, mutants_base_dir, result, killing_tests)
+            if estimate is not None:
+                estimate.add(result)
+        remaining.extend(isolated)
+
+    remaining = set(remaining)
+    return [f for f in mutant_files if f in remaining]
+
+
+def evaluate_with_group_testing(project_id, bug_id, fixed_version, working_dir, mutant_files, model,
+                                result_cache=None, cache_keys=None, estimate=None, kill_history=None,
+                                mutants_base_dir=None):
+    """
+    Evaluate mutants in batches through group testing (modules/group_testing.py),
+    with the schemata of every class compiled into one working directory.
+    Returns the mutant files that must still be evaluated individually,
+    in their original order.
+
+    Batches are taken in the order of `mutant_files` and the `estimate` is
+    checked between batches, so sampling mode still stops early.
+    """
+    if not fresh_checkout(project_id, bug_id, fixed_version, working_dir):
+        print("Checkout failed during group testing.")
+        return mutant_files
+
+    by_class = {}
+    for full_mutant_path in mutant_files:
+        by_class.setdefault(full_mutant_path.split("_Mutant_")[0], []).append(full_mutant_path)
+
+    tester = GroupTester(working_dir)
+    remaining = []
+    for class_mutants in by_class.values():
+        remaining.extend(tester.add_class(class_mutants))
+
+    def record(full_mutant_path, result, killing_tests):
+        mutant_file = os.path.basename(full_mutant_path)
+        append_result(model, project_id, bug_id, mutant_file, mutant_file.split("_Mutant_")[0], result,
+                      killing_tests)
+        if result_cache is not None:
+            result_cache.put(cache_keys.get(full_mutant_path), result, killing_tests)
+        if kill_history is not None:
+            learn_result(kill_history, full_mutant_path, mutants_base_dir, result, killing_tests)
+        if estimate is not None:
+            estimate.add(result)
+
+    remaining.extend(tester.evaluate(record, stop=estimate.done if estimate is not None else None))
+    tester.report()
+    if estimate is not None and estimate.done():
+        return []
+
+    remaining = set(remaining)
+    return [f for f in mutant_files if f in remaining]
+
+
+def evaluate_mutant_file(project_id, bug_id, fixed_version, working_dir, full_mutant_path, qualified_class,
+                         kill_history, tce=None):
+    """
+    Evaluate one mutant in a fresh checkout: apply it, compile and test.
+
+    Returns:
+        tuple: (result, killing tests), or None when the checkout or the
+        mutant application failed.
+    """
+    mutant_file = os.path.basename(full_mutant_path)
+    mutated_class = mutant_file.split("_Mutant_")[0]
+    header = read_mutant_header(full_mutant_path)
+
+    # Ensure clean working directory for each mutant
+    if not fresh_checkout(project_id, bug_id, fixed_version, working_dir):
+        print("Checkout failed during mutant iteration.")
+        return None
+
+    print(f"\n Testing mutant: {mutant_file}")
+
+    # Apply single mutant to project
+    if not apply_single_mutant(full_mutant_path, working_dir):
+        print("Failed to apply mutant.")
+        return None
+
+    # Run Defects4J tests for mutated class
+    test_order = None
+    if TEST_MODE == TEST_MODE_FAIL_FAST:
+        test_order = kill_history.order_tests(prioritize_tests(working_dir, mutated_class),
+                                              qualified_class, header.get("line"),
+                                              mutation_operator(header.get("original_code"),
+                                                                header.get("mutated_code")))
+    return evaluate_mutant(working_dir, qualified_class, TEST_MODE, test_order, tce=tce,
+                           mutant_id=os.path.splitext(mutant_file)[0])
+
+
+def learn_result(kill_history, full_mutant_path, mutants_base_dir, result, killing_tests):
+    """
+    Add a killed or surviving mutant to the kill history, by class, line
+    and operator (named after Major's from the changed tokens).
+    """
+    if result in ("killed", "survived"):
+        header = read_mutant_header(full_mutant_path)
+        kill_history.record(qualified_class_name(full_mutant_path, mutants_base_dir), header.get("line"),
+                            mutation_operator(header.get("original_code"), header.get("mutated_code")),
+                            killing_tests)
+
+
+def record_result(model, project_id, bug_id, full_mutant_path, mutants_base_dir, result, killing_tests,
+                  kill_history, result_cache, cache_keys):
+    """Append the result of a mutant, memoize it and learn from its killing tests."""
+    mutant_file = os.path.basename(full_mutant_path)
+    append_result(model, project_id, bug_id, mutant_file, mutant_file.split("_Mutant_")[0], result, killing_tests)
+    result_cache.put(cache_keys.get(full_mutant_path), result, killing_tests)
+    learn_result(kill_history, full_mutant_path, mutants_base_dir, result, killing_tests)
+
+
+def distribute_evaluation(queue_path, project_id, bug_id, fixed_version, model, mutant_files, mutants_base_dir,
+                          kill_history, result_cache, cache_keys, estimate=None):
+    """
+    Evaluate mutants through the shared job queue: one job per mutant,
+    carrying the mutant source so workers need no shared mutants folder.
+    Results are recorded here, as the workers finish them, so that results
+    files, cache and kill history keep a single writer.
+
+    In sampling mode the `estimate` takes results in queue order only
+    (mutants that finish early, often the killed ones, must not bias it)
+    and the pending jobs are dropped once it is precise enough.
+    """
+    sweep = f"{project_id}_{bug_id}:{model}:{uuid.uuid4().hex[:8]}"
+    by_key = {}
+    jobs = []
+    for full_mutant_path in mutant_files:
+        key = os.path.relpath(full_mutant_path, os.path.dirname(mutants_base_dir))
+        with open(full_mutant_path) as f:
+            source = f.read()
+        by_key[key] = full_mutant_path
+        jobs.append((key, {"project_id": project_id, "bug_id": bug_id, "fixed_version": fixed_version,
+                           "mutant": key, "source": source,
+                           "qualified_class": qualified_class_name(full_mutant_path, mutants_base_dir)}))
+
+    queue = WorkQueue(queue_path)
+    queue.enqueue(sweep, jobs)
+    print(f"Queued {len(jobs)} mutants as sweep {sweep} in {queue_path}")
+
+    recorded = set()
+    results = {}
+    next_job = 0
+    try:
+        while True:
+            for job_id, key, status, outcome in queue.finished(sweep):
+                if job_id in recorded:
+                    continue
+                recorded.add(job_id)
+                if status == STATUS_DONE:
+                    result, killing_tests = outcome["result"], outcome["killing_tests"]
+                else:
+                    print(f"Mutant {key} failed on every worker: {outcome}")
+                    result, killing_tests = "error", []
+                record_result(model, project_id, bug_id, by_key[key], mutants_base_dir, result, killing_tests,
+                              kill_history, result_cache, cache_keys)
+                results[key] = result
+
+            if estimate is not None and not estimate.done():
+                while next_job < len(jobs) and jobs[next_job][0] in results and not estimate.done():
+                    estimate.add(results[jobs[next_job][0]])
+                    next_job += 1
+                if estimate.done():
+                    print(f"Sweep {sweep}: score precise enough, {queue.cancel(sweep)} pending mutants dropped")
+
+            counts = queue.counts(sweep)
+            if counts["pending"] + counts["leased"] == 0:
+                break
+            print(f"Sweep {sweep}: {counts['pending']} pending, {counts['leased']} running, "
+                  f"{len(recorded)} of {len(jobs)} finished")
+            time.sleep(QUEUE_POLL_SECONDS)
+    finally:
+        queue.close()
+
+
+# Per worker process: TrivialCompilerEquivalence of each project version seen
+_worker_tce = {}
+
+# Per worker process: (modification time of the history file, KillHistory) of each project
+_worker_history = {}
+
+
+def worker_kill_history(project_id):
+    """
+    Kill history of a project for a worker process, loaded again only
+    when the coordinator saved a new one (at the end of a run).
+    """
+    history_path = os.path.join(RESULTS_FOLDER, "kill_history", f"{project_id.lower()}.json")
+    mtime = os.path.getmtime(history_path) if os.path.exists(history_path) else None
+    cached = _worker_history.get(project_id)
+    if cached is None or cached[0] != mtime:
+        cached = _worker_history[project_id] = (mtime, KillHistory(project_id, RESULTS_FOLDER))
+    return cached[1]
+
+
+def evaluate_queued_mutant(payload):
+    """
+    Job handler of `cli.py worker`: evaluate one queued mutant in a working
+    directory private to this process.
+
+    Returns:
+        dict: 'result' and 'killing_tests'.
+    """
+    project_id, bug_id, fixed_version = payload["project_id"], payload["bug_id"], payload["fixed_version"]
+    worker_root = f"/tmp/mutationcompare_worker_{os.getpid()}"
+    working_dir = os.path.join(worker_root, f"{project_id.lower()}_{bug_id}_{fixed_version}")
+
+    # Rebuild the mutant file with the layout apply_single_mutant expects
+    full_mutant_path = os.path.join(worker_root, "mutants", payload["mutant"])
+    os.makedirs(os.path.dirname(full_mutant_path), exist_ok=True)
+    with open(full_mutant_path, "w") as f:
+        f.write(payload["source"])
+
+    version = (project_id, bug_id, fixed_version)
+    if USE_TCE and version not in _worker_tce:
+        # Original bytecode of the whole version, from a pristine checkout
+        if not fresh_checkout(project_id, bug_id, fixed_version, working_dir):
+            raise RuntimeError("checkout failed")
+        _worker_tce[version] = TrivialCompilerEquivalence(working_dir)
+
+    kill_history = worker_kill_history(project_id)
+    outcome = evaluate_mutant_file(project_id, bug_id, fixed_version, working_dir, full_mutant_path,
+                                   payload["qualified_class"], kill_history, _worker_tce.get(version))
+    os.remove(full_mutant_path)
+    if outcome is None:
+        raise RuntimeError("checkout or mutant application failed")
+    return {"result": outcome[0], "killing_tests": outcome[1]}
+
+
+def run_llm_model(project_id, bug_id, fixed_version, working_dir, model, telemetry, result_cache,
+                  queue_path=EVALUATION_QUEUE):
+    """
+    Generate the mutants of one model for a checked out and compiled
+    project, then evaluate them and append their results. With a
+    `queue_path` the evaluation is left to the workers of that queue.
+
+    Returns:
+        bool: False when the working directory could not be restored to a
+        pristine checkout afterwards.
+    """
+    mutants_base_dir = os.path.join("mutants", f"{project_id}_{bug_id}")
+
+    # Clean mutants directory for the model
+    if os.path.exists(mutants_base_dir):
+        shutil.rmtree(mutants_base_dir)
+
+    # Generate mutants for this project using the LLM
+    generate_mutants_for_project(working_dir, project_id, bug_id, model, concurrency=LLM_CONCURRENCY,
+                                 token_budget=PROMPT_TOKEN_BUDGET, telemetry=telemetry)
+    telemetry.flush(RESULTS_FOLDER)
+
+    mutant_files = list_mutant_files(mutants_base_dir)
+
+    # Sampling mode: random (stratified) order, stopped once the score is precise enough
+    estimate = None
+    if SAMPLING_HALF_WIDTH:
+        stratum = (lambda f: qualified_class_name(f, mutants_base_dir)) if SAMPLING_STRATA == "class" else None
+        mutant_files = sampling_order(mutant_files, stratum, SAMPLING_SEED)
+        estimate = SequentialEstimate(len(mutant_files), SAMPLING_HALF_WIDTH, SAMPLING_CONFIDENCE)
+
+    # Keys hash the pristine original class, the mutant change, the test suite and the evaluation mode
+    suite_sha1 = test_suite_hash(working_dir)
+    cache_keys = {f: mutant_cache_key(project_id, bug_id, working_dir, f, suite_sha1, evaluation_mode())
+                  for f in mutant_files}
+    mutant_files = reuse_cached_results(model, project_id, bug_id, mutant_files,
+                                        result_cache, cache_keys, estimate)
+
+    # Bytecode of the original classes, hashed before the working directory is mutated
+    tce = None
+    if USE_TCE and not queue_path:
+        tce = TrivialCompilerEquivalence(working_dir, {qualified_class_name(f, mutants_base_dir)
+                                                       for f in mutant_files})
+
+    # Tests that killed earlier mutants of the same class/line/operator run first
+    kill_history = KillHistory(project_id, RESULTS_FOLDER)
+
+    # Group testing or mutant schemata: one compilation per class, individual fallback for the rest
+    if USE_GROUP_TESTING:
+        mutant_files = evaluate_with_group_testing(project_id, bug_id, fixed_version, working_dir,
+                                                   mutant_files, model, result_cache, cache_keys, estimate,
+                                                   kill_history, mutants_base_dir)
+    elif USE_MUTANT_SCHEMATA:
+        mutant_files = evaluate_with_schemata(project_id, bug_id, fixed_version, working_dir,
+                                              mutant_files, model, result_cache, cache_keys, estimate,
+                                              kill_history, mutants_base_dir)
+
+    if queue_path:
+        distribute_evaluation(queue_path, project_id, bug_id, fixed_version, model, mutant_files, mutants_base_dir,
+                              kill_history, result_cache, cache_keys, estimate)
+    else:
+        # Apply each mutant and test it
+        for full_mutant_path in mutant_files:
+            if estimate is not None and estimate.done():
+                break
+            outcome = evaluate_mutant_file(project_id, bug_id, fixed_version, working_dir, full_mutant_path,
+                                           qualified_class_name(full_mutant_path, mutants_base_dir), kill_history,
+                                           tce)
+            if outcome is None:
+                continue
+            record_result(model, project_id, bug_id, full_mutant_path, mutants_base_dir, outcome[0], outcome[1],
+                          kill_history, result_cache, cache_keys)
+            if estimate is not None:
+                estimate.add(outcome[0])
+
+    kill_history.save()
+    if tce is not None:
+        tce.report()
+    if estimate is not None:
+        append_sampling_report(model, project_id, bug_id, estimate.report())
+
+    # The next model generates and hashes against a pristine checkout
+    if not fresh_checkout(project_id, bug_id, fixed_version, working_dir):
+        print("Checkout failed. Skipping project.")
+        return False
+    return True
+
+
+def main(llm_models=LLM_MODELS):
+    setup_environment(D4J_BIN_PATH, JAVA_HOME_11_PATH)
+    os.makedirs(RESULTS_FOLDER, exist_ok=True)
 
-def main():
     # CSV defining the projects to analyze
     projects_csv = "environment/projects.csv"
-    llm_models = ['openai/gpt-5.1-chat']#'mistralai/codestral-2508']#'mistralai/devstral-medium']#'anthropic/claude-opus-4.5']#'amazon/nova-pro-v1']#'openai/gpt-5.1-codex-max']#'anthropic/claude-opus-4.5']#'meta-llama/llama-4-maverick']
+    # Per-request latency/token/yield records, summarized per model in RESULTS_FOLDER
+    telemetry = LLMTelemetry()
+    result_cache = ResultCache(os.path.join(RESULTS_FOLDER, RESULT_CACHE_FILE))
 
     with open(projects_csv, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -27,16 +543,11 @@ def main():
             fixed_version = row['fixed_version']
 
             working_dir = f"/tmp/{project_id.lower()}_{bug_id}_{fixed_version}"
-            mutants_base_dir = os.path.join("mutants", f"{project_id}_{bug_id}")
 
             print(f"\n=== Processing {project_id} bug {bug_id} ===")
 
-            # Clean previous working directory if present
-            if os.path.exists(working_dir):
-                shutil.rmtree(working_dir)
-
-            # Checkout and compile Defects4J project
-            if not defects4j_checkout(project_id, bug_id, fixed_version, working_dir):
+            # Fresh copy of the Defects4J project, then compile it
+            if not fresh_checkout(project_id, bug_id, fixed_version, working_dir):
                 print("Checkout failed. Skipping project.")
                 continue
 
@@ -46,58 +557,9 @@ def main():
 
             # Iterate through LLM models
             for model in llm_models:
-
-                # Clean mutants directory for the model
-                if os.path.exists(mutants_base_dir):
-                    shutil.rmtree(mutants_base_dir)
-
-                # Generate mutants for this project using the LLM
-                generate_mutants_for_project(working_dir, project_id, bug_id, model)
-
-                # Apply each mutant and test it
-                for root, _, files in os.walk(mutants_base_dir):
-                    for mutant_file in files:
-
-                        # Ensure clean working directory for each mutant
-                        if os.path.exists(working_dir):
-                            shutil.rmtree(working_dir)
-
-                        if not defects4j_checkout(project_id, bug_id, fixed_version, working_dir):
-                            print("Checkout failed during mutant iteration.")
-                            continue
-
-                        if not mutant_file.endswith(".java"):
-                            continue
-
-                        full_mutant_path = os.path.join(root, mutant_file)
-                        mutated_class = mutant_file.split("_Mutant_")[0]
-
-                        print(f"\n Testing mutant: {mutant_file}")
-
-                        # Apply single mutant to project
-                        if not apply_single_mutant(full_mutant_path, working_dir):
-                            print("Failed to apply mutant.")
-                            continue
-
-                        # Directory for results based on model name
-                        result_model_dir = os.path.join(RESULTS_FOLDER, model.split("/")[0])
-                        print(result_model_dir)
-
-                        # Run Defects4J tests for mutated class
-                        result = run_test_for_class_with_d4j(working_dir, mutated_class)
-
-                        result_file_path = os.path.join(result_model_dir, RESULTS_FILE)
-                        os.makedirs(result_model_dir, exist_ok=True)
-
-                        # Create model-specific results file if missing
-                        if not os.path.exists(result_file_path):
-                            with open(result_file_path, "w") as f:
-                                f.write("project_id,bug_id,mutant_name,class,result\n")
-
-                        # Append results
-                        with open(result_file_path, "a") as f:
-                            f.write(f"{project_id},{bug_id},{mutant_file},{mutated_class},{result}\n")
-
+                if not run_llm_model(project_id, bug_id, fixed_version, working_dir, model, telemetry,
+                                     result_cache):
+                    break
 
 if __name__ == "__main__":
     main()
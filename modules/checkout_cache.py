@@ -0,0 +1,196 @@
+import fcntl
+import os
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+from environment.config import RESULTS_FOLDER
+from modules.defects4j_module import defects4j_checkout
+
+# Set to False to run `defects4j checkout` for every working copy
+USE_CHECKOUT_CACHE = True
+
+# Pristine checkouts kept across runs, one per (project, bug, version)
+CHECKOUT_CACHE_FOLDER = os.environ.get("D4J_CHECKOUT_CACHE", os.path.join(RESULTS_FOLDER, "checkout_cache"))
+
+# Disk budget of the cache in bytes; least recently used checkouts are evicted beyond it
+CHECKOUT_CACHE_BUDGET = int(os.environ.get("D4J_CHECKOUT_CACHE_BUDGET", 20 * 1024 ** 3))
+
+SNAPSHOT_DIR = "tree"
+SIZE_FILE = "size"
+LAST_USED_FILE = "last_used"
+
+
+def _tree_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            file_path = os.path.join(root, f)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
+def copy_tree(source, destination):
+    """
+    Copy a directory tree, as copy-on-write clones where the file system
+    supports them (btrfs, XFS), with shutil.copytree otherwise.
+    """
+    try:
+        result = subprocess.run(["cp", "-a", "--reflink=auto", source, destination], capture_output=True)
+        if result.returncode == 0:
+            return
+    except OSError:
+        pass
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    shutil.copytree(source, destination, symlinks=True)
+
+
+@contextmanager
+def _locked(lock_path, exclusive, blocking=True):
+    """flock a lock file; yields False when non-blocking and already held."""
+    with open(lock_path, "a") as lock_file:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(lock_file, flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CheckoutCache:
+    """
+    Pristine Defects4J checkouts kept across runs, keyed by project, bug
+    and version, handed out as fresh copies.
+
+    The first request for a version runs `defects4j checkout` into the
+    cache; later ones only copy the snapshot. Each entry has a lock file:
+    copies hold it shared, creation and eviction exclusive, so several
+    processes (workers, pipelines) can share the cache. Entries beyond
+    the disk budget are evicted least recently used first.
+    """
+
+    def __init__(self, folder=CHECKOUT_CACHE_FOLDER, budget=CHECKOUT_CACHE_BUDGET):
+        self.folder = folder
+        self.budget = budget
+        os.makedirs(folder, exist_ok=True)
+
+    def _entry(self, project_id, bug_id, fixed_version):
+        return os.path.join(self.folder, f"{project_id.lower()}_{bug_id}{fixed_version}")
+
+    def _fill(self, entry, project_id, bug_id, fixed_version):
+        """Check a version out into the cache. Caller holds the entry lock exclusively."""
+        snapshot = os.path.join(entry, SNAPSHOT_DIR)
+        partial = snapshot + ".partial"
+        if os.path.exists(partial):
+            shutil.rmtree(partial)
+        start = time.time()
+        if not defects4j_checkout(project_id, bug_id, fixed_version, partial):
+            shutil.rmtree(partial, ignore_errors=True)
+            return False
+        os.rename(partial, snapshot)
+        with open(os.path.join(entry, SIZE_FILE), "w") as f:
+            f.write(str(_tree_size(snapshot)))
+        print(f"Checkout cache: stored {project_id} {bug_id}{fixed_version} in {time.time() - start:.1f}s")
+        return True
+
+    def checkout(self, project_id, bug_id, fixed_version, working_dir):
+        """
+        Replace `working_dir` with a fresh copy of a pristine checkout.
+
+        Returns:
+            bool: False when the version could not be checked out.
+        """
+        if os.path.exists(working_dir):
+            shutil.rmtree(working_dir)
+
+        entry = self._entry(project_id, bug_id, fixed_version)
+        os.makedirs(entry, exist_ok=True)
+        lock_path = entry + ".lock"
+        snapshot = os.path.join(entry, SNAPSHOT_DIR)
+
+        if not os.path.isdir(snapshot):
+            with _locked(lock_path, exclusive=True):
+                # Another process may have filled the entry while we waited
+                if not os.path.isdir(snapshot) and not self._fill(entry, project_id, bug_id, fixed_version):
+                    return False
+            self.evict(keep=entry)
+
+        with _locked(lock_path, exclusive=False):
+            if not os.path.isdir(snapshot):
+                # Evicted in the meantime
+                return self.checkout(project_id, bug_id, fixed_version, working_dir)
+            os.makedirs(os.path.dirname(os.path.abspath(working_dir)), exist_ok=True)
+            copy_tree(snapshot, working_dir)
+            with open(os.path.join(entry, LAST_USED_FILE), "w") as f:
+                f.write(str(time.time()))
+        return True
+
+    def entries(self):
+        """(last use, size in bytes, entry folder) of every cached checkout, oldest first."""
+        entries = []
+        for name in os.listdir(self.folder):
+            entry = os.path.join(self.folder, name)
+            if not os.path.isdir(os.path.join(entry, SNAPSHOT_DIR)):
+                continue
+            try:
+                with open(os.path.join(entry, SIZE_FILE)) as f:
+                    size = int(f.read())
+            except (OSError, ValueError):
+                size = _tree_size(os.path.join(entry, SNAPSHOT_DIR))
+            last_used_path = os.path.join(entry, LAST_USED_FILE)
+            last_used = os.path.getmtime(last_used_path if os.path.exists(last_used_path) else entry)
+            entries.append((last_used, size, entry))
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        """
+        Delete least recently used checkouts until the cache fits its
+        budget; entries in use by another process and `keep` are spared.
+
+        Returns:
+            int: Number of checkouts evicted.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entry in entries:
+            if total <= self.budget:
+                break
+            if entry == keep:
+                continue
+            with _locked(entry + ".lock", exclusive=True, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted += 1
+            print(f"Checkout cache: evicted {os.path.basename(entry)} ({size / 1024 ** 2:.0f} MiB)")
+        return evicted
+
+
+_cache = None
+
+
+def fresh_checkout(project_id, bug_id, fixed_version, working_dir):
+    """
+    Fresh working copy of a Defects4J version in `working_dir` (removed
+    first if present), from the checkout cache unless USE_CHECKOUT_CACHE
+    is off.
+
+    Returns:
+        bool: False when the checkout failed.
+    """
+    global _cache
+    if not USE_CHECKOUT_CACHE:
+        if os.path.exists(working_dir):
+            shutil.rmtree(working_dir)
+        return defects4j_checkout(project_id, bug_id, fixed_version, working_dir)
+    if _cache is None:
+        _cache = CheckoutCache()
+    return _cache.checkout(project_id, bug_id, fixed_version, working_dir)
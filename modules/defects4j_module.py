@@ -6,7 +6,7 @@ def defects4j_checkout(project_id, bug_id, fixed_version, working_dir):
     Checkout a specific Defects4J project and bug version.
     """
     checkout_command = f"defects4j checkout -p {project_id} -v {bug_id}{fixed_version} -w {working_dir}"
-    stdout, stderr, returncode = run_command(checkout_command)
+    stdout, stderr, returncode = run_command(checkout_command, stage="defects4j_checkout")
 
     if returncode != 0:
         print(f"Error during project checkout: {stderr}")
@@ -19,7 +19,7 @@ def defects4j_compile(working_dir):
     """
     Compile the Defects4J project inside the given working directory.
     """
-    stdout, stderr, returncode = run_command("defects4j compile", cwd=working_dir)
+    stdout, stderr, returncode = run_command("defects4j compile", cwd=working_dir, stage="defects4j_compile")
 
     if returncode != 0:
         print(f"Error during project compilation: {stderr}")
@@ -32,7 +32,7 @@ def defects4j_test(working_dir):
     """
     Run the test suite using Defects4J.
     """
-    stdout, stderr, returncode = run_command("defects4j test", cwd=working_dir)
+    stdout, stderr, returncode = run_command("defects4j test", cwd=working_dir, stage="defects4j_test")
 
     if returncode != 0:
         print(f"Error during project tests: {stderr}")
@@ -41,22 +41,37 @@ def defects4j_test(working_dir):
     return True
 
 
-def defects4j_test_with_timeout(working_dir, timeout=10):
+def defects4j_export(working_dir, prop):
+    """
+    Export a Defects4J property (e.g. tests.all, tests.relevant).
+    Returns the exported value, or None on failure.
+    """
+    # The exported value is parsed: keep all of it
+    stdout, stderr, returncode = run_command(f"defects4j export -p {prop}", cwd=working_dir,
+                                             stage="defects4j_export", tail_bytes=None)
+
+    if returncode != 0:
+        print(f"Error exporting {prop}: {stderr}")
+        return None
+
+    return stdout
+
+
+def defects4j_test_with_timeout(working_dir, timeout=10, env=None, single_test=None):
     """
     Run Defects4J tests with a timeout.
+    `env` optionally replaces the environment of the test process and
+    `single_test` restricts the run to one test class or test method.
     Returns:
         "ok" if tests finish within the timeout,
         "timeout" if execution exceeds the allowed time.
     """
+    command = "defects4j test"
+    if single_test:
+        command += f" -t {single_test}"
     try:
-        subprocess.run(
-            "defects4j test",
-            shell=True,
-            cwd=working_dir,
-            timeout=timeout,
-            capture_output=True, 
-            text=True
-        )
+        # The whole process group is killed on timeout, including the test JVM
+        run_command(command, cwd=working_dir, env=env, stage="defects4j_test", timeout=timeout)
         return "ok"
 
     except subprocess.TimeoutExpired:
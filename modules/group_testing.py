@@ -0,0 +1,315 @@
+import os
+import re
+from modules.defects4j_module import defects4j_test_with_timeout
+from modules.llm_test_module import read_failure_traces
+from modules.schemata_module import LITERAL_RE, SCHEMA_ENV, prepare_class_schema
+
+# Largest number of mutants activated together in one test run
+MAX_BATCH_SIZE = 16
+
+# Share of batched mutants assumed left unresolved by their batch's run before any batch was
+# tested, weighted as PRIOR_MUTANTS batched mutants
+INITIAL_UNRESOLVED_RATE = 0.3
+PRIOR_MUTANTS = 10
+
+# Lines outside any method body belong to the constructors, which run the field initializers
+FIELD_MEMBER = "<init>"
+
+CALL_NAME_RE = re.compile(r"([\w$]+)\s*\(")
+
+
+def _member_name(header, class_name):
+    """Name a member has in stack frames, from the code preceding its body."""
+    names = CALL_NAME_RE.findall(header)
+    if not names or "=" in header:
+        # Initializer block, inner or anonymous class body, array initializer
+        return "<clinit>" if header.split() == ["static"] else FIELD_MEMBER
+    return "<init>" if names[-1] == class_name else names[-1]
+
+
+def method_members(source, class_name):
+    """
+    Method of the top-level class enclosing every code line of a source.
+
+    Methods are found by brace depth on the comment-free source (literals
+    blanked): a body opened at depth 1 is a member, named after the last
+    call-like identifier of its header; constructors are "<init>" and
+    nested classes count as a single member.
+
+    Returns:
+        dict: {line number: member name}; lines outside any member are
+        missing (see FIELD_MEMBER).
+    """
+    cleaned, line_map = source.cleaned
+    members = {}
+    depth = 0
+    header = ""
+    current = None
+    for line_no, code in zip(line_map, cleaned.split("\n")):
+        in_member = depth >= 2
+        for char in LITERAL_RE.sub('""', code):
+            if char == "{":
+                if depth == 1:
+                    current = _member_name(header, class_name)
+                depth += 1
+                header = ""
+            elif char == "}":
+                depth -= 1
+                header = ""
+            elif char == ";":
+                if depth == 1:
+                    header = ""
+            elif depth == 1:
+                header += char
+            in_member = in_member or depth >= 2
+        if in_member:
+            members[line_no] = current
+    return members
+
+
+def dorfman_batch_size(unresolved_rate, max_size=MAX_BATCH_SIZE):
+    """
+    Batch size minimizing the expected test runs per mutant of Dorfman's
+    two-stage group testing, 1/k + 1 - (1 - p)^k, with the mutants a batch
+    run cannot resolve as positives (p = unresolved_rate): survivors
+    masked by a killed mutant, and killed mutants whose failures carry no
+    frame on their mutated line.
+
+    The adaptive splitting needs fewer runs than Dorfman's second stage
+    (one run per mutant), so the size is on the small, safe side. Testing
+    mutants one by one is optimal from about 30% unresolved mutants on,
+    e.g. for suites failing through plain assertions.
+    """
+    positives = min(max(unresolved_rate, 0.0), 1.0)
+    best_size, best_cost = 1, 1.0
+    for size in range(2, max_size + 1):
+        cost = 1 / size + 1 - (1 - positives) ** size
+        if cost < best_cost:
+            best_size, best_cost = size, cost
+    return best_size
+
+
+def _frame_class(frame_class):
+    """Top-level class of a stack frame (inner and anonymous classes folded)."""
+    return frame_class.split("$", 1)[0]
+
+
+def _attribution_level(test, frames, mutant):
+    """
+    How closely a failing test points at a mutant, lower is closer:
+    0 a frame on the mutated line, 1 a frame in its method, 2 a frame in
+    its class, 3 a test class named after its class; None otherwise.
+    """
+    level = None
+    for frame_class, method, line in frames:
+        if _frame_class(frame_class) != mutant["class"]:
+            continue
+        if line == mutant["line"]:
+            return 0
+        if method == mutant["member"] or method.startswith(f"lambda${mutant['member']}$"):
+            level = 1
+        elif level is None:
+            level = 2
+    if level is None:
+        simple_name = mutant["class"].split(".")[-1]
+        test_name = test.split("::")[0].split(".")[-1]
+        if test_name in (f"{simple_name}Test", f"Test{simple_name}", f"{simple_name}Tests"):
+            level = 3
+    return level
+
+
+def attribute_failures(traces, batch):
+    """
+    Mutants of a batch each failing test points at, at any level (see
+    _attribution_level).
+
+    Args:
+        traces (dict): Frames of every failing test, see read_failure_traces.
+        batch (list): Active mutants.
+
+    Returns:
+        dict: {failing test: {index in batch: level}}, empty when nothing
+        points at any active mutant.
+    """
+    attributed = {}
+    for test, frames in traces.items():
+        levels = {i: _attribution_level(test, frames, mutant) for i, mutant in enumerate(batch)}
+        attributed[test] = {i: level for i, level in levels.items() if level is not None}
+    return attributed
+
+
+class GroupTester:
+    """
+    Group testing of mutant schemata: several non-interfering mutants,
+    at most one per class, are activated together and the test suite
+    runs once for all of them.
+
+    The failing tests of a run are attributed to the active mutants from
+    their stack traces. A mutant is killed by a failing test whose trace
+    has a frame on its mutated line and points at no other active mutant,
+    at any level (its method or class, or a test named after it); when
+    every active mutant is, the whole batch is resolved by one run. A
+    failure pointing at several mutants, or only at a mutant's method or
+    class, may come from any of them (a mutated call site is on the stack
+    of a failure in the mutated method it calls), so it only guides the
+    split. A batch without failures survives as a whole. The mutants left
+    are tested again without the killed ones; when none was killed, the
+    suspects are split from the others (in halves if there are no
+    suspects, or the batch timed out), down to single mutants, whose
+    outcome is direct.
+
+    Batch sizes follow the share of batched mutants left unresolved by
+    their batch's run so far (dorfman_batch_size): the more kills carry a
+    frame on the mutated line and the fewer survivors, the larger the
+    batches; suites failing through plain assertions fall back to one
+    mutant per run.
+    """
+
+    def __init__(self, working_dir, timeout=10, max_batch_size=MAX_BATCH_SIZE):
+        self.working_dir = working_dir
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.mutants = []
+        self.next_id = 1
+        self.evaluated = 0
+        self.killed = 0
+        self.batched = PRIOR_MUTANTS
+        self.unresolved = INITIAL_UNRESOLVED_RATE * PRIOR_MUTANTS
+        self.test_runs = 0
+
+    def add_class(self, mutant_files):
+        """
+        Schematize and compile one class of the working directory, keeping
+        the schemata of the classes added before.
+
+        Returns:
+            list: Mutant files to evaluate individually.
+        """
+        qualified_class, source, compiled, isolated = prepare_class_schema(self.working_dir, mutant_files,
+                                                                           self.next_id)
+        self.next_id += len(mutant_files)
+        if source is not None:
+            members = method_members(source, qualified_class.split(".")[-1])
+            for mutant in compiled:
+                mutant.update({"class": qualified_class, "member": members.get(mutant["line"], FIELD_MEMBER)})
+            self.mutants.extend(compiled)
+        return isolated
+
+    def unresolved_rate(self):
+        return self.unresolved / self.batched
+
+    def batch_size(self):
+        return dorfman_batch_size(self.unresolved_rate(), self.max_batch_size)
+
+    def _next_batch(self, pending):
+        """
+        Take the next batch off `pending`: in order, at most one mutant per
+        class, since a failure through a class points at all its mutants.
+        """
+        size = self.batch_size()
+        batch, classes, rest = [], set(), []
+        for mutant in pending:
+            if len(batch) < size and mutant["class"] not in classes:
+                batch.append(mutant)
+                classes.add(mutant["class"])
+            else:
+                rest.append(mutant)
+        pending[:] = rest
+        return batch
+
+    def _run(self, batch):
+        """Run the test suite with the batch active; None on timeout, else the failure traces."""
+        env = dict(os.environ)
+        env[SCHEMA_ENV] = ",".join(str(mutant["schema_id"]) for mutant in batch)
+        self.test_runs += 1
+        if defects4j_test_with_timeout(self.working_dir, self.timeout, env=env) == "timeout":
+            return None
+        return read_failure_traces(self.working_dir)
+
+    def _resolve(self, batch, results):
+        """
+        Outcome of every mutant of a batch into `results`, splitting the
+        batch as needed.
+
+        Returns:
+            int: Mutants the first run of the batch left unresolved.
+        """
+        traces = self._run(batch)
+        if traces is None:
+            if len(batch) == 1:
+                results[batch[0]["file"]] = ("timeout", [])
+                return 0
+            self._resolve(batch[:len(batch) // 2], results)
+            self._resolve(batch[len(batch) // 2:], results)
+            return len(batch)
+
+        if not traces:
+            for mutant in batch:
+                results[mutant["file"]] = ("survived", [])
+            return 0
+        if len(batch) == 1:
+            results[batch[0]["file"]] = ("killed", list(traces))
+            return 0
+
+        killing_tests, suspects = {}, set()
+        for test, levels in attribute_failures(traces, batch).items():
+            # A frame on the mutated line only shows the line was on the failing stack: with another
+            # active mutant in the trace (e.g. in the method it calls) either may have failed the test
+            if len(levels) == 1 and 0 in levels.values():
+                killing_tests.setdefault(next(iter(levels)), []).append(test)
+            else:
+                suspects.update(levels)
+        for index, tests in killing_tests.items():
+            results[batch[index]["file"]] = ("killed", tests)
+
+        rest = [mutant for i, mutant in enumerate(batch) if i not in killing_tests]
+        if not rest:
+            return 0
+        if killing_tests:
+            # The killed mutants may have masked failures of the others
+            self._resolve(rest, results)
+        elif 0 < len(suspects) < len(batch):
+            self._resolve([batch[i] for i in sorted(suspects)], results)
+            self._resolve([mutant for i, mutant in enumerate(batch) if i not in suspects], results)
+        else:
+            self._resolve(rest[:len(rest) // 2], results)
+            self._resolve(rest[len(rest) // 2:], results)
+        return len(rest)
+
+    def evaluate(self, on_result, stop=None):
+        """
+        Resolve every added mutant, batch by batch.
+
+        Args:
+            on_result (callable): Called as on_result(mutant file, result,
+                killing tests) for each mutant, in the order mutants were
+                added within each batch.
+            stop (callable): Checked before each batch; True ends the
+                evaluation, leaving the remaining mutants unevaluated.
+
+        Returns:
+            list: Mutant files left unevaluated by `stop`.
+        """
+        pending = list(self.mutants)
+        while pending and not (stop and stop()):
+            batch = self._next_batch(pending)
+            runs = self.test_runs
+            results = {}
+            unresolved = self._resolve(batch, results)
+            if len(batch) > 1:
+                self.batched += len(batch)
+                self.unresolved += unresolved
+            print(f"Group testing: batch of {len(batch)} resolved in {self.test_runs - runs} test run(s)")
+            for mutant in batch:
+                result, killing_tests = results[mutant["file"]]
+                self.evaluated += 1
+                self.killed += result in ("killed", "timeout")
+                on_result(mutant["file"], result, killing_tests)
+        return [mutant["file"] for mutant in pending]
+
+    def report(self):
+        """Print the test runs spent against one run per mutant."""
+        if self.evaluated:
+            print(f"Group testing: {self.evaluated} mutants in {self.test_runs} test runs "
+                  f"({self.test_runs / self.evaluated:.2f} per mutant), kill rate "
+                  f"{self.killed / self.evaluated:.0%}, {self.unresolved_rate():.0%} unresolved by their batch")
@@ -0,0 +1,252 @@
+import csv
+import json
+import os
+from array import array
+
+import numpy as np
+
+# Arrays of a saved matrix, one .npy file each, loaded memory-mapped
+ARRAYS = ("coverage_indptr", "coverage_indices", "kills_indptr", "kills_indices",
+          "coverage_by_test_indptr", "coverage_by_test_indices", "kills_by_test_indptr", "kills_by_test_indices")
+NAMES_FILE = "names.json"
+
+PIT_KILLED = ("KILLED", "TIMED_OUT", "MEMORY_ERROR", "RUN_ERROR")
+
+
+def _csr(rows, cols, n_rows, n_cols):
+    """
+    CSR arrays (indptr, indices) of a boolean n_rows x n_cols matrix given
+    its (row, col) pairs; duplicate pairs are dropped, columns are sorted
+    within a row.
+    """
+    keys = np.unique(np.asarray(rows, dtype=np.int64) * n_cols + np.asarray(cols, dtype=np.int64))
+    rows = keys // max(n_cols, 1)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, (keys % max(n_cols, 1)).astype(np.int32)
+
+
+def _transpose(indptr, indices, n_cols):
+    """CSR arrays of the transpose of a CSR matrix with `n_cols` columns."""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+    return _csr(indices, rows, n_cols, len(indptr) - 1)
+
+
+def _gather(indptr, indices, rows):
+    """Column indices of several CSR rows, concatenated."""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts, lengths = indptr[rows], indptr[rows + 1] - indptr[rows]
+    if not len(rows) or not lengths.sum():
+        return np.zeros(0, dtype=np.int32)
+    # Position of every element in `indices`: its row start plus its offset in the row
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return indices[np.repeat(starts, lengths) + offsets]
+
+
+def _read_test_map(test_map):
+    """Test names in testMap order and the index of each Major test number."""
+    names, index = [], {}
+    if os.path.exists(test_map):
+        with open(test_map, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0].isdigit():
+                    index[row[0]] = len(names)
+                    names.append(row[1])
+    return names, index
+
+
+def _read_pairs(path, tests, test_index, mutant_index):
+    """(test, mutant) index arrays of a Major covMap.csv or killMap.csv."""
+    test_rows, mutant_cols = array("i"), array("i")
+    if not os.path.exists(path):
+        return test_rows, mutant_cols
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].isdigit() or row[1] not in mutant_index:
+                continue
+            if row[0] not in test_index:
+                # Test missing from testMap: keep it under its number
+                test_index[row[0]] = len(tests)
+                tests.append(row[0])
+            test_rows.append(test_index[row[0]])
+            mutant_cols.append(mutant_index[row[1]])
+    return test_rows, mutant_cols
+
+
+class KillMatrix:
+    """
+    Boolean mutant x test coverage and kill matrices of one mutation run.
+
+    Both matrices are kept as integer CSR arrays (indptr, int32 indices),
+    by mutant and transposed by test, so that every query is a slice or a
+    vectorized reduction instead of a walk over dicts of sets. A matrix is
+    saved as one .npy file per array plus names.json (test names and
+    mutant ids, in index order) and loaded memory-mapped, so large runs are
+    queried without reading the arrays into memory.
+    """
+
+    def __init__(self, tests, mutants, arrays):
+        self.tests = tests
+        self.mutants = mutants
+        self.test_index = {name: i for i, name in enumerate(tests)}
+        self.mutant_index = {mutant_id: i for i, mutant_id in enumerate(mutants)}
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_pairs(cls, tests, mutants, coverage, kills):
+        """
+        Build a matrix from (test index, mutant index) pairs.
+
+        Args:
+            tests (list): Test names.
+            mutants (list): Mutant ids (str).
+            coverage (tuple): Test and mutant index sequences of covering tests.
+            kills (tuple): Test and mutant index sequences of killing tests;
+                a killing test also counts as covering.
+        """
+        coverage_tests = np.concatenate([np.asarray(coverage[0], dtype=np.int64), np.asarray(kills[0], dtype=np.int64)])
+        coverage_mutants = np.concatenate([np.asarray(coverage[1], dtype=np.int64), np.asarray(kills[1], dtype=np.int64)])
+        arrays = {}
+        arrays["coverage_indptr"], arrays["coverage_indices"] = _csr(coverage_mutants, coverage_tests,
+                                                                     len(mutants), len(tests))
+        arrays["kills_indptr"], arrays["kills_indices"] = _csr(kills[1], kills[0], len(mutants), len(tests))
+        arrays["coverage_by_test_indptr"], arrays["coverage_by_test_indices"] = _transpose(
+            arrays["coverage_indptr"], arrays["coverage_indices"], len(tests))
+        arrays["kills_by_test_indptr"], arrays["kills_by_test_indices"] = _transpose(
+            arrays["kills_indptr"], arrays["kills_indices"], len(tests))
+        return cls(tests, mutants, arrays)
+
+    @classmethod
+    def from_major(cls, working_dir):
+        """
+        Build the matrix of a Major run from kill.csv (mutant ids),
+        testMap.csv, covMap.csv and killMap.csv in `working_dir`.
+        """
+        mutants = []
+        kill_csv = os.path.join(working_dir, "kill.csv")
+        if os.path.exists(kill_csv):
+            with open(kill_csv, newline="") as f:
+                mutants = [row[0] for row in csv.reader(f) if row and row[0].isdigit()]
+        mutant_index = {mutant_id: i for i, mutant_id in enumerate(mutants)}
+
+        tests, test_index = _read_test_map(os.path.join(working_dir, "testMap.csv"))
+        coverage = _read_pairs(os.path.join(working_dir, "covMap.csv"), tests, test_index, mutant_index)
+        kills = _read_pairs(os.path.join(working_dir, "killMap.csv"), tests, test_index, mutant_index)
+        return cls.from_pairs(tests, mutants, coverage, kills)
+
+    @classmethod
+    def from_pit(cls, mutations_csv):
+        """
+        Build the matrix of a PIT mutations.csv report.
+
+        PIT only reports killing tests ("|"-separated with the full
+        mutation matrix); mutants are identified by their row number and
+        coverage is limited to the killing tests.
+        """
+        tests, test_index, mutants = [], {}, []
+        kill_tests, kill_mutants = array("i"), array("i")
+        with open(mutations_csv, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 6 or row[0] == "File":
+                    continue
+                mutant = len(mutants)
+                mutants.append(str(mutant + 1))
+                if row[5] not in PIT_KILLED or len(row) < 7:
+                    continue
+                for test in row[6].split("|"):
+                    if not test or test == "none":
+                        continue
+                    if test not in test_index:
+                        test_index[test] = len(tests)
+                        tests.append(test)
+                    kill_tests.append(test_index[test])
+                    kill_mutants.append(mutant)
+        return cls.from_pairs(tests, mutants, ((), ()), (kill_tests, kill_mutants))
+
+    def save(self, folder):
+        """Write the arrays and names to `folder`, replacing a previous matrix."""
+        os.makedirs(folder, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(folder, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(folder, NAMES_FILE), "w") as f:
+            json.dump({"tests": self.tests, "mutants": self.mutants}, f)
+
+    @classmethod
+    def load(cls, folder, mmap_mode="r"):
+        """Matrix saved in `folder`, memory-mapped unless `mmap_mode` is None."""
+        with open(os.path.join(folder, NAMES_FILE)) as f:
+            names = json.load(f)
+        arrays = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(names["tests"], names["mutants"], arrays)
+
+    @property
+    def shape(self):
+        """(mutants, tests)."""
+        return len(self.mutants), len(self.tests)
+
+    def _row(self, prefix, index):
+        indptr, indices = getattr(self, f"{prefix}_indptr"), getattr(self, f"{prefix}_indices")
+        return indices[indptr[index]:indptr[index + 1]]
+
+    def tests_covering(self, mutant_id):
+        """Names of the tests covering a mutant."""
+        return [self.tests[i] for i in self._row("coverage", self.mutant_index[str(mutant_id)])]
+
+    def tests_killing(self, mutant_id):
+        """Names of the tests killing a mutant."""
+        return [self.tests[i] for i in self._row("kills", self.mutant_index[str(mutant_id)])]
+
+    def mutants_covered_by(self, test):
+        """Ids of the mutants a test covers."""
+        return [self.mutants[i] for i in self._row("coverage_by_test", self.test_index[test])]
+
+    def mutants_killed_by(self, test):
+        """Ids of the mutants a test kills."""
+        return [self.mutants[i] for i in self._row("kills_by_test", self.test_index[test])]
+
+    def kill_counts(self):
+        """Number of mutants killed by each test, in test order (numpy array)."""
+        return np.diff(self.kills_by_test_indptr)
+
+    def coverage_counts(self):
+        """Number of tests covering each mutant, in mutant order (numpy array)."""
+        return np.diff(self.coverage_indptr)
+
+    def killed_mask(self):
+        """Boolean array, True for the mutants killed by at least one test."""
+        return np.diff(self.kills_indptr) > 0
+
+    def minimal_test_set(self):
+        """
+        Small set of tests killing every killed mutant (greedy set cover:
+        repeatedly take the test killing most mutants not killed yet).
+
+        Returns:
+            list: Test names, in the order they were chosen.
+        """
+        gains = self.kill_counts().astype(np.int64)
+        killed = np.zeros(len(self.mutants), dtype=bool)
+        chosen = []
+        while len(gains) and gains.max() > 0:
+            test = int(gains.argmax())
+            mutants = self._row("kills_by_test", test)
+            new = mutants[~killed[mutants]]
+            killed[new] = True
+            chosen.append(self.tests[test])
+            # The newly killed mutants no longer count for the tests that also kill them
+            gains -= np.bincount(_gather(self.kills_indptr, self.kills_indices, new), minlength=len(self.tests))
+        return chosen
+
+    def summary(self):
+        """Counts describing the matrix."""
+        kill_counts = self.kill_counts()
+        return {
+            "mutants": len(self.mutants),
+            "tests": len(self.tests),
+            "covered": int((self.coverage_counts() > 0).sum()),
+            "killed": int(self.killed_mask().sum()),
+            "coverage_pairs": int(len(self.coverage_indices)),
+            "kill_pairs": int(len(self.kills_indices)),
+            "killing_tests": int((kill_counts > 0).sum()),
+        }
@@ -1,31 +1,121 @@
+import csv
 import os
+import re
 import shutil
-from modules.defects4j_module import defects4j_compile, defects4j_test_with_timeout
+from modules.defects4j_module import defects4j_compile, defects4j_export, defects4j_test_with_timeout
 from llm.llm_mutation_engine_with_test import LLMMutationEngineWithTest
+from llm.source_file import get_source_file
 
-def run_test_for_class_with_d4j(working_dir, mutated_class):
+# Test execution modes: stop at the first failing test, or run the whole suite
+TEST_MODE_FAIL_FAST = "fail_fast"
+TEST_MODE_FULL_MATRIX = "full_matrix"
+
+# Test classes run one by one in fail-fast mode before falling back to the full suite
+FAIL_FAST_SINGLE_RUNS = 3
+
+# `defects4j test` cannot leave classes out of the full suite, so the fallback re-runs the classes
+# already tried: below this many test classes fail-fast goes straight to the full suite
+FAIL_FAST_MIN_TEST_CLASSES = 10
+
+# Stack frame of a failing test: "at pkg.Class.method(Class.java:42)"
+STACK_FRAME_RE = re.compile(r"^\s*at\s+([\w$.]+)\.([\w$<>]+)\([^:()]*(?::(\d+))?\)")
+
+# Java tokens compared to name the operator of an LLM mutant
+JAVA_TOKEN_RE = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|\d[\w.]*|[A-Za-z_$][\w$]*|>>>=?|<<=?|>>=?|[=!<>]=|&&|\|\||\+\+|--|[-+*/%&|^]=?|\S''')
+
+# Major operator of a single changed token, so that LLM mutants share the per-mutator kill history
+OPERATOR_GROUPS = {
+    "AOR": {"+", "-", "*", "/", "%"},
+    "ROR": {"<", "<=", ">", ">=", "==", "!="},
+    "COR": {"&&", "||"},
+    "LOR": {"&", "|", "^"},
+    "SOR": {"<<", ">>", ">>>"},
+}
+UNARY_OPERATORS = {"!", "-", "~", "++", "--"}
+LITERAL_KEYWORDS = {"true", "false", "null"}
+
+# working_dir -> (all test classes, relevant test classes), constant for a checked out version
+_test_classes_cache = {}
+
+
+def run_test_for_class_with_d4j(working_dir, mutated_class, mode=TEST_MODE_FULL_MATRIX, test_order=None):
     """
     Run Defects4J tests for the given class and determine
     whether the mutant is killed or survived.
     """
+    result, _ = evaluate_mutant(working_dir, mutated_class, mode, test_order)
+    return result
 
+
+def evaluate_mutant(working_dir, mutated_class, mode=TEST_MODE_FULL_MATRIX, test_order=None, timeout=10, tce=None,
+                    mutant_id=None):
+    """
+    Compile a mutated working directory and classify the mutant.
+
+    In fail-fast mode the likeliest killing test classes (`test_order`, or
+    by default the tests named after the mutated class followed by the
+    relevant tests) are run one at a time, up to FAIL_FAST_SINGLE_RUNS;
+    the first failure kills the mutant. Only if none fails is the full
+    suite run once, so a surviving mutant costs up to
+    FAIL_FAST_SINGLE_RUNS + 1 test runs instead of one. Suites of fewer
+    than FAIL_FAST_MIN_TEST_CLASSES test classes (as discovered by
+    list_test_classes, whatever `test_order` holds) skip the single runs,
+    which the full suite would repeat. Full-matrix mode (the default) always runs the full suite and reports
+    every failing test.
+
+    With a TrivialCompilerEquivalence `tce` (modules/tce_module.py) and a
+    fully-qualified `mutated_class`, a mutant whose bytecode equals the
+    original or an earlier mutant is not tested at all.
+
+    Returns:
+        tuple: (result, killing tests) where result is "killed",
+        "survived", "timeout", "build_failed", "equivalent" or
+        "duplicate_of:<mutant id>" and killing tests lists "Class::method"
+        entries (the test class for a timeout).
+    """
     try:
         compiled = defects4j_compile(working_dir)
     except Exception as e:
-        return "build_failed"
-    
-    if not compiled:
-        return "build_failed"
+        return "build_failed", []
 
-    result = defects4j_test_with_timeout(working_dir)
+    if not compiled:
+        return "build_failed", []
+
+    if tce is not None:
+        verdict = tce.check(working_dir, mutated_class, mutant_id)
+        if verdict:
+            return verdict, []
+
+    if mode == TEST_MODE_FAIL_FAST:
+        if len(list_test_classes(working_dir)[0]) < FAIL_FAST_MIN_TEST_CLASSES:
+            test_order = []
+        elif test_order is None:
+            test_order = prioritize_tests(working_dir, mutated_class)
+        for test_class in test_order[:FAIL_FAST_SINGLE_RUNS]:
+            print(f"Fail-fast: running {test_class}")
+            if defects4j_test_with_timeout(working_dir, timeout, single_test=test_class) == "timeout":
+                print(f"Timeout in {test_class} - mutant killed")
+                return "timeout", [test_class]
+            failing = read_failing_tests(working_dir)
+            if failing:
+                print(f"Mutant killed by {failing[0]}")
+                return "killed", failing[:1]
+
+    result = defects4j_test_with_timeout(working_dir, timeout)
 
     if result == "timeout":
-        print("Timeout (>30s) - mutant killed")
-        return "timeout"
+        print(f"Timeout (>{timeout}s) - mutant killed")
+        return "timeout", []
+
+    return read_test_outcome(working_dir), read_failing_tests(working_dir)
+
 
-    
+def read_test_outcome(working_dir):
+    """
+    Classify the last Defects4J test run of a working directory
+    as "killed" or "survived" from its failing_tests file.
+    """
     failing_tests_file = os.path.join(working_dir, "failing_tests")
-    print(failing_tests_file)
     print(f"Checking: {failing_tests_file}")
 
     # If failing_tests is not empty, the mutant is killed
@@ -37,14 +127,183 @@ def run_test_for_class_with_d4j(working_dir, mutated_class):
         return "survived"
 
 
+def list_test_classes(working_dir):
+    """
+    Return (all test classes, relevant test classes) of a Defects4J working
+    directory, cached per directory.
+    """
+    if working_dir not in _test_classes_cache:
+        all_tests = (defects4j_export(working_dir, "tests.all") or "").split()
+        relevant = (defects4j_export(working_dir, "tests.relevant") or "").split()
+        _test_classes_cache[working_dir] = (all_tests, relevant)
+    return _test_classes_cache[working_dir]
+
+
+def prioritize_tests(working_dir, mutated_class):
+    """
+    Default fail-fast order: test classes named after the mutated class
+    (e.g. FooTest for Foo), then the relevant tests, then the others.
+    """
+    all_tests, relevant = list_test_classes(working_dir)
+    simple_name = mutated_class.split(".")[-1]
+
+    def rank(test_class):
+        test_name = test_class.split(".")[-1]
+        if test_name in (f"{simple_name}Test", f"Test{simple_name}", f"{simple_name}Tests"):
+            return 0
+        if simple_name in test_name:
+            return 1
+        if test_class in relevant:
+            return 2
+        return 3
+
+    return sorted(dict.fromkeys(relevant + all_tests), key=rank)
+
+
+def read_failing_tests(working_dir):
+    """
+    Return the failing tests ("Class::method") of the last Defects4J test
+    run of a working directory.
+    """
+    failing_tests_file = os.path.join(working_dir, "failing_tests")
+    if not os.path.exists(failing_tests_file):
+        return []
+    with open(failing_tests_file, "r", errors="replace") as f:
+        return [line[4:].strip() for line in f if line.startswith("--- ")]
+
+
+def read_failure_traces(working_dir):
+    """
+    Return the stack frames of every failing test of the last Defects4J
+    test run of a working directory.
+
+    Returns:
+        dict: {"Class::method": [(class, method, line)]}, in failure order;
+        line is None for frames without a line number.
+    """
+    traces = {}
+    failing_tests_file = os.path.join(working_dir, "failing_tests")
+    if not os.path.exists(failing_tests_file):
+        return traces
+    frames = None
+    with open(failing_tests_file, "r", errors="replace") as f:
+        for line in f:
+            if line.startswith("--- "):
+                frames = traces.setdefault(line[4:].strip(), [])
+                continue
+            match = STACK_FRAME_RE.match(line)
+            if match and frames is not None:
+                frames.append((match.group(1), match.group(2), int(match.group(3)) if match.group(3) else None))
+    return traces
+
+
 def ensure_dir(path):
     """Ensure directory exists."""
     os.makedirs(path, exist_ok=True)
 
 
-def generate_mutants_for_project(working_dir, project_id, bug_id, model=""):
+# Header lines written at the top of every mutant file
+MUTANT_HEADER_FIELDS = {
+    "// ORIGINAL:": "original_code",
+    "// MUTATED:": "mutated_code",
+    "// LINE:": "line",
+    "// SOURCE_SHA1:": "source_sha1",
+}
+
+
+def write_mutant(mutant_file, source, mutation, line_no):
+    """
+    Write a mutant file: a comment header describing the mutation followed
+    by the original source with the given line mutated.
+    """
+    original_line = mutation["original_code"].strip()
+    mutated_line = mutation["mutated_code"]
+
+    with open(mutant_file, "w") as mf:
+        mf.write("// MUTATION:\n")
+        mf.write(f"// ORIGINAL: {original_line}\n")
+        mf.write(f"// MUTATED:  {mutated_line}\n")
+        mf.write(f"// LINE: {line_no}\n")
+        mf.write(f"// SOURCE_SHA1: {source.sha1}\n\n")
+        mf.write(source.render_mutant(line_no, original_line, mutated_line))
+
+
+def read_mutant_header(mutant_file):
+    """
+    Read the mutation description from a mutant file header.
+
+    Returns:
+        dict: 'original_code', 'mutated_code', 'line' (int) and 'source_sha1'
+        when present; older mutants only carry the first two.
+    """
+    header = {}
+    with open(mutant_file, "r") as f:
+        for line in f:
+            if not line.startswith("//"):
+                break
+            for prefix, key in MUTANT_HEADER_FIELDS.items():
+                if line.startswith(prefix):
+                    header[key] = line[len(prefix):].strip()
+    if "line" in header:
+        header["line"] = int(header["line"])
+    return header
+
+
+def _is_literal(token):
+    return token[0].isdigit() or token[0] in "\"'" or token in LITERAL_KEYWORDS
+
+
+def mutation_operator(original_code, mutated_code):
+    """
+    Name an LLM mutation after the Major operator it matches, from the
+    tokens it changes: AOR, ROR, COR, LOR or SOR for a swapped operator,
+    LVR for a changed literal, ORU for an inserted or removed unary
+    operator, STD for a deleted statement, OTHER for anything else.
+    """
+    original = JAVA_TOKEN_RE.findall(original_code or "")
+    mutated = JAVA_TOKEN_RE.findall(mutated_code or "")
+    if not mutated or mutated == [";"] or (mutated_code or "").strip().startswith("//"):
+        return "STD"
+
+    start = 0
+    while start < min(len(original), len(mutated)) and original[start] == mutated[start]:
+        start += 1
+    end = 0
+    while end < min(len(original), len(mutated)) - start and original[-1 - end] == mutated[-1 - end]:
+        end += 1
+    removed = original[start:len(original) - end]
+    added = mutated[start:len(mutated) - end]
+
+    if len(removed) == 1 and len(added) == 1:
+        for name, group in OPERATOR_GROUPS.items():
+            if removed[0] in group and added[0] in group:
+                return name
+        if _is_literal(removed[0]) and _is_literal(added[0]):
+            return "LVR"
+        if removed[0] in UNARY_OPERATORS and added[0] in UNARY_OPERATORS:
+            return "ORU"
+    if len(removed) + len(added) == 1 and (removed or added)[0] in UNARY_OPERATORS:
+        return "ORU"
+    if removed and added in (["true"], ["false"]):
+        # Condition replaced by a constant
+        return "COR"
+    return "OTHER"
+
+
+def generate_mutants_for_project(working_dir, project_id, bug_id, model="", ambiguous_lines="each", concurrency=1,
+                                 token_budget=None, telemetry=None):
     """
     Generate mutants for the entire project using the LLM mutation engine.
+
+    When the mutated code occurs on several lines of the class,
+    `ambiguous_lines` decides what to do: "each" writes one mutant per
+    occurrence, "first" only mutates the first one and "skip" drops the
+    mutation.
+
+    Up to `concurrency` class prompts are sent at the same time; a local
+    server with continuous batching (see llm/backends.py) decodes them in
+    parallel. `token_budget` enables prompt compaction in the engine and
+    `telemetry` (LLMTelemetry) receives one record per LLM request.
     """
 
     src_dir = os.path.join(working_dir, "src", "main", "java")
@@ -58,10 +317,12 @@ def generate_mutants_for_project(working_dir, project_id, bug_id, model=""):
     base_mutants_dir = os.path.join("mutants", f"{project_id}_{bug_id}")
     ensure_dir(base_mutants_dir)
 
-    engine = LLMMutationEngineWithTest(model)
+    engine = LLMMutationEngineWithTest(model, token_budget=token_budget, telemetry=telemetry)
 
     print(f"Generating mutants for: {src_dir}")
 
+    # Collect every class with a test first, so the prompts can be submitted together
+    jobs = []
     for root, _, files in os.walk(src_dir):
         for file in files:
             if not file.endswith(".java"):
@@ -71,9 +332,6 @@ def generate_mutants_for_project(working_dir, project_id, bug_id, model=""):
             rel_path = os.path.relpath(java_path, src_dir)
             rel_folder = os.path.dirname(rel_path)
 
-            target_dir = os.path.join(base_mutants_dir, rel_folder)
-            ensure_dir(target_dir)
-
             print(f"Analyzing Java file: {rel_path}")
 
             # Trova il file di test corrispondente
@@ -88,50 +346,92 @@ def generate_mutants_for_project(working_dir, project_id, bug_id, model=""):
 
             if test_file_path:
                 print(f"Found corresponding test file: {test_file_path}")
+                jobs.append((java_path, test_file_path, rel_folder, class_name))
             else:
                 print(f"No test file found for {class_name}, proceeding without it")
-
-            # Genera mutazioni passando il file di test (se trovato)
-
-            if test_file_path:
-                mutations = engine.mutate_java_file(java_path, test_file_path)
-            else:
-                mutations = None
-
-            if not mutations:
                 print("No mutations generated")
-                continue
 
-            print(f"{len(mutations)} mutations generated - saving mutants to {target_dir}")
-
-            for idx, mutation in enumerate(mutations, start=1):
+    # Genera mutazioni passando il file di test
+    results = engine.mutate_java_files([(job[0], job[1]) for job in jobs], concurrency)
+
+    for (java_path, _, rel_folder, class_name), mutations in zip(jobs, results):
+        if not mutations:
+            print(f"No mutations generated for {class_name}")
+            continue
+
+        target_dir = os.path.join(base_mutants_dir, rel_folder)
+        ensure_dir(target_dir)
+
+        print(f"{len(mutations)} mutations generated - saving mutants to {target_dir}")
+
+        source = get_source_file(java_path)
+        written = set()
+        idx = 0
+        for mutation in mutations:
+            positions = mutation.get("lines") or source.positions_of(mutation["original_code"])
+
+            # The same line of code can appear several times in a class
+            if len(positions) > 1:
+                if ambiguous_lines == "skip":
+                    print(f"Skipping ambiguous mutation on lines {positions}: {mutation['original_code']}")
+                    continue
+                if ambiguous_lines == "first":
+                    positions = positions[:1]
+
+            for line_no in positions:
+                # Identical mutations of the same line are written once
+                signature = (line_no, mutation["mutated_code"].strip())
+                if signature in written:
+                    continue
+                written.add(signature)
+
+                idx += 1
                 mutant_file = os.path.join(
                     target_dir,
                     f"{class_name}_Mutant_{idx}.java"
                 )
+                write_mutant(mutant_file, source, mutation, line_no)
+                print(f"Mutant created: {mutant_file}")
 
-                with open(java_path, "r") as original_file:
-                    content_lines = original_file.readlines()
-
-                original_line = mutation["original_code"].strip()
-                mutated_line = mutation["mutated_code"]
+    engine.backend.report()
+    print("Mutant generation completed")
 
-                new_content = []
-                for line in content_lines:
-                    if line.strip() == original_line:
-                        new_content.append(mutated_line + "\n")
-                    else:
-                        new_content.append(line)
 
-                with open(mutant_file, "w") as mf:
-                    mf.write("// MUTATION:\n")
-                    mf.write(f"// ORIGINAL: {original_line}\n")
-                    mf.write(f"// MUTATED:  {mutated_line}\n\n")
-                    mf.write("".join(new_content))
+def read_llm_results(csv_path, project_id=None, bug_id=None):
+    """
+    Read the rows of an LLM results file (see main_llm.append_result),
+    optionally only those of one project and bug.
+    """
+    if not os.path.exists(csv_path):
+        return []
+    with open(csv_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return [row for row in rows
+            if (project_id is None or row["project_id"] == project_id)
+            and (bug_id is None or row["bug_id"] == str(bug_id))]
 
-                print(f"Mutant created: {mutant_file}")
 
-    print("Mutant generation completed")
+def analyze_llm_results(csv_path, project_id=None, bug_id=None):
+    """
+    Print the result counts and the mutation score of an LLM results file.
+    Mutants that do not compile, equivalent mutants and duplicates are left
+    out of the score.
+    """
+    rows = read_llm_results(csv_path, project_id, bug_id)
+    print("=== GENERAL STATISTICS ===")
+    print(f"Total mutants: {len(rows)}")
+    counts = {}
+    for row in rows:
+        # duplicate_of:<mutant id> results are counted together
+        result = row["result"].split(":", 1)[0]
+        counts[result] = counts.get(result, 0) + 1
+    for result, count in sorted(counts.items(), key=lambda kv: -kv[1]):
+        print(f"{result}: {count} ({count / len(rows) * 100:.2f}%)")
+
+    killed = counts.get("killed", 0) + counts.get("timeout", 0)
+    valid = len(rows) - counts.get("build_failed", 0) - counts.get("equivalent", 0) - counts.get("duplicate_of", 0)
+    score = (killed / valid * 100) if valid > 0 else 0.0
+    print(f"Mutation score: {score:.1f}%\n")
 
 
 def apply_single_mutant(mutant_file, working_dir):
@@ -175,6 +475,17 @@ def apply_single_mutant(mutant_file, working_dir):
     dest_file = os.path.join(dest_dir, original_class)
     print(f"Writing mutant to: {dest_file}")
 
+    header = read_mutant_header(mutant_file)
+    if "line" in header and "source_sha1" in header and os.path.exists(dest_file):
+        source = get_source_file(dest_file)
+        if source.sha1 == header["source_sha1"]:
+            # Re-apply the single mutated line on the cached original, keeping line numbers intact
+            with open(dest_file, "w") as f:
+                f.write(source.render_mutant(header["line"], header["original_code"], header["mutated_code"]))
+            print("Mutant successfully applied")
+            return True
+        print("Original source changed since generation, copying the mutant file as is")
+
     shutil.copy(mutant_file, dest_file)
 
     print("Mutant successfully applied")
@@ -1,8 +1,10 @@
 import os
 import csv
-from collections import Counter, defaultdict
+import heapq
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from utils import run_command
-import pandas as pd
 from pathlib import Path
 
 
@@ -41,9 +43,13 @@ def set_instrument_classes(target_dir, project_path, instrument_classes_path):
     return True
 
 
-def run_defects4j_mutation(working_dir, project_path):
+def run_defects4j_mutation(working_dir, project_path, shards=1, class_weights=None):
     """
     Run Defects4J mutation testing for the given project.
+
+    With `shards` > 1 the instrumented classes are split into balanced
+    shards that run in parallel in copies of the working directory; their
+    reports are merged back into `working_dir` (see run_sharded_mutation).
     """
     # Construct the target directory path where compiled classes are
     target_dir = os.path.join(working_dir, "target", "classes", *project_path.split('.'))
@@ -54,9 +60,12 @@ def run_defects4j_mutation(working_dir, project_path):
         print(f"No classes found in {target_dir}")
         return False
 
+    if shards > 1:
+        return run_sharded_mutation(working_dir, project_path, instrument_file, shards, class_weights)
+
     # Run the defects4j mutation command
     command = f"defects4j mutation -w {working_dir} -i {instrument_file}"
-    stdout, stderr, returncode = run_command(command, cwd=working_dir)
+    stdout, stderr, returncode = run_command(command, cwd=working_dir, stage="major")
     if returncode != 0:
         print(f"Error while running Defects4J Mutation:\n{stderr}")
         return False
@@ -64,10 +73,183 @@ def run_defects4j_mutation(working_dir, project_path):
     return True
 
 
+def class_file_weights(working_dir, class_names):
+    """
+    Size in bytes of the compiled class files of each class, inner classes
+    included, as a proxy for its number of mutants.
+    """
+    classes_root = os.path.join(working_dir, "target", "classes")
+    weights = {}
+    for class_name in class_names:
+        class_dir = os.path.join(classes_root, *class_name.split(".")[:-1])
+        simple_name = class_name.split(".")[-1]
+        size = 0
+        if os.path.isdir(class_dir):
+            for f in os.listdir(class_dir):
+                if f == f"{simple_name}.class" or (f.startswith(f"{simple_name}$") and f.endswith(".class")):
+                    size += os.path.getsize(os.path.join(class_dir, f))
+        weights[class_name] = size
+    return weights
+
+
+def partition_classes(class_names, weights, shards):
+    """
+    Split classes into at most `shards` groups of similar total weight
+    (longest processing time first: heaviest class to the lightest shard).
+    """
+    heap = [(0, i, []) for i in range(min(shards, len(class_names)))]
+    for class_name in sorted(class_names, key=lambda c: (-weights.get(c, 0), c)):
+        load, i, members = heapq.heappop(heap)
+        members.append(class_name)
+        # Unknown classes still count one unit so they spread across shards
+        heapq.heappush(heap, (load + max(weights.get(class_name, 0), 1), i, members))
+    return [sorted(members) for _, _, members in sorted(heap, key=lambda entry: entry[1]) if members]
+
+
+def run_sharded_mutation(working_dir, project_path, instrument_file, shards, class_weights=None):
+    """
+    Run Major on balanced shards of the instrumented classes in parallel.
+
+    Each shard runs `defects4j mutation` in its own copy of the working
+    directory. Weights are historical mutant counts when given
+    (`class_weights`), class-file sizes otherwise. The reports are then
+    merged into `working_dir` with mutant ids renumbered, so
+    analyze_defects4j_report reads them unchanged.
+    """
+    with open(instrument_file) as f:
+        class_names = [line.strip() for line in f if line.strip()]
+
+    weights = class_file_weights(working_dir, class_names)
+    if class_weights:
+        weights.update({c: class_weights[c] for c in class_names if c in class_weights})
+    groups = partition_classes(class_names, weights, shards)
+
+    shard_dirs = []
+    for i, group in enumerate(groups):
+        shard_dir = f"{working_dir.rstrip(os.sep)}_shard{i}"
+        if os.path.exists(shard_dir):
+            shutil.rmtree(shard_dir)
+        shutil.copytree(working_dir, shard_dir, symlinks=True)
+        with open(os.path.join(shard_dir, "instrument_classes"), "w") as f:
+            f.write("\n".join(group) + "\n")
+        shard_dirs.append(shard_dir)
+        print(f"Major shard {i}: {len(group)} classes, weight {sum(weights.get(c, 0) for c in group)}")
+
+    def run_shard(shard_dir):
+        command = f"defects4j mutation -w {shard_dir} -i {os.path.join(shard_dir, 'instrument_classes')}"
+        return run_command(command, cwd=shard_dir, stage="major")
+
+    with ThreadPoolExecutor(max_workers=len(shard_dirs)) as executor:
+        outcomes = list(executor.map(run_shard, shard_dirs))
+
+    failed = [(d, stderr) for d, (_, stderr, returncode) in zip(shard_dirs, outcomes) if returncode != 0]
+    for shard_dir, stderr in failed:
+        print(f"Error while running Defects4J Mutation in {shard_dir}:\n{stderr}")
+
+    if not failed:
+        merge_major_reports(shard_dirs, working_dir)
+
+    for shard_dir in shard_dirs:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    return not failed
+
+
+def _read_csv(path):
+    """Header and rows of a Major CSV report (empty if missing)."""
+    if not os.path.exists(path):
+        return None, []
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        return header, [row for row in reader if row]
+
+
+def merge_major_reports(shard_dirs, working_dir):
+    """
+    Merge the Major reports of several shards into `working_dir`.
+
+    Mutant ids of each shard are shifted past the previous shards; tests
+    are matched by name across shards and numbered in order of appearance.
+    kill.csv, mutants.log, testMap.csv, covMap.csv, killMap.csv and
+    summary.csv are rewritten.
+    """
+    offset = 0
+    test_numbers = {}
+    kill_rows, log_lines, cov_rows, kill_map_rows = [], [], [], []
+    summary_header, summary_totals = None, None
+    headers = {}
+
+    for shard_dir in shard_dirs:
+        # Map this shard's test numbers to merged numbers by test name
+        header, rows = _read_csv(os.path.join(shard_dir, "testMap.csv"))
+        headers.setdefault("testMap.csv", header)
+        local_tests = {}
+        for row in rows:
+            if len(row) >= 2:
+                local_tests[row[0]] = test_numbers.setdefault(row[1], str(len(test_numbers) + 1))
+
+        max_id = 0
+        with open(os.path.join(shard_dir, "mutants.log")) as f:
+            for line in f:
+                mutant_id, sep, rest = line.rstrip("\n").partition(":")
+                if not mutant_id.isdigit():
+                    continue
+                max_id = max(max_id, int(mutant_id))
+                log_lines.append(f"{int(mutant_id) + offset}{sep}{rest}")
+
+        def shift(mutant_id):
+            return str(int(mutant_id) + offset)
+
+        header, rows = _read_csv(os.path.join(shard_dir, "kill.csv"))
+        headers.setdefault("kill.csv", header)
+        for row in rows:
+            if row[0].strip().isdigit():
+                max_id = max(max_id, int(row[0]))
+                kill_rows.append([shift(row[0])] + row[1:])
+
+        for name, target in (("covMap.csv", cov_rows), ("killMap.csv", kill_map_rows)):
+            header, rows = _read_csv(os.path.join(shard_dir, name))
+            headers.setdefault(name, header)
+            for row in rows:
+                if len(row) >= 2 and row[0].isdigit():
+                    target.append([local_tests.get(row[0], row[0]), shift(row[1])] + row[2:])
+
+        header, rows = _read_csv(os.path.join(shard_dir, "summary.csv"))
+        if header and rows:
+            summary_header = header
+            values = [float(v) for v in rows[0]]
+            summary_totals = values if summary_totals is None else [a + b for a, b in zip(summary_totals, values)]
+
+        offset += max_id
+
+    def write(name, rows):
+        with open(os.path.join(working_dir, name), "w", newline='') as f:
+            writer = csv.writer(f)
+            if headers.get(name):
+                writer.writerow(headers[name])
+            writer.writerows(rows)
+
+    write("kill.csv", kill_rows)
+    write("testMap.csv", [[number, name] for name, number in test_numbers.items()])
+    write("covMap.csv", cov_rows)
+    write("killMap.csv", kill_map_rows)
+    with open(os.path.join(working_dir, "mutants.log"), "w") as f:
+        f.write("\n".join(log_lines) + ("\n" if log_lines else ""))
+    if summary_header:
+        with open(os.path.join(working_dir, "summary.csv"), "w", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(summary_header)
+            writer.writerow([int(v) if v.is_integer() else round(v, 3) for v in summary_totals])
+
+    print(f"Merged {len(shard_dirs)} Major shards: {offset} mutants, {len(test_numbers)} tests")
+
+
 def analyze_defects4j_report(csv_path, mutants_log_path):
     """
     Analyze the Defects4J mutation report and generate statistics.
     """
+    import pandas as pd
+
     # --- 1. Read CSV results ---
     mutants = []
     print("=== Defects4J mutation results ===")
@@ -177,12 +359,11 @@ def analyze_defects4j_report(csv_path, mutants_log_path):
 
     # --- 8. Calculate mutation score ---
     counts = Counter(df["Status"])
+    # TIME is mapped to TIMED_OUT above and counted once, with the kills
     killed = counts.get("KILLED", 0) + counts.get("ERROR", 0) + counts.get("TIMED_OUT", 0)
-    time_out = counts.get("TIME_OUT", 0)
     no_coverage = counts.get("NO_COVERAGE", 0)
 
     mutants_covered = total_mutants - no_coverage
-    killed += time_out
     mutation_score_covered = (killed / mutants_covered * 100) if mutants_covered > 0 else 0.0
     mutation_score_total = (killed / total_mutants * 100) if total_mutants > 0 else 0.0
 
@@ -193,58 +374,30 @@ def analyze_defects4j_report(csv_path, mutants_log_path):
 def export_pit_like(df, csv_path):
     """
     Export a CSV file in PIT mutation testing style.
-    Automatically loads testMap.csv and covMap.csv from the same folder.
+    Automatically loads testMap.csv, covMap.csv and killMap.csv from the same
+    folder, through the sparse KillMatrix, and writes one row per covering
+    test of each mutant ("none" if uncovered) as it goes.
     """
+    from modules.kill_matrix import KillMatrix
+
     base_dir = os.path.dirname(csv_path)
-    test_map_path = os.path.join(base_dir, "testMap.csv")
-    cov_map_path  = os.path.join(base_dir, "covMap.csv")
-
-    # 1. Load testMap.csv
-    test_names = {}
-    if os.path.exists(test_map_path):
-        with open(test_map_path, newline='') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                if len(row) >= 2:
-                    test_no, test_name = row[:2]
-                    test_names[test_no] = test_name
-
-    # 2. Load covMap.csv
-    mutant_tests = defaultdict(set)
-    if os.path.exists(cov_map_path):
-        with open(cov_map_path, newline='') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                if len(row) >= 2:
-                    test_no, mutant_no = row[:2]
-                    mutant_tests[mutant_no].add(test_no)
-
-    # 3. Aggregate DataFrame by mutant, line, mutator, and status
-    grouped = df.groupby(["ID", "Class", "Mutator", "Method", "Line", "Status"], dropna=False)
-    rows = []
-
-    for (mutant_id, class_name, mutator, method, line, status), group in grouped:
-        class_name = class_name or "UnknownClass"
-        file_name = class_name.split(".")[-1] + ".java"
-        mutator = mutator or "UnknownMutator"
-        method = method or "unknown"
-        line = line or "?"
-        status = status
-
-        test_list = mutant_tests.get(str(mutant_id), set())
-        if not test_list:
-            test_list = {"none"}
-
-        for t in sorted(test_list):
-            rows.append([file_name, class_name, mutator, method, line, status, test_names.get(t, t)])
-
-    # 4. Write CSV
+    matrix = KillMatrix.from_major(base_dir)
+
     out_path = os.path.join(base_dir, "mutants_major.csv")
     with open(out_path, "w", newline='') as f:
         writer = csv.writer(f)
         writer.writerow(["File", "Class", "Mutator", "Method", "Line", "Status", "Test"])
-        writer.writerows(rows)
+        columns = ["ID", "Class", "Mutator", "Method", "Line", "Status"]
+        for mutant_id, class_name, mutator, method, line, status in df[columns].drop_duplicates().itertuples(
+                index=False, name=None):
+            class_name = class_name or "UnknownClass"
+            file_name = class_name.split(".")[-1] + ".java"
+            mutator = mutator or "UnknownMutator"
+            method = method or "unknown"
+            line = line or "?"
+
+            tests = matrix.tests_covering(mutant_id) if str(mutant_id) in matrix.mutant_index else []
+            for test in tests or ["none"]:
+                writer.writerow([file_name, class_name, mutator, method, line, status, test])
 
     print(f"PIT-style CSV created: {out_path}")
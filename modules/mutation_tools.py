@@ -0,0 +1,347 @@
+import csv
+import os
+import shutil
+from environment.config import RESULTS_FOLDER
+from modules.checkout_cache import fresh_checkout
+from modules.defects4j_module import defects4j_compile
+
+# CSV defining the projects to analyze
+PROJECTS_CSV = "environment/projects.csv"
+
+# Saved test x mutant matrices, one folder per tool and project (see modules/kill_matrix.py)
+KILL_MATRIX_FOLDER = os.path.join(RESULTS_FOLDER, "kill_matrix")
+
+# Parallel Major processes, each on its own share of the classes (1 = single run). Each shard copies
+# the working directory and runs the test suite on its own, so sharding is opt-in, e.g. set it to
+# (os.cpu_count() or 2) // 2 or pass `cli.py run major --shards N`
+MAJOR_SHARDS = 1
+
+# Models evaluated by the LLM tool and main_llm.main()
+LLM_MODELS = ['openai/gpt-5.1-chat']#'mistralai/codestral-2508']#'mistralai/devstral-medium']#'anthropic/claude-opus-4.5']#'amazon/nova-pro-v1']#'openai/gpt-5.1-codex-max']#'anthropic/claude-opus-4.5']#'meta-llama/llama-4-maverick']
+
+# Normalized mutant outcomes used to compare tools
+OUTCOME_KILLED = "killed"
+OUTCOME_SURVIVED = "survived"
+OUTCOME_UNCOVERED = "uncovered"
+OUTCOME_INVALID = "invalid"
+OUTCOME_EQUIVALENT = "equivalent"
+OUTCOME_DUPLICATE = "duplicate"
+
+PIT_OUTCOMES = {
+    "KILLED": OUTCOME_KILLED,
+    "TIMED_OUT": OUTCOME_KILLED,
+    "MEMORY_ERROR": OUTCOME_KILLED,
+    "RUN_ERROR": OUTCOME_KILLED,
+    "SURVIVED": OUTCOME_SURVIVED,
+    "NO_COVERAGE": OUTCOME_UNCOVERED,
+    "NON_VIABLE": OUTCOME_INVALID,
+}
+MAJOR_OUTCOMES = {
+    "FAIL": OUTCOME_KILLED,
+    "TIME": OUTCOME_KILLED,
+    "EXC": OUTCOME_KILLED,
+    "LIVE": OUTCOME_SURVIVED,
+    "UNCOV": OUTCOME_UNCOVERED,
+}
+LLM_OUTCOMES = {
+    "killed": OUTCOME_KILLED,
+    "timeout": OUTCOME_KILLED,
+    "survived": OUTCOME_SURVIVED,
+    "build_failed": OUTCOME_INVALID,
+    "equivalent": OUTCOME_EQUIVALENT,
+    "duplicate_of": OUTCOME_DUPLICATE,
+}
+
+
+def read_projects(projects_csv=PROJECTS_CSV, project_id=None):
+    """Rows of the projects CSV, optionally only those of one project."""
+    with open(projects_csv, newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    return [row for row in rows if project_id is None or row["project_id"].lower() == project_id.lower()]
+
+
+def model_results_dir(model):
+    """Folder of the results of an LLM model, one per full slug, e.g. RESULTS_FOLDER/openai/gpt-5.1-chat."""
+    return os.path.join(RESULTS_FOLDER, *model.split("/"))
+
+
+def project_version(project):
+    """File name prefix of the reports of one bug of a project, e.g. "lang_1"."""
+    return f"{project['project_id'].lower()}_{project['bug_id']}"
+
+
+def project_working_dir(project):
+    """Working directory of a project row of the projects CSV."""
+    return f"/tmp/{project['project_id'].lower()}_{project['bug_id']}_{project['fixed_version']}"
+
+
+def prepare_working_dir(project):
+    """Fresh Defects4J checkout of a project, compiled. Returns the directory or None."""
+    working_dir = project_working_dir(project)
+
+    # Fresh copy of the version, from the checkout cache
+    if not fresh_checkout(project["project_id"], project["bug_id"], project["fixed_version"], working_dir):
+        print("Checkout failed. Skipping project.")
+        return None
+
+    if not defects4j_compile(working_dir):
+        print("Compilation failed. Skipping project.")
+        return None
+
+    return working_dir
+
+
+class MutationTool:
+    """
+    Common interface of the mutation tools compared by this project.
+
+    A tool runs on a checked out and compiled project, leaves its report in
+    RESULTS_FOLDER, prints statistics on a report and reads the outcome of
+    every mutant of a project in normalized form (OUTCOME_*), so that the
+    tools can be run together and compared. Subclasses import their heavy
+    modules inside the methods, so that only the tools actually used pay
+    for them.
+    """
+
+    name = ""
+
+    def run(self, project, working_dir):
+        """Mutate and test a compiled project. Returns True on success."""
+        raise NotImplementedError
+
+    def report_path(self, project):
+        """Report of the tool for a project version (bug) in RESULTS_FOLDER."""
+        raise NotImplementedError
+
+    def analyze(self, path, project=None):
+        """Print the statistics of a report."""
+        raise NotImplementedError
+
+    def outcomes(self, project):
+        """Normalized outcome of every mutant of a project (empty without report)."""
+        raise NotImplementedError
+
+    def kill_matrix_path(self, project):
+        """Folder of the saved KillMatrix of a project version."""
+        return os.path.join(KILL_MATRIX_FOLDER, f"{project_version(project)}_{self.name}")
+
+    def build_kill_matrix(self, path):
+        """KillMatrix of a report (None if the tool has no test-level data)."""
+        return None
+
+    def kill_matrix(self, project):
+        """Saved KillMatrix of a project, memory-mapped, or None."""
+        from modules.kill_matrix import KillMatrix, NAMES_FILE
+        folder = self.kill_matrix_path(project)
+        if not os.path.exists(os.path.join(folder, NAMES_FILE)):
+            return None
+        return KillMatrix.load(folder)
+
+
+class PitTool(MutationTool):
+    """PIT through Maven, with history files per project version."""
+
+    name = "pit"
+
+    def run(self, project, working_dir):
+        from modules.pit_test_module import run_pit, analyze_pitest_report, pit_history_file
+        from modules.test_prioritization import KillHistory
+        from utils import copy_mutation_report
+
+        print(f"\n=== PIT Mutation Testing ===")
+        # Run PIT mutation testing, reusing the history of this version (or of the nearest one)
+        if not run_pit(working_dir, project["project_path"], project.get("test_dir"),
+                       pit_history_file(project["project_id"], project["bug_id"])):
+            print("PIT execution failed. Skipping project.")
+            return False
+
+        # Copy and analyze the PIT report
+        report_path = self.report_path(project)
+        copy_mutation_report(working_dir, report_path, True)
+        analyze_pitest_report(report_path)
+
+        # Learn which tests kill mutants of this project
+        kill_history = KillHistory(project["project_id"], RESULTS_FOLDER)
+        kill_history.ingest_pit(report_path)
+        kill_history.save()
+
+        self.build_kill_matrix(report_path).save(self.kill_matrix_path(project))
+        return True
+
+    def report_path(self, project):
+        return os.path.join(RESULTS_FOLDER, f"{project_version(project)}_pit_mutations.csv")
+
+    def analyze(self, path, project=None):
+        from modules.pit_test_module import analyze_pitest_report
+        analyze_pitest_report(path)
+
+    def build_kill_matrix(self, path):
+        from modules.kill_matrix import KillMatrix
+        return KillMatrix.from_pit(path)
+
+    def outcomes(self, project):
+        report_path = self.report_path(project)
+        if not os.path.exists(report_path):
+            return []
+        with open(report_path, newline='') as f:
+            return [PIT_OUTCOMES.get(row[5], OUTCOME_INVALID) for row in csv.reader(f)
+                    if len(row) >= 6 and row[0] != "File"]
+
+
+class MajorTool(MutationTool):
+    """Major through `defects4j mutation`, optionally sharded."""
+
+    name = "major"
+
+    def __init__(self, shards=MAJOR_SHARDS):
+        self.shards = shards
+
+    def run(self, project, working_dir):
+        from modules.major_test_module import run_defects4j_mutation, analyze_defects4j_report
+        from modules.test_prioritization import KillHistory
+        from utils import copy_mutation_report
+
+        print(f"\n=== MAJOR Mutation Testing ===")
+        kill_history = KillHistory(project["project_id"], RESULTS_FOLDER)
+        # Run MAJOR mutation testing
+        if not run_defects4j_mutation(working_dir, project["project_path"], shards=self.shards,
+                                      class_weights=kill_history.mutant_counts()):
+            print("MAJOR execution failed. Skipping project.")
+            return False
+
+        # Analyze MAJOR report
+        kill_csv = os.path.join(working_dir, "kill.csv")
+        analyze_defects4j_report(kill_csv, os.path.join(working_dir, "mutants.log"))
+        kill_history.ingest_major(working_dir)
+        kill_history.save()
+
+        # Copy MAJOR report, and kill.csv which keeps one row per mutant
+        copy_mutation_report(working_dir, self.report_path(project), False)
+        if os.path.exists(kill_csv):
+            shutil.copy(kill_csv, self.kill_csv_path(project))
+        self.build_kill_matrix(working_dir).save(self.kill_matrix_path(project))
+        return True
+
+    def report_path(self, project):
+        return os.path.join(RESULTS_FOLDER, f"{project_version(project)}_major_mutations.csv")
+
+    def kill_csv_path(self, project):
+        return os.path.join(RESULTS_FOLDER, f"{project_version(project)}_major_kill.csv")
+
+    def analyze(self, path, project=None):
+        """`path` is a Major working directory or its kill.csv."""
+        from modules.major_test_module import analyze_defects4j_report
+        if os.path.isdir(path):
+            path = os.path.join(path, "kill.csv")
+        analyze_defects4j_report(path, os.path.join(os.path.dirname(path), "mutants.log"))
+
+    def build_kill_matrix(self, path):
+        """`path` is a Major working directory or its kill.csv."""
+        from modules.kill_matrix import KillMatrix
+        return KillMatrix.from_major(path if os.path.isdir(path) else os.path.dirname(path))
+
+    def outcomes(self, project):
+        kill_csv = self.kill_csv_path(project)
+        if not os.path.exists(kill_csv):
+            return []
+        with open(kill_csv, newline='') as f:
+            return [MAJOR_OUTCOMES.get(row[1].strip(), OUTCOME_INVALID) for row in csv.reader(f)
+                    if len(row) >= 2 and row[0].isdigit()]
+
+
+class LLMTool(MutationTool):
+    """LLM-generated mutants tested one by one with Defects4J (see main_llm)."""
+
+    name = "llm"
+
+    def __init__(self, models=None, queue=None):
+        """
+        Args:
+            models (list): Models to run, LLM_MODELS by default.
+            queue (str): Shared job queue file; mutants are then evaluated
+                by `cli.py worker` processes (see main_llm.EVALUATION_QUEUE).
+        """
+        self.models = models
+        self.queue = queue
+
+    def model_names(self):
+        return self.models or LLM_MODELS
+
+    def run(self, project, working_dir):
+        from main_llm import EVALUATION_QUEUE, RESULT_CACHE_FILE, run_llm_model
+        from llm.telemetry import LLMTelemetry
+        from modules.result_cache import ResultCache
+
+        telemetry = LLMTelemetry()
+        result_cache = ResultCache(os.path.join(RESULTS_FOLDER, RESULT_CACHE_FILE))
+        try:
+            for model in self.model_names():
+                print(f"\n=== LLM Mutation Testing ({model}) ===")
+                if not run_llm_model(project["project_id"], project["bug_id"], project["fixed_version"],
+                                     working_dir, model, telemetry, result_cache, self.queue or EVALUATION_QUEUE):
+                    return False
+        finally:
+            result_cache.close()
+        return True
+
+    def report_path(self, project=None, model=None):
+        from main_llm import RESULTS_FILE
+        model = model or self.model_names()[0]
+        return os.path.join(model_results_dir(model), RESULTS_FILE)
+
+    def analyze(self, path, project=None):
+        from modules.llm_test_module import analyze_llm_results
+        if project is None:
+            analyze_llm_results(path)
+        else:
+            analyze_llm_results(path, project["project_id"], project["bug_id"])
+
+    def outcomes(self, project):
+        from modules.llm_test_module import read_llm_results
+        outcomes = []
+        for model in self.model_names():
+            rows = read_llm_results(self.report_path(project, model), project["project_id"], project["bug_id"])
+            outcomes += [LLM_OUTCOMES.get(row["result"].split(":", 1)[0], OUTCOME_INVALID) for row in rows]
+        return outcomes
+
+
+TOOLS = {"pit": PitTool, "major": MajorTool, "llm": LLMTool}
+
+
+def get_tool(name, **options):
+    """Instantiate a tool by name ("pit", "major" or "llm")."""
+    if name not in TOOLS:
+        raise ValueError(f"Unknown mutation tool: {name}")
+    return TOOLS[name](**options)
+
+
+def run_tools(tools, projects):
+    """
+    Check out and compile every project once, then run the tools on it in
+    order; a failing tool skips the remaining ones for that project.
+    """
+    os.makedirs(RESULTS_FOLDER, exist_ok=True)
+    for project in projects:
+        print(f"\n=== Processing {project['project_id']} bug {project['bug_id']} ===")
+        working_dir = prepare_working_dir(project)
+        if working_dir is None:
+            continue
+
+        for tool in tools:
+            if not tool.run(project, working_dir):
+                break
+        else:
+            print(f"Mutation testing completed for {project['project_id']} bug {project['bug_id']}")
+
+
+def score(outcomes):
+    """
+    Mutant counts per outcome and mutation score (killed over killed plus
+    survived, in percent; None without covered mutants).
+    """
+    counts = {outcome: outcomes.count(outcome)
+              for outcome in (OUTCOME_KILLED, OUTCOME_SURVIVED, OUTCOME_UNCOVERED, OUTCOME_INVALID,
+                              OUTCOME_EQUIVALENT, OUTCOME_DUPLICATE)}
+    covered = counts[OUTCOME_KILLED] + counts[OUTCOME_SURVIVED]
+    counts["score"] = counts[OUTCOME_KILLED] / covered * 100 if covered else None
+    return counts
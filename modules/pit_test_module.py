@@ -1,8 +1,57 @@
+import os
+import shutil
 from utils import run_command
-from environment.config import JAVA_HOME_11_PATH
-import pandas as pd
+from environment.config import JAVA_HOME_11_PATH, RESULTS_FOLDER
 
-def run_pit(working_dir, project_path, test_dir=None):
+# PIT history files, one per (project, bug), reused by later runs
+PIT_HISTORY_FOLDER = os.path.join(RESULTS_FOLDER, "pit_history")
+
+# Local Maven repository shared by every PIT run; once PIT has resolved its
+# plugins and the project dependencies into it, Maven runs offline
+MAVEN_REPO_LOCAL = os.environ.get("PIT_MAVEN_REPO", os.path.join(RESULTS_FOLDER, "m2_repository"))
+MAVEN_RESOLVED_MARKER = ".pit_resolved"
+
+# Analysis threads used by PIT (one per core)
+PIT_THREADS = os.cpu_count() or 1
+
+
+def pit_history_file(project_id, bug_id, folder=PIT_HISTORY_FOLDER):
+    """
+    Path of the PIT history file of a project version.
+
+    When the version has no history yet, the history of the nearest bug of
+    the same project is copied as a starting point: PIT keys its history by
+    class and test hashes, so the classes that did not change between the
+    two versions are not analysed again.
+
+    Args:
+        project_id (str): Defects4J project id.
+        bug_id (str): Bug id of the version.
+        folder (str): Folder holding the history files.
+
+    Returns:
+        str: Path of the history file (possibly not existing yet).
+    """
+    os.makedirs(folder, exist_ok=True)
+    prefix = f"{project_id.lower()}_"
+    history_file = os.path.join(folder, f"{prefix}{bug_id}.bin")
+    if os.path.exists(history_file) or not str(bug_id).isdigit():
+        return history_file
+
+    neighbours = []
+    for name in os.listdir(folder):
+        other = name[len(prefix):-len(".bin")]
+        if name.startswith(prefix) and name.endswith(".bin") and other.isdigit():
+            neighbours.append((abs(int(other) - int(bug_id)), int(other), name))
+    if neighbours:
+        _, _, nearest = min(neighbours)
+        shutil.copy(os.path.join(folder, nearest), history_file)
+        print(f"PIT history seeded from {nearest}")
+    return history_file
+
+
+def run_pit(working_dir, project_path, test_dir=None, history_file=None, threads=PIT_THREADS,
+            maven_repo=MAVEN_REPO_LOCAL):
     """
     Run PIT mutation testing on a given project using Maven.
 
@@ -10,30 +59,55 @@ def run_pit(working_dir, project_path, test_dir=None):
         working_dir (str): Project root directory.
         project_path (str): Fully-qualified package name to target.
         test_dir (str, optional): Optional directory for test classes.
+        history_file (str, optional): PIT history file, read if present and
+            rewritten after the run (see pit_history_file).
+        threads (int): Number of PIT analysis threads.
+        maven_repo (str, optional): Local Maven repository; Maven runs
+            offline once it has been populated by a successful run.
 
     Returns:
         bool: True if PIT ran successfully, False otherwise.
     """
+    # Maven runs in the working directory: relative paths must be resolved first
+    history_file = os.path.abspath(history_file) if history_file else None
+    maven_repo = os.path.abspath(maven_repo) if maven_repo else None
+    offline = bool(maven_repo) and os.path.exists(os.path.join(maven_repo, MAVEN_RESOLVED_MARKER))
+
     # Construct the PIT Maven command
     pit_command = (
-        f'JAVA_HOME=$({JAVA_HOME_11_PATH}) '
-        f'mvn org.pitest:pitest-maven:mutationCoverage '
+        f'JAVA_HOME="{JAVA_HOME_11_PATH}" '
+        f'mvn {"-o " if offline else ""}'
+        f'{f"-Dmaven.repo.local={maven_repo} " if maven_repo else ""}'
+        f'org.pitest:pitest-maven:mutationCoverage '
         f'-DtargetClasses="{project_path}.*" '
         f'-DtargetTests="{project_path}.*Test" '
+        f'-Dthreads={threads} '
         f'-DoutputFormats=CSV '  # Export results as CSV
         f'-DexportLineCoverage=true '  # Include line coverage info
+        f'{f"-DhistoryInputFile={history_file} " if history_file and os.path.exists(history_file) else ""}'
+        f'{f"-DhistoryOutputFile={history_file} " if history_file else ""}'
         f'{f"-DtestClassesDirectory={test_dir} " if test_dir else ""}'  # Optional test dir
         f'{f"-DadditionalClasspathElements={test_dir} " if test_dir else ""}'  # Optional classpath
     )
 
     # Execute the command in the working directory
-    stdout, stderr, returncode = run_command(pit_command, cwd=working_dir)
+    stdout, stderr, returncode = run_command(pit_command, cwd=working_dir, stage="pit")
+
+    if returncode != 0 and offline and "offline" in (stdout + stderr).lower():
+        # An artifact is missing from the local repository: resolve it once online
+        print("PIT: artifact missing from the offline repository, retrying online")
+        stdout, stderr, returncode = run_command(pit_command.replace("mvn -o ", "mvn ", 1), cwd=working_dir,
+                                                 stage="pit")
 
     if returncode != 0:
         # Log error if PIT execution fails
         print(f"Error running PIT: {stderr}")
         return False
 
+    if maven_repo and not offline:
+        os.makedirs(maven_repo, exist_ok=True)
+        open(os.path.join(maven_repo, MAVEN_RESOLVED_MARKER), "w").close()
+
     print("PIT executed successfully")
     return True
 
@@ -45,6 +119,8 @@ def analyze_pitest_report(csv_path):
     Args:
         csv_path (str): Path to the PIT CSV report.
     """
+    import pandas as pd
+
     # Read CSV without header and assign column names
     columns = ["File", "Class", "Mutator", "Method", "Line", "Status", "Test"]
     df = pd.read_csv(csv_path, names=columns)
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+import time
+from llm.java_lexer import normalize_code_line
+from modules.defects4j_module import defects4j_export
+from modules.llm_test_module import read_mutant_header
+
+# Results worth reusing; timeouts depend on machine load and are re-run, and
+# duplicates depend on which mutants were evaluated before
+CACHEABLE_RESULTS = ("killed", "survived", "build_failed", "equivalent")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    project_id    TEXT NOT NULL,
+    bug_id        TEXT NOT NULL,
+    source_sha1   TEXT NOT NULL,
+    mutant_sha1   TEXT NOT NULL,
+    suite_sha1    TEXT NOT NULL,
+    mode          TEXT NOT NULL,
+    result        TEXT NOT NULL,
+    killing_tests TEXT NOT NULL,
+    created       REAL NOT NULL,
+    PRIMARY KEY (project_id, bug_id, source_sha1, mutant_sha1, suite_sha1, mode)
+)
+"""
+
+
+def _sha1_file(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def test_suite_hash(working_dir):
+    """
+    Hash of the test sources of a checked out project (relative paths and
+    contents), so any change to the tests invalidates cached results.
+    """
+    test_dir = (defects4j_export(working_dir, "dir.src.tests") or "").strip()
+    candidates = [test_dir] if test_dir else []
+    candidates += [os.path.join("src", "test", "java"), os.path.join("src", "test")]
+
+    digest = hashlib.sha1()
+    for candidate in candidates:
+        root = os.path.join(working_dir, candidate)
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, files in os.walk(root):
+            dirnames.sort()
+            for name in sorted(files):
+                path = os.path.join(dirpath, name)
+                digest.update(os.path.relpath(path, root).encode("utf-8") + b"\0")
+                digest.update(_sha1_file(path).encode("ascii"))
+        break
+    return digest.hexdigest()
+
+
+def original_class_path(working_dir, mutant_file):
+    """Path of the class a mutant file replaces (same layout as apply_single_mutant)."""
+    parts = mutant_file.split("mutants" + os.sep, 1)[1].split(os.sep)
+    rel_package_path = os.path.join(*parts[1:-1]) if len(parts) > 2 else ""
+    src_dir = os.path.join(working_dir, "src", "main", "java")
+    if not os.path.exists(src_dir):
+        src_dir = os.path.join(working_dir, "src", "java")
+    class_name = os.path.basename(mutant_file).split("_Mutant_")[0]
+    return os.path.join(src_dir, rel_package_path, f"{class_name}.java")
+
+
+def mutant_hash(mutant_file, source_sha1):
+    """
+    Hash of the change a mutant makes: line and normalized code when the
+    mutant was generated from this exact original, the full mutant body
+    otherwise.
+    """
+    header = read_mutant_header(mutant_file)
+    if "line" in header and header.get("source_sha1") == source_sha1:
+        change = f"{header['line']}\0{normalize_code_line(header['original_code'])}\0" \
+                 f"{normalize_code_line(header['mutated_code'])}"
+        return hashlib.sha1(change.encode("utf-8")).hexdigest()
+
+    with open(mutant_file, "r") as f:
+        lines = f.readlines()
+    # Skip the header comment block written by write_mutant
+    start = 0
+    while start < len(lines) and lines[start].startswith("//"):
+        start += 1
+    return hashlib.sha1("".join(lines[start:]).encode("utf-8")).hexdigest()
+
+
+def mutant_cache_key(project_id, bug_id, working_dir, mutant_file, suite_sha1, mode):
+    """
+    Cache key of a mutant, computed on a pristine checkout. Returns None
+    when the original class cannot be found.
+    """
+    class_path = original_class_path(working_dir, mutant_file)
+    if not os.path.exists(class_path):
+        return None
+    source_sha1 = _sha1_file(class_path)
+    return (project_id, str(bug_id), source_sha1, mutant_hash(mutant_file, source_sha1), suite_sha1, mode)
+
+
+class ResultCache:
+    """
+    Persistent memo of mutant results in SQLite, keyed by (project, bug,
+    original file hash, mutant change hash, test-suite hash, evaluation
+    mode: test mode, TCE, schemata, see main_llm.evaluation_mode).
+    A change to any of them yields a different key, so stale results are
+    never returned.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (result, killing tests) for a key, or None."""
+        if key is None:
+            self.misses += 1
+            return None
+        row = self.connection.execute(
+            "SELECT result, killing_tests FROM results WHERE project_id=? AND bug_id=? AND source_sha1=? "
+            "AND mutant_sha1=? AND suite_sha1=? AND mode=?", key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], row[1].split() if row[1] else []
+
+    def put(self, key, result, killing_tests=()):
+        """Store a result; results that are not reproducible are ignored."""
+        if key is None or result not in CACHEABLE_RESULTS:
+            return
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*key, result, " ".join(killing_tests), time.time()))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,123 @@
+import math
+import random
+from statistics import NormalDist
+
+# Outcomes entering the mutation score; the others (build failures,
+# equivalent and duplicate mutants, errors) are sampled but not scored
+SCORED_OUTCOMES = {"killed": True, "timeout": True, "survived": False}
+
+# Scored mutants before the interval is trusted to stop, whatever its width
+MIN_SCORED = 30
+
+
+def sampling_order(items, stratum=None, seed=0):
+    """
+    Random evaluation order of `items`, stratified when `stratum(item)`
+    gives the stratum (class, mutator...) of an item.
+
+    Each stratum is shuffled and its items spread evenly over the order,
+    so that every prefix holds about the same share of each stratum as the
+    whole population: stopping after any number of mutants yields a
+    proportionally stratified sample.
+
+    Args:
+        items (list): Mutants to order.
+        stratum (callable): Stratum of an item; None for simple random order.
+        seed (int): Seed of the shuffle.
+
+    Returns:
+        list: The items in evaluation order.
+    """
+    rng = random.Random(seed)
+    if stratum is None:
+        order = list(items)
+        rng.shuffle(order)
+        return order
+
+    strata = {}
+    for item in items:
+        strata.setdefault(stratum(item), []).append(item)
+    positions = []
+    for members in strata.values():
+        rng.shuffle(members)
+        # Item i of a stratum of n items lands at a random point of the i-th n-th of the order
+        positions += [((i + rng.random()) / len(members), rng.random(), item) for i, item in enumerate(members)]
+    positions.sort(key=lambda position: position[:2])
+    return [item for _, _, item in positions]
+
+
+def wilson_interval(successes, n, confidence=0.95, population=None):
+    """
+    Wilson score interval of a proportion, with the finite population
+    correction when the sample is drawn without replacement from
+    `population` items.
+
+    Returns:
+        tuple: (low, high) as proportions; (0.0, 1.0) without samples.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    if population and population > 1:
+        z *= math.sqrt(max(population - n, 0) / (population - 1))
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half_width = z / (1 + z * z / n) * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class SequentialEstimate:
+    """
+    Mutation score estimated from mutants evaluated in sampling order,
+    stopping once its confidence interval is narrow enough.
+
+    Outcomes are added as they come; done() turns True when at least
+    MIN_SCORED mutants were scored and the half-width of the Wilson
+    interval (with finite population correction) is at most
+    `target_half_width`, e.g. 0.02 for a score to +/-2%.
+    """
+
+    def __init__(self, population, target_half_width, confidence=0.95, min_scored=MIN_SCORED):
+        self.population = population
+        self.target_half_width = target_half_width
+        self.confidence = confidence
+        self.min_scored = min_scored
+        self.sampled = 0
+        self.scored = 0
+        self.killed = 0
+
+    def add(self, result):
+        """Count the result of one sampled mutant (as written to the results CSV)."""
+        self.sampled += 1
+        if result in SCORED_OUTCOMES:
+            self.scored += 1
+            self.killed += SCORED_OUTCOMES[result]
+
+    def interval(self):
+        return wilson_interval(self.killed, self.scored, self.confidence, self.population)
+
+    def half_width(self):
+        low, high = self.interval()
+        return (high - low) / 2
+
+    def done(self):
+        """True once the score is known precisely enough, or every mutant was sampled."""
+        if self.sampled >= self.population:
+            return True
+        return self.scored >= self.min_scored and self.half_width() <= self.target_half_width
+
+    def report(self):
+        """Sample size, score and achieved precision, scores in percent."""
+        low, high = self.interval()
+        return {
+            "population": self.population,
+            "sampled": self.sampled,
+            "scored": self.scored,
+            "killed": self.killed,
+            "score": round(100 * self.killed / self.scored, 2) if self.scored else None,
+            "low": round(100 * low, 2),
+            "high": round(100 * high, 2),
+            "half_width": round(100 * (high - low) / 2, 2),
+            "confidence": self.confidence,
+            "stopped_early": self.sampled < self.population,
+        }
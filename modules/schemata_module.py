@@ -0,0 +1,414 @@
+import os
+import re
+from utils import run_command
+from modules.defects4j_module import defects4j_test_with_timeout
+from modules.llm_test_module import read_failing_tests, read_mutant_header, read_test_outcome
+from llm.java_lexer import normalize_code_line
+from llm.source_file import get_source_file
+
+# Runtime switch selecting the active mutants: comma-separated schema ids, none = original code
+SCHEMA_CLASS = "MutationCompareSchema"
+SCHEMA_PROPERTY = "mutationcompare.mutant"
+SCHEMA_ENV = "MUTATIONCOMPARE_MUTANT"
+
+SCHEMA_SOURCE = """{package_line}final class {schema_class} {{
+
+    static final java.util.BitSet ACTIVE = read();
+
+    private {schema_class}() {{
+    }}
+
+    private static java.util.BitSet read() {{
+        java.util.BitSet active = new java.util.BitSet();
+        String value = System.getProperty("{schema_property}", System.getenv("{schema_env}"));
+        if (value == null) {{
+            return active;
+        }}
+        for (String id : value.split(",")) {{
+            try {{
+                active.set(Integer.parseInt(id.trim()));
+            }} catch (RuntimeException e) {{
+                // Malformed ids activate nothing
+            }}
+        }}
+        return active;
+    }}
+}}
+"""
+
+ASSIGN_RE = re.compile(r"^(.*?[^=!<>+\-*/%&|^])=([^=].*);$")
+CONDITION_RE = re.compile(r"^(\}?\s*(?:else\s+)?(?:if|while)\s*)\((.*)\)(\s*\{?)$")
+DECLARATION_RE = re.compile(r"^(?P<modifiers>(?:(?:public|protected|private|static|final|transient|volatile)\s+)*)"
+                            r"[\w.$]+(?:<[^;]*>)?(?:\[\])*\s+[\w$]+\s*(?:=|;)")
+LITERAL_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+JUMP_KEYWORDS = ("return", "throw", "break", "continue")
+TYPE_BODY_RE = re.compile(r"\b(?:class|interface|enum|record)\b|\bnew\b[^;]*\)\s*$")
+LABEL_RE = re.compile(r"^(?:case\b.*|default|[\w$]+)\s*:$")
+# Line starts continuing an expression; "++" and "--" start statements of their own
+CONTINUATION_RE = re.compile(r"^(?:[.?:*/%&|^=<>]|\+(?!\+)|-(?!-))")
+JAVAC_ERROR_RE = re.compile(r"([\w$]+\.java):(\d+):\s*error")
+
+
+def _balanced(code):
+    """True if parentheses and braces of a line of code are balanced."""
+    return code.count("(") == code.count(")") and code.count("{") == code.count("}")
+
+
+def _is_active(guard, mutant_id):
+    return f"{guard}.get({mutant_id})"
+
+
+def _chain(guard, variants, original):
+    """if/else chain of statements running the active variant."""
+    chain = " else ".join(f"if ({_is_active(guard, mutant_id)}) {{ {code} }}" for mutant_id, code in variants)
+    return f"{chain} else {{ {original} }}"
+
+
+def _is_declaration(code):
+    """True if a statement declares a variable ("return x;" has the same shape)."""
+    return bool(DECLARATION_RE.match(code)) and not code.startswith(JUMP_KEYWORDS)
+
+
+def statement_lines(source):
+    """
+    Lines of a source on which a statement of a method, constructor or
+    initializer body starts.
+
+    Braces are classified from the code preceding them (literals blanked):
+    type bodies (classes, anonymous classes), expression braces (array
+    initializers, anything opened inside parentheses) and code blocks.
+    Only lines inside a code block, outside parentheses, and following the
+    end of a statement, a block brace, a control header, a label or
+    else/do start a statement; the others (fields, enum constants,
+    continuations of a multi-line statement) cannot be rewritten alone.
+
+    Returns:
+        set: 1-based line numbers in the original source.
+    """
+    cleaned, line_map = source.cleaned
+    starts = set()
+    blocks = []
+    parens = 0
+    header = ""
+    last = ";"
+    for line_no, code in zip(line_map, cleaned.split("\n")):
+        code = LITERAL_RE.sub('""', code).strip()
+        if not code:
+            continue
+        previous = header.strip()
+        after_boundary = (last in ";{}" or (last == ")" and not code.startswith("."))
+                          or re.search(r"\b(?:else|do)$", previous)
+                          or (last == ":" and LABEL_RE.match(previous)))
+        if blocks and blocks[-1] == "code" and parens == 0 and after_boundary and not CONTINUATION_RE.match(code):
+            starts.add(line_no)
+        for char in code:
+            if char == "(":
+                parens += 1
+            elif char == ")":
+                parens -= 1
+            if char == "{":
+                if parens > 0 or (blocks and blocks[-1] == "expr") or header.rstrip().endswith(("=", "]", ",")):
+                    blocks.append("expr")
+                elif TYPE_BODY_RE.search(header):
+                    blocks.append("type")
+                else:
+                    blocks.append("code")
+                header = ""
+            elif char == "}":
+                if blocks:
+                    blocks.pop()
+                header = ""
+            elif char == ";" and parens == 0:
+                header = ""
+            else:
+                header += char
+            if not char.isspace():
+                last = char
+        header += " "
+    return starts
+
+
+def _top_level_comma(expression):
+    """True if an expression holds a comma outside parentheses, brackets and braces."""
+    depth = 0
+    for char in LITERAL_RE.sub('""', expression):
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            return True
+    return False
+
+
+def _ternary(guard, variants, original):
+    """
+    Nested conditional expression selecting the active variant; only for
+    conditions, which are all boolean whatever the variant.
+    """
+    expression = f"({original})"
+    for mutant_id, code in reversed(variants):
+        expression = f"{_is_active(guard, mutant_id)} ? ({code}) : {expression}"
+    return expression
+
+
+def schema_line(original, variants, guard):
+    """
+    Rewrite a single line so that each variant is selected at runtime.
+
+    Args:
+        original (str): Comment-free original code of the line (stripped).
+        variants (list): (schema id, mutated code) pairs for that line.
+        guard (str): Expression of the BitSet of active schema ids.
+
+    Returns:
+        str: The rewritten line, or None if the line shape is not supported.
+    """
+    # Control headers: swap the condition only
+    match = CONDITION_RE.match(original)
+    if match:
+        prefix, condition, suffix = match.groups()
+        conditions = []
+        for mutant_id, code in variants:
+            m = CONDITION_RE.match(code)
+            if not m or m.group(1).split() != prefix.split() or m.group(3).strip() != suffix.strip():
+                return None
+            conditions.append((mutant_id, m.group(2)))
+        return f"{prefix}({_ternary(guard, conditions, condition)}){suffix}"
+
+    # Lines closing a block (e.g. "} while (x);") cannot be wrapped
+    if original.startswith("}") or not original.endswith(";") or not _balanced(original):
+        return None
+    if any(not code.endswith(";") or not _balanced(code) for _, code in variants):
+        return None
+
+    # Returns and assignments are guarded as statements, never merged into a conditional
+    # expression: its type comes from its operands (Integer and int make int, int and long
+    # make long), which would unbox or widen the original value even with no mutant active
+
+    # Fields are initialized outside any statement block
+    declaration = DECLARATION_RE.match(original)
+    if declaration and declaration.group("modifiers").split() not in ([], ["final"]):
+        return None
+
+    # <type> <name> = <expr>; split into a declaration and guarded assignments
+    match = ASSIGN_RE.match(original)
+    if match and _is_declaration(original):
+        target, expression = match.group(1).strip(), match.group(2).strip()
+        name = target.split()[-1]
+        # `var` needs its initializer; array initializers and several declarators cannot be split
+        if target.split()[0] == "var" or expression.startswith("{") or _top_level_comma(expression):
+            return None
+        assignments = []
+        for mutant_id, code in variants:
+            m = ASSIGN_RE.match(code)
+            if not m or m.group(1).strip() != target:
+                return None
+            assignments.append((mutant_id, f"{name} = {m.group(2).strip()};"))
+        return f"{target}; {_chain(guard, assignments, f'{name} = {expression};')}"
+
+    # Declarations cannot be wrapped in a block without changing their scope
+    if _is_declaration(original):
+        return None
+
+    # A jump must stay one in every variant, or the code after the line would become reachable
+    if original.startswith(JUMP_KEYWORDS) and not all(code.startswith(JUMP_KEYWORDS) for _, code in variants):
+        return None
+
+    # Plain statements, returns and assignments: guard them with an if/else chain
+    return _chain(guard, variants, original)
+
+
+def build_schema(source, mutants, guard):
+    """
+    Build the schema source of a class: every supported mutant is inlined
+    behind a runtime check on the active mutant id. Each rewritten line
+    stays on its original line, so line numbers are unchanged.
+
+    Args:
+        source (SourceFile): Original class.
+        mutants (list): Mutant descriptions with 'schema_id', 'line',
+            'original_code' and 'mutated_code'.
+        guard (str): Expression of the BitSet of active schema ids.
+
+    Returns:
+        tuple: (schema text, list of mutants that could not be inlined)
+    """
+    cleaned, line_map = source.cleaned
+    cleaned_by_line = dict(zip(line_map, cleaned.split("\n")))
+    starts = statement_lines(source)
+
+    by_line = {}
+    for mutant in mutants:
+        by_line.setdefault(mutant["line"], []).append(mutant)
+
+    lines = list(source.lines)
+    unsupported = []
+    for line_no, line_mutants in sorted(by_line.items()):
+        raw = lines[line_no - 1]
+        code = cleaned_by_line.get(line_no, "").strip()
+        # Dropping a block comment delimiter would unbalance the rest of the file; fields and
+        # continuation lines cannot be guarded by a statement
+        if not code or ("/*" in raw and "/*" not in code) or ("*/" in raw and "*/" not in code) \
+                or line_no not in starts:
+            unsupported.extend(line_mutants)
+            continue
+
+        # The line must still hold the code the mutants were generated from
+        mismatched = [m for m in line_mutants
+                      if normalize_code_line(m["original_code"]) not in normalize_code_line(code)]
+        if mismatched:
+            unsupported.extend(mismatched)
+            line_mutants = [m for m in line_mutants if m not in mismatched]
+            if not line_mutants:
+                continue
+
+        variants = [(m["schema_id"], m["mutated_code"].strip()) for m in line_mutants]
+        rewritten = schema_line(code, variants, guard)
+        if rewritten is None:
+            unsupported.extend(line_mutants)
+            continue
+
+        body = raw.rstrip("\r\n")
+        indent = body[:len(body) - len(body.lstrip())]
+        lines[line_no - 1] = indent + rewritten + raw[len(body):]
+
+    return "".join(lines), unsupported
+
+
+def write_schema_switch(class_dir, package):
+    """Write the helper class holding the active mutant ids next to the schema class."""
+    package_line = f"package {package};\n\n" if package else ""
+    with open(os.path.join(class_dir, f"{SCHEMA_CLASS}.java"), "w") as f:
+        f.write(SCHEMA_SOURCE.format(package_line=package_line, schema_class=SCHEMA_CLASS,
+                                     schema_property=SCHEMA_PROPERTY, schema_env=SCHEMA_ENV))
+
+
+def compile_schema(working_dir, class_file, source, mutants, guard):
+    """
+    Write and compile the schema of a class, isolating mutants that break
+    compilation. Errors reported on a mutated line drop the mutants of that
+    line; errors that cannot be attributed split the remaining set in half.
+
+    Returns:
+        tuple: (compiled mutants, isolated mutants)
+    """
+    isolated = []
+    active = list(mutants)
+    file_name = os.path.basename(class_file)
+
+    while active:
+        schema, unsupported = build_schema(source, active, guard)
+        if unsupported:
+            isolated.extend(unsupported)
+            active = [m for m in active if m not in unsupported]
+            continue
+
+        with open(class_file, "w") as f:
+            f.write(schema)
+
+        _, stderr, returncode = run_command("defects4j compile", cwd=working_dir, stage="defects4j_compile")
+        if returncode == 0:
+            return active, isolated
+
+        error_lines = {int(line) for name, line in JAVAC_ERROR_RE.findall(stderr) if name == file_name}
+        culprits = [m for m in active if m["line"] in error_lines]
+        if not culprits:
+            # Unattributed failure: keep the first half, fall back for the rest
+            culprits = active[len(active) // 2:] if len(active) > 1 else active
+        print(f"Schema compilation failed, isolating {len(culprits)} mutant(s)")
+        isolated.extend(culprits)
+        active = [m for m in active if m not in culprits]
+
+    # Nothing left in the schema: restore the original class
+    with open(class_file, "w") as f:
+        f.write(source.text)
+    return [], isolated
+
+
+def prepare_class_schema(working_dir, mutant_files, first_id=1):
+    """
+    Rewrite one class of a working directory as the mutant schema of its
+    mutants and compile it.
+
+    Args:
+        working_dir (str): Checked out Defects4J project; schemata of other
+            classes may already be in place.
+        mutant_files (list): Mutant files of the same class.
+        first_id (int): Schema id of the first mutant; ids must be unique
+            across the classes schematized together.
+
+    Returns:
+        tuple: (qualified class name, original SourceFile, compiled mutants,
+        isolated mutant files). Compiled mutants are the mutant headers
+        with their 'schema_id' and 'file'; isolated files must be evaluated
+        individually. The source is None when the class was not found.
+    """
+    first = mutant_files[0]
+    class_name = os.path.basename(first).split("_Mutant_")[0]
+    parts = first.split("mutants" + os.sep, 1)[1].split(os.sep)
+    rel_package_path = os.path.join(*parts[1:-1]) if len(parts) > 2 else ""
+    package = rel_package_path.replace(os.sep, ".")
+    qualified_class = f"{package}.{class_name}" if package else class_name
+
+    src_dir = os.path.join(working_dir, "src", "main", "java")
+    if not os.path.exists(src_dir):
+        src_dir = os.path.join(working_dir, "src", "java")
+    class_dir = os.path.join(src_dir, rel_package_path)
+    class_file = os.path.join(class_dir, f"{class_name}.java")
+    if not os.path.exists(class_file):
+        print(f"Class not found for schema: {class_file}")
+        return qualified_class, None, [], list(mutant_files)
+
+    source = get_source_file(class_file)
+    mutants, isolated = [], []
+    for schema_id, mutant_file in enumerate(mutant_files, start=first_id):
+        header = read_mutant_header(mutant_file)
+        if header.get("source_sha1") != source.sha1 or "line" not in header:
+            isolated.append(mutant_file)
+            continue
+        header.update({"schema_id": schema_id, "file": mutant_file})
+        mutants.append(header)
+
+    guard = f"{package}.{SCHEMA_CLASS}.ACTIVE" if package else f"{SCHEMA_CLASS}.ACTIVE"
+    write_schema_switch(class_dir, package)
+    compiled, failed = compile_schema(working_dir, class_file, source, mutants, guard)
+    isolated.extend(m["file"] for m in failed)
+    print(f"Schema for {class_name}: {len(compiled)} mutant(s) compiled once, {len(isolated)} isolated")
+    return qualified_class, source, compiled, isolated
+
+
+def run_schema_for_class(working_dir, mutant_files, timeout=10):
+    """
+    Evaluate all mutants of one class with a single compilation.
+
+    The class is rewritten as a mutant schema, compiled once, and the test
+    suite is run once per mutant with the active mutant id selected through
+    the environment.
+
+    Args:
+        working_dir (str): Freshly checked out and compiled Defects4J project.
+        mutant_files (list): Mutant files of the same class.
+        timeout (int): Test timeout in seconds per mutant.
+
+    Returns:
+        tuple: (results, isolated) where results maps mutant file ->
+        (result, killing tests) and isolated lists the mutant files to
+        evaluate individually.
+    """
+    if not mutant_files:
+        return {}, []
+
+    _, _, compiled, isolated = prepare_class_schema(working_dir, mutant_files)
+
+    results = {}
+    for mutant in compiled:
+        env = dict(os.environ)
+        env[SCHEMA_ENV] = str(mutant["schema_id"])
+        print(f"\n Testing mutant (schema): {os.path.basename(mutant['file'])}")
+        if defects4j_test_with_timeout(working_dir, timeout, env=env) == "timeout":
+            results[mutant["file"]] = ("timeout", [])
+        else:
+            results[mutant["file"]] = (read_test_outcome(working_dir), read_failing_tests(working_dir))
+
+    return results, isolated
@@ -0,0 +1,147 @@
+import numpy as np
+
+# Bootstrap resamples and confidence level used by default
+RESAMPLES = 10_000
+CONFIDENCE = 0.95
+
+# Resamples drawn per batch, to bound memory with many bugs
+BATCH_SIZE = 2_000
+
+
+def count_matrices(results):
+    """
+    Killed and covered mutant counts of every group (tool or model) and bug,
+    as two groups x bugs arrays.
+
+    Args:
+        results (dict): {group: {bug: (killed, covered)}}; a bug missing
+            for a group counts as not covered.
+
+    Returns:
+        tuple: (groups, bugs, killed, covered).
+    """
+    groups = list(results)
+    bugs = sorted({bug for counts in results.values() for bug in counts})
+    killed = np.zeros((len(groups), len(bugs)), dtype=np.int64)
+    covered = np.zeros((len(groups), len(bugs)), dtype=np.int64)
+    bug_index = {bug: i for i, bug in enumerate(bugs)}
+    for g, group in enumerate(groups):
+        for bug, (bug_killed, bug_covered) in results[group].items():
+            killed[g, bug_index[bug]] = bug_killed
+            covered[g, bug_index[bug]] = bug_covered
+    return groups, bugs, killed, covered
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def _bootstrap_weights(n_bugs, resamples, rng):
+    """
+    How many times each bug is drawn in each resample (resamples x bugs),
+    batch by batch; resampling bugs keeps the mutants of a bug together.
+    """
+    for start in range(0, resamples, BATCH_SIZE):
+        size = min(BATCH_SIZE, resamples - start)
+        yield rng.multinomial(n_bugs, np.full(n_bugs, 1 / n_bugs), size=size)
+
+
+def _interval(samples, confidence):
+    tail = (1 - confidence) / 2 * 100
+    return np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+
+
+def bootstrap_scores(killed, covered, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0):
+    """
+    Mutation score of every group, killed over covered mutants pooled over
+    the bugs, with a percentile bootstrap confidence interval over bugs.
+
+    All groups are resampled with the same bugs, in batches of resamples
+    computed as matrix products.
+
+    Args:
+        killed (ndarray): groups x bugs killed mutants.
+        covered (ndarray): groups x bugs covered (killed or survived) mutants.
+
+    Returns:
+        tuple: (score, low, high) arrays in percent, NaN without coverage.
+    """
+    rng = np.random.default_rng(seed)
+    samples = [100 * _ratio(weights @ killed.T, weights @ covered.T)
+               for weights in _bootstrap_weights(killed.shape[1], resamples, rng)]
+    low, high = _interval(np.concatenate(samples), confidence)
+    return 100 * _ratio(killed.sum(axis=1), covered.sum(axis=1)), low, high
+
+
+def paired_comparison(killed, covered, a, b, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0):
+    """
+    Difference of mutation score between groups `a` and `b` on the bugs
+    both cover: bootstrap confidence interval of the difference, and the
+    two-sided p-value of a paired permutation test that swaps the results
+    of the two groups on each bug at random.
+
+    Returns:
+        dict: 'bugs', 'difference', 'low', 'high' (percentage points) and
+        'p_value'; None without a common bug.
+    """
+    common = (covered[a] > 0) & (covered[b] > 0)
+    if not common.any():
+        return None
+    killed_a, killed_b = killed[a, common], killed[b, common]
+    covered_a, covered_b = covered[a, common], covered[b, common]
+    n_bugs = int(common.sum())
+    difference = 100 * (killed_a.sum() / covered_a.sum() - killed_b.sum() / covered_b.sum())
+
+    rng = np.random.default_rng(seed)
+    samples = [100 * (_ratio(weights @ killed_a, weights @ covered_a) - _ratio(weights @ killed_b, weights @ covered_b))
+               for weights in _bootstrap_weights(n_bugs, resamples, rng)]
+    low, high = _interval(np.concatenate(samples), confidence)
+
+    extreme = 0
+    for start in range(0, resamples, BATCH_SIZE):
+        swap = rng.random((min(BATCH_SIZE, resamples - start), n_bugs)) < 0.5
+        permuted = 100 * (_ratio(np.where(swap, killed_b, killed_a).sum(axis=1),
+                                 np.where(swap, covered_b, covered_a).sum(axis=1)) -
+                          _ratio(np.where(swap, killed_a, killed_b).sum(axis=1),
+                                 np.where(swap, covered_a, covered_b).sum(axis=1)))
+        extreme += int((np.abs(permuted) >= abs(difference) - 1e-12).sum())
+    return {"bugs": n_bugs, "difference": difference, "low": low, "high": high,
+            "p_value": (extreme + 1) / (resamples + 1)}
+
+
+def compare_groups(results, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0):
+    """
+    Print the mutation score of every group with its confidence interval,
+    then the paired comparison of every pair of groups.
+
+    Args:
+        results (dict): {group: {bug: (killed, covered)}}, see count_matrices.
+    """
+    groups, bugs, killed, covered = count_matrices(results)
+    if not groups or not bugs:
+        print("No results to compare")
+        return
+
+    level = f"{confidence * 100:g}%"
+    score, low, high = bootstrap_scores(killed, covered, resamples, confidence, seed)
+    print(f"\n=== Mutation score, {level} bootstrap CI over bugs ({resamples} resamples) ===")
+    for g, group in enumerate(groups):
+        bug_count = int((covered[g] > 0).sum())
+        if np.isnan(score[g]):
+            print(f"{group:<30} {bug_count:>4} bugs  -")
+        else:
+            print(f"{group:<30} {bug_count:>4} bugs  {score[g]:6.2f}%  [{low[g]:6.2f}, {high[g]:6.2f}]")
+
+    if len(groups) < 2:
+        return
+    print(f"\n=== Paired differences, {level} bootstrap CI and permutation p-value ===")
+    for a in range(len(groups)):
+        for b in range(a + 1, len(groups)):
+            comparison = paired_comparison(killed, covered, a, b, resamples, confidence, seed)
+            pair = f"{groups[a]} - {groups[b]}"
+            if comparison is None:
+                print(f"{pair:<45} no common bug")
+                continue
+            print(f"{pair:<45} {comparison['bugs']:>4} bugs  {comparison['difference']:+7.2f} pp  "
+                  f"[{comparison['low']:+7.2f}, {comparison['high']:+7.2f}]  p={comparison['p_value']:.4f}")
@@ -0,0 +1,217 @@
+import glob
+import hashlib
+import os
+import struct
+from modules.defects4j_module import defects4j_compile, defects4j_export
+
+# Attributes that only carry debug information: javac output differing only
+# in them (e.g. because a line was reformatted) behaves identically
+DEBUG_ATTRIBUTES = {b"LineNumberTable", b"LocalVariableTable", b"LocalVariableTypeTable", b"SourceFile",
+                    b"SourceDebugExtension"}
+
+RESULT_EQUIVALENT = "equivalent"
+RESULT_DUPLICATE_PREFIX = "duplicate_of:"
+
+# Size in bytes of the constant pool entries by tag (Utf8 is variable)
+CONSTANT_SIZES = {3: 4, 4: 4, 5: 8, 6: 8, 7: 2, 8: 2, 9: 4, 10: 4, 11: 4, 12: 4, 15: 3, 16: 2, 17: 4, 18: 4,
+                  19: 2, 20: 2}
+
+
+class ClassFileError(ValueError):
+    """Raised for bytes that are not a well-formed class file."""
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def take(self, size):
+        if self.pos + size > len(self.data):
+            raise ClassFileError("truncated class file")
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def u2(self):
+        return struct.unpack(">H", self.take(2))[0]
+
+    def u4(self):
+        return struct.unpack(">I", self.take(4))[0]
+
+
+def _strip_attributes(reader, utf8, out):
+    """Copy an attribute table to `out` without its debug attributes."""
+    kept = []
+    for _ in range(reader.u2()):
+        name_index = reader.u2()
+        info = reader.take(reader.u4())
+        name = utf8.get(name_index)
+        if name in DEBUG_ATTRIBUTES:
+            continue
+        if name == b"Code":
+            info = _strip_code(info, utf8)
+        kept.append(struct.pack(">HI", name_index, len(info)) + info)
+    out.append(struct.pack(">H", len(kept)))
+    out.extend(kept)
+
+
+def _strip_code(info, utf8):
+    """Code attribute body without its nested debug attributes."""
+    reader = _Reader(info)
+    out = [reader.take(4)]  # max_stack, max_locals
+    code_length = reader.u4()
+    out.append(struct.pack(">I", code_length) + reader.take(code_length))
+    exception_count = reader.u2()
+    out.append(struct.pack(">H", exception_count) + reader.take(8 * exception_count))
+    _strip_attributes(reader, utf8, out)
+    return b"".join(out)
+
+
+def strip_debug_info(data):
+    """
+    Class file bytes without debug attributes (line and local variable
+    tables, source file). The constant pool is kept as it is, so the check
+    stays conservative: two classes that only differ in pool entries used
+    by debug attributes are not considered equal.
+
+    Raises:
+        ClassFileError: If `data` is not a class file.
+    """
+    reader = _Reader(data)
+    if reader.take(4) != b"\xca\xfe\xba\xbe":
+        raise ClassFileError("bad magic number")
+    out = [reader.take(4)]  # minor and major version
+
+    start = reader.pos
+    count = reader.u2()
+    utf8 = {}
+    index = 1
+    while index < count:
+        tag = reader.take(1)[0]
+        if tag == 1:
+            utf8[index] = reader.take(reader.u2())
+        elif tag in CONSTANT_SIZES:
+            reader.take(CONSTANT_SIZES[tag])
+        else:
+            raise ClassFileError(f"unknown constant pool tag {tag}")
+        # Long and Double take two slots
+        index += 2 if tag in (5, 6) else 1
+    out.append(data[start:reader.pos])
+
+    out.append(reader.take(6))  # access flags, this class, super class
+    interfaces = reader.u2()
+    out.append(struct.pack(">H", interfaces) + reader.take(2 * interfaces))
+    for _ in range(2):  # fields, then methods
+        members = reader.u2()
+        out.append(struct.pack(">H", members))
+        for _ in range(members):
+            out.append(reader.take(6))  # access flags, name, descriptor
+            _strip_attributes(reader, utf8, out)
+    _strip_attributes(reader, utf8, out)
+    return b"".join(out)
+
+
+def class_files(classes_dir, class_name):
+    """
+    Compiled files of a top-level class and of its nested, local and
+    anonymous classes ("a.b.Foo" -> a/b/Foo.class, a/b/Foo$*.class).
+    """
+    base = os.path.join(classes_dir, *class_name.split("."))
+    return sorted([base + ".class"] + glob.glob(glob.escape(base) + "$*.class"))
+
+
+def top_level_classes(classes_dir):
+    """Fully-qualified names of the top-level classes compiled in a directory."""
+    names = []
+    for root, _, files in os.walk(classes_dir):
+        for name in files:
+            if name.endswith(".class") and "$" not in name:
+                rel_path = os.path.relpath(os.path.join(root, name), classes_dir)
+                names.append(rel_path[:-len(".class")].replace(os.sep, "."))
+    return names
+
+
+def bytecode_hash(classes_dir, class_name):
+    """
+    Hash of the debug-free bytecode of a class and its inner classes, or
+    None when it has no class file or one cannot be parsed.
+    """
+    digest = hashlib.sha1()
+    found = False
+    for path in class_files(classes_dir, class_name):
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            stripped = strip_debug_info(data)
+        except ClassFileError as e:
+            print(f"TCE: cannot parse {path}: {e}")
+            return None
+        digest.update(os.path.basename(path).encode("utf-8") + b"\0")
+        digest.update(hashlib.sha1(stripped).digest())
+        found = True
+    return digest.hexdigest() if found else None
+
+
+class TrivialCompilerEquivalence:
+    """
+    Trivial compiler equivalence check of the mutants of one project version.
+
+    After a mutant compiles, the bytecode of its class (debug attributes
+    removed) is compared with the original class and with the mutants
+    already seen: a mutant identical to the original is equivalent, one
+    identical to an earlier mutant is its duplicate. Neither needs tests.
+    """
+
+    def __init__(self, working_dir, class_names=None):
+        """
+        Args:
+            working_dir (str): Pristine checkout of the project; it is
+                compiled if it has no class files yet.
+            class_names (iterable): Fully-qualified classes that will be
+                mutated; their original bytecode is hashed now, before the
+                working directory gets mutated. None hashes every
+                top-level class.
+        """
+        self.classes_subdir = (defects4j_export(working_dir, "dir.bin.classes") or "").strip() or \
+            os.path.join("target", "classes")
+        classes_dir = os.path.join(working_dir, self.classes_subdir)
+        self.originals = {}
+        if os.path.isdir(classes_dir) or defects4j_compile(working_dir):
+            if class_names is None:
+                class_names = top_level_classes(classes_dir)
+            self.originals = {name: bytecode_hash(classes_dir, name) for name in set(class_names)}
+        else:
+            print("TCE: the original version does not compile, check disabled")
+        self.seen = {}
+        self.equivalent = 0
+        self.duplicates = 0
+
+    def check(self, working_dir, class_name, mutant_id):
+        """
+        Classify a compiled mutant of `class_name` (fully qualified).
+
+        Returns:
+            str: RESULT_EQUIVALENT, "duplicate_of:<mutant id>" or None when
+            the mutant must be tested.
+        """
+        original = self.originals.get(class_name)
+        mutant = bytecode_hash(os.path.join(working_dir, self.classes_subdir), class_name)
+        if original is None or mutant is None:
+            return None
+        if mutant == original:
+            self.equivalent += 1
+            print(f"TCE: {mutant_id} compiles to the original bytecode - equivalent")
+            return RESULT_EQUIVALENT
+        key = (class_name, mutant)
+        if key in self.seen:
+            self.duplicates += 1
+            print(f"TCE: {mutant_id} compiles to the bytecode of {self.seen[key]} - duplicate")
+            return f"{RESULT_DUPLICATE_PREFIX}{self.seen[key]}"
+        self.seen[key] = mutant_id
+        return None
+
+    def report(self):
+        print(f"TCE: {self.equivalent} equivalent and {self.duplicates} duplicate mutants skipped")
@@ -0,0 +1,200 @@
+import csv
+import hashlib
+import json
+import os
+import re
+
+# Weight of each level when scoring a test for a mutant: the more specific
+# the location, the stronger its history predicts the killing test
+LEVEL_WEIGHTS = {"line": 4.0, "class": 2.0, "mutator": 1.0, "project": 0.5}
+
+PIT_CLASS_RE = re.compile(r"\[(?:class|nested-class):([\w.$]+)\]")
+
+
+def test_class_of(test_name):
+    """
+    Test class of a test name as written by Defects4J ("Class::method"),
+    Major ("Class[method]") or PIT ("Class.method(Class)" or JUnit 5 ids).
+    """
+    test_name = test_name.strip()
+    match = PIT_CLASS_RE.findall(test_name)
+    if match:
+        return match[-1]
+    if "(" in test_name and test_name.endswith(")"):
+        return test_name[test_name.rindex("(") + 1:-1]
+    return test_name.split("::", 1)[0].split("[", 1)[0]
+
+
+def short_mutator(mutator):
+    """org.pitest...MathMutator -> MathMutator; Major names are kept as they are."""
+    return mutator.rsplit(".", 1)[-1] if mutator else None
+
+
+def _file_digest(*paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class KillHistory:
+    """
+    Per-project statistics of which test classes killed previous mutants,
+    kept by class, by line and by mutator, and used to run the likeliest
+    killers first.
+
+    The history is stored as JSON in RESULTS_FOLDER/kill_history/<project>.json
+    and is fed by PIT and Major reports and by LLM mutant results; record()
+    updates it online while mutants are evaluated.
+    """
+
+    def __init__(self, project_id, folder):
+        self.project_id = project_id
+        self.path = os.path.join(folder, "kill_history", f"{project_id.lower()}.json")
+        self.levels = {level: {} for level in LEVEL_WEIGHTS}
+        self.sources = []
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.levels.update(data.get("levels", {}))
+            self.sources = data.get("sources", [])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"project_id": self.project_id, "levels": self.levels, "sources": self.sources}, f)
+        os.replace(tmp_path, self.path)
+
+    def mutant_counts(self):
+        """Number of mutants recorded per class, e.g. to balance Major shards."""
+        return {class_name: stats["mutants"] for class_name, stats in self.levels["class"].items()}
+
+    def _keys(self, class_name, line=None, mutator=None):
+        keys = {"class": class_name, "project": "all"}
+        if line not in (None, "", "?"):
+            keys["line"] = f"{class_name}:{line}"
+        if mutator:
+            keys["mutator"] = mutator
+        return keys
+
+    def record(self, class_name, line=None, mutator=None, killing_tests=()):
+        """
+        Add the outcome of one mutant: a survivor has no killing tests.
+
+        Args:
+            class_name (str): Fully-qualified mutated class.
+            line: Mutated line, optional.
+            mutator (str): Mutation operator, optional.
+            killing_tests (iterable): Failing tests in any supported format.
+        """
+        test_classes = {test_class_of(t) for t in killing_tests if t and t != "none"}
+        for level, key in self._keys(class_name, line, mutator).items():
+            stats = self.levels[level].setdefault(key, {"mutants": 0, "kills": {}})
+            stats["mutants"] += 1
+            for test_class in test_classes:
+                stats["kills"][test_class] = stats["kills"].get(test_class, 0) + 1
+
+    def scores(self, class_name, line=None, mutator=None):
+        """Estimated kill probability weight of every known test class for a mutant."""
+        scores = {}
+        for level, key in self._keys(class_name, line, mutator).items():
+            stats = self.levels[level].get(key)
+            if not stats:
+                continue
+            for test_class, kills in stats["kills"].items():
+                # Smoothed kill rate of the test at this level
+                scores[test_class] = scores.get(test_class, 0.0) + \
+                    LEVEL_WEIGHTS[level] * kills / (stats["mutants"] + 1)
+        return scores
+
+    def order_tests(self, tests, class_name, line=None, mutator=None):
+        """
+        Sort test classes by decreasing estimated kill probability; tests
+        without history keep their relative order after the others.
+        """
+        scores = self.scores(class_name, line, mutator)
+        if not scores:
+            return list(tests)
+        return sorted(tests, key=lambda test: -scores.get(test_class_of(test), 0.0))
+
+    def _ingest_once(self, kind, *paths):
+        """True if the report was not ingested yet, and remember it."""
+        digest = _file_digest(*paths)
+        source = f"{kind}:{digest}"
+        if source in self.sources:
+            print(f"Kill history: {kind} report already ingested")
+            return False
+        self.sources.append(source)
+        return True
+
+    def ingest_pit(self, mutations_csv):
+        """Add the mutants of a PIT mutations.csv report."""
+        if not os.path.exists(mutations_csv) or not self._ingest_once("pit", mutations_csv):
+            return 0
+        count = 0
+        with open(mutations_csv, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 7 or row[0] == "File":
+                    continue
+                _, class_name, mutator, _, line, status, test = row[:7]
+                if status in ("KILLED", "TIMED_OUT", "MEMORY_ERROR", "RUN_ERROR"):
+                    self.record(class_name, line, short_mutator(mutator), [test])
+                elif status == "SURVIVED":
+                    self.record(class_name, line, short_mutator(mutator))
+                else:
+                    continue
+                count += 1
+        print(f"Kill history: {count} PIT mutants added for {self.project_id}")
+        return count
+
+    def ingest_major(self, working_dir):
+        """Add the mutants of a Major run (kill.csv, mutants.log, killMap.csv, testMap.csv)."""
+        kill_csv = os.path.join(working_dir, "kill.csv")
+        mutants_log = os.path.join(working_dir, "mutants.log")
+        kill_map = os.path.join(working_dir, "killMap.csv")
+        test_map = os.path.join(working_dir, "testMap.csv")
+        if not os.path.exists(kill_csv) or not os.path.exists(mutants_log):
+            return 0
+        if not self._ingest_once("major", kill_csv, mutants_log, kill_map):
+            return 0
+
+        info = {}
+        with open(mutants_log) as f:
+            for line in f:
+                parts = line.strip().split(":")
+                if len(parts) < 6 or not parts[0].isdigit():
+                    continue
+                class_name = parts[4].split("@", 1)[0].replace("/", ".")
+                info[parts[0]] = (class_name, parts[5], parts[1])
+
+        test_names = {}
+        if os.path.exists(test_map):
+            with open(test_map, newline="") as f:
+                for row in csv.reader(f):
+                    if len(row) >= 2 and row[0].isdigit():
+                        test_names[row[0]] = row[1]
+
+        killers = {}
+        if os.path.exists(kill_map):
+            with open(kill_map, newline="") as f:
+                for row in csv.reader(f):
+                    if len(row) >= 2 and row[0].isdigit():
+                        killers.setdefault(row[1], []).append(test_names.get(row[0], row[0]))
+
+        count = 0
+        with open(kill_csv, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[0].isdigit() or row[0] not in info:
+                    continue
+                status = row[1].strip()
+                if status == "UNCOV":
+                    continue
+                class_name, line, mutator = info[row[0]]
+                tests = killers.get(row[0], []) if status in ("FAIL", "TIME", "EXC") else []
+                self.record(class_name, line, mutator, tests)
+                count += 1
+        print(f"Kill history: {count} Major mutants added for {self.project_id}")
+        return count
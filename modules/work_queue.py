@@ -0,0 +1,279 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Seconds a leased job stays reserved without a heartbeat
+LEASE_SECONDS = 120
+
+# Leases lost (worker died or stalled) before a job is marked failed
+MAX_ATTEMPTS = 3
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    sweep       TEXT NOT NULL,
+    job_key     TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    updated     REAL NOT NULL,
+    UNIQUE (sweep, job_key)
+)
+"""
+
+
+def default_worker_id():
+    """Identifier of this worker process: host name and pid."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Job queue stored in a SQLite file, shared by the hosts of a sweep.
+
+    Jobs are leased to one worker at a time. A worker keeps its lease alive
+    with heartbeats; when a lease expires (the worker died, hung or lost
+    the storage) the job goes back to pending for another worker, up to
+    MAX_ATTEMPTS leases, after which it is marked failed.
+
+    The file can live on storage mounted by every host. SQLite's rollback
+    journal is used rather than WAL, which needs shared memory and does
+    not work across hosts; the file system must honour POSIX locks.
+    One WorkQueue (connection) per thread.
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute(SCHEMA)
+
+    def _transaction(self, statements):
+        """Run `statements(cursor)` inside an immediate (write-locked) transaction."""
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            value = statements(cursor)
+            cursor.execute("COMMIT")
+            return value
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, sweep, jobs):
+        """
+        Add jobs to a sweep; jobs whose key is already in the sweep are ignored.
+
+        Args:
+            sweep (str): Identifier grouping the jobs of one run.
+            jobs (iterable): (job key, JSON-serializable payload) pairs.
+
+        Returns:
+            int: Number of jobs added.
+        """
+        now = time.time()
+        rows = [(sweep, key, json.dumps(payload), STATUS_PENDING, now) for key, payload in jobs]
+
+        def insert(cursor):
+            before = self.connection.total_changes
+            cursor.executemany("INSERT OR IGNORE INTO jobs (sweep, job_key, payload, status, updated) "
+                               "VALUES (?, ?, ?, ?, ?)", rows)
+            return self.connection.total_changes - before
+        return self._transaction(insert)
+
+    def _expire_leases(self, cursor, now):
+        cursor.execute("UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, updated = ?, result = ? "
+                       "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                       (STATUS_FAILED, now, json.dumps({"error": "lease expired"}), STATUS_LEASED, now,
+                        self.max_attempts))
+        cursor.execute("UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, updated = ? "
+                       "WHERE status = ? AND lease_until < ?", (STATUS_PENDING, now, STATUS_LEASED, now))
+
+    def lease(self, worker, sweep=None):
+        """
+        Reserve the oldest pending job, after returning expired leases to
+        the queue.
+
+        Returns:
+            dict: 'id', 'sweep', 'key' and 'payload' of the job, or None
+            when nothing is pending.
+        """
+        def take(cursor):
+            now = time.time()
+            self._expire_leases(cursor, now)
+            query = "SELECT id, sweep, job_key, payload FROM jobs WHERE status = ?"
+            args = [STATUS_PENDING]
+            if sweep is not None:
+                query += " AND sweep = ?"
+                args.append(sweep)
+            row = cursor.execute(query + " ORDER BY id LIMIT 1", args).fetchone()
+            if row is None:
+                return None
+            cursor.execute("UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                           "updated = ? WHERE id = ?", (STATUS_LEASED, worker, now + self.lease_seconds, now, row[0]))
+            return {"id": row[0], "sweep": row[1], "key": row[2], "payload": json.loads(row[3])}
+        return self._transaction(take)
+
+    def _update_own(self, job_id, worker, assignments, args):
+        def update(cursor):
+            cursor.execute(f"UPDATE jobs SET {assignments}, updated = ? WHERE id = ? AND worker = ? AND status = ?",
+                           (*args, time.time(), job_id, worker, STATUS_LEASED))
+            return cursor.rowcount == 1
+        return self._transaction(update)
+
+    def heartbeat(self, job_id, worker):
+        """Extend a lease. Returns False if the worker no longer holds it."""
+        return self._update_own(job_id, worker, "lease_until = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, job_id, worker, result):
+        """Store the result of a leased job. Returns False if the lease was lost meanwhile."""
+        return self._update_own(job_id, worker, "status = ?, result = ?, lease_until = NULL",
+                                (STATUS_DONE, json.dumps(result)))
+
+    def release(self, job_id, worker, error=None):
+        """
+        Give a job back after an error: pending again, or failed once it
+        was leased MAX_ATTEMPTS times.
+        """
+        def update(cursor):
+            cursor.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, "
+                           "lease_until = NULL, result = ?, updated = ? WHERE id = ? AND worker = ? AND status = ?",
+                           (self.max_attempts, STATUS_FAILED, STATUS_PENDING, json.dumps({"error": error}),
+                            time.time(), job_id, worker, STATUS_LEASED))
+            return cursor.rowcount == 1
+        return self._transaction(update)
+
+    def cancel(self, sweep):
+        """Drop the pending jobs of a sweep; leased jobs run to completion. Returns the number dropped."""
+        def delete(cursor):
+            cursor.execute("DELETE FROM jobs WHERE sweep = ? AND status = ?", (sweep, STATUS_PENDING))
+            return cursor.rowcount
+        return self._transaction(delete)
+
+    def finished(self, sweep):
+        """
+        Done and failed jobs of a sweep, in id order.
+
+        Returns:
+            list: (id, key, status, result) tuples, result decoded from JSON.
+        """
+        rows = self.connection.execute(
+            "SELECT id, job_key, status, result FROM jobs WHERE sweep = ? AND status IN (?, ?) ORDER BY id",
+            (sweep, STATUS_DONE, STATUS_FAILED)).fetchall()
+        return [(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None) for row in rows]
+
+    def counts(self, sweep=None):
+        """Number of jobs per status, of one sweep or of the whole queue."""
+        query, args = "SELECT status, COUNT(*) FROM jobs", ()
+        if sweep is not None:
+            query, args = query + " WHERE sweep = ?", (sweep,)
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        counts.update(dict(self.connection.execute(query + " GROUP BY status", args).fetchall()))
+        return counts
+
+    def close(self):
+        self.connection.close()
+
+
+class Heartbeat:
+    """
+    Background thread renewing a lease every third of the lease time,
+    with its own connection. `lost` is set when the lease was taken over.
+    """
+
+    def __init__(self, queue_path, job_id, worker, lease_seconds=LEASE_SECONDS):
+        self.queue_path = queue_path
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        queue = WorkQueue(self.queue_path, self.lease_seconds)
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                if not queue.heartbeat(self.job_id, self.worker):
+                    self.lost = True
+                    print(f"Lease of job {self.job_id} lost")
+                    return
+        except sqlite3.Error as e:
+            print(f"Heartbeat of job {self.job_id} failed: {e}")
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(queue_path, handler, worker=None, sweep=None, idle_exit=None, poll_seconds=2.0,
+               lease_seconds=LEASE_SECONDS):
+    """
+    Lease jobs and process them with `handler(payload)` until stopped.
+
+    The handler's return value is stored as the job result; an exception
+    releases the job for another attempt.
+
+    Args:
+        queue_path (str): SQLite queue file.
+        handler (callable): Function of the job payload returning a
+            JSON-serializable result.
+        worker (str): Worker id, host name and pid by default.
+        sweep (str): Only take jobs of this sweep.
+        idle_exit (float): Stop after this many seconds without jobs
+            (None: wait forever).
+
+    Returns:
+        int: Number of jobs completed.
+    """
+    worker = worker or default_worker_id()
+    queue = WorkQueue(queue_path, lease_seconds)
+    completed = 0
+    idle_since = time.time()
+    print(f"Worker {worker} polling {queue_path}")
+    try:
+        while True:
+            job = queue.lease(worker, sweep)
+            if job is None:
+                if idle_exit is not None and time.time() - idle_since >= idle_exit:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            idle_since = time.time()
+            print(f"Worker {worker}: job {job['id']} ({job['key']})")
+            with Heartbeat(queue_path, job["id"], worker, lease_seconds) as heartbeat:
+                try:
+                    result = handler(job["payload"])
+                except Exception as e:
+                    print(f"Worker {worker}: job {job['id']} failed: {e}")
+                    queue.release(job["id"], worker, str(e))
+                    continue
+            if heartbeat.lost or not queue.complete(job["id"], worker, result):
+                print(f"Worker {worker}: result of job {job['id']} discarded, the lease was lost")
+            else:
+                completed += 1
+            idle_since = time.time()
+    finally:
+        queue.close()
+    print(f"Worker {worker} stopped after {completed} jobs")
+    return completed
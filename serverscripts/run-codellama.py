@@ -1,11 +1,15 @@
 import json
-from transformers import AutoModelForCausalLM, CodeLlamaTokenizer, BitsAndBytesConfig
+import time
+from transformers import AutoModelForCausalLM, CodeLlamaTokenizer, BitsAndBytesConfig, DynamicCache
 import torch
 
 print("CUDA disponibile:", torch.cuda.is_available())
 
 model_name = "codellama/CodeLlama-7b-hf"
 
+# Classes whose generation rounds run together in one batched generate call
+BATCH_SIZE = 8
+
 bnb_config = BitsAndBytesConfig(
     load_in_4bit=True,
     bnb_4bit_compute_dtype=torch.float16,
@@ -35,25 +39,13 @@ mutators_description = """
 - MTD (Method Call Replacement): replace a method call with another valid one
 """
 
-def mutate_java_class(java_class: str, memory_mutations, num_mutations=3):
-    valid_lines = {line.strip() for line in java_class.split("\n") if line.strip()}
-    previous_mutations_str = (
-        "\n".join(
-            json.dumps({"original_code": orig, "mutated_code": mut})
-            for (orig, mut) in memory_mutations
-        )
-        if memory_mutations
-        else "None so far."
-    )
-
-    prompt = f"""
-Generate {num_mutations} mutations of different lines in the following Java class for PIT mutation testing.
+def build_prefix(java_class: str) -> str:
+    """Fixed part of the prompt (rules + class); the mutation history is appended after it."""
+    return f"""
+Generate mutations of different lines in the following Java class for PIT mutation testing.
 Use only the following mutators:
 {mutators_description}
 
-PREVIOUS MUTATIONS:
-{previous_mutations_str}
-
 Each mutation MUST modify exactly ONE LINE of the following original Java class:
 {java_class}
 
@@ -68,55 +60,161 @@ RULES:
 - Do NOT add operators, mutate only existing ones.
 - The mutated line MUST be different from the original.
 - Each mutation must be different from previous ones.
-- Return exactly {num_mutations} JSON objects, one per line:
+- Output JSON objects, one per line:
 {{"original_code": "<original_code>", "mutated_code": "<mutated_code>" (mutation!)}}
 - No extra text.
 - if the <original_code> doeseen't exist in the class above skip outputting that mutation.
 
+PREVIOUS MUTATIONS:
+"""
+
+
+def build_suffix(num_mutations: int) -> str:
+    return f"""
+Return exactly {num_mutations} NEW mutations.
 Start output now:
 """
 
-    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
 
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=1000,
-        pad_token_id=tokenizer.eos_token_id
-    )
+class IncrementalMutator:
+    """
+    Iterative mutation generation for one class that keeps the KV cache of
+    the prompt across rounds.
+
+    The cache covers the fixed prefix plus the mutation history and is only
+    extended with the tokens of new mutations. Each round generates from a
+    copy of it, so only the short suffix and the output are computed.
+    """
+
+    def __init__(self, java_class: str):
+        self.valid_lines = {line.strip() for line in java_class.split("\n") if line.strip()}
+        # Ordered history, the set only answers membership checks
+        self.history = []
+        self.seen = set()
+
+        self.cache = DynamicCache()
+        self.cached_ids = tokenizer(build_prefix(java_class), return_tensors="pt").input_ids.to(model.device)
+        with torch.no_grad():
+            model(self.cached_ids, past_key_values=self.cache, use_cache=True)
 
-    prompt_len = inputs["input_ids"].shape[1]
-    generated_text = tokenizer.decode(outputs[0][prompt_len:], skip_special_tokens=True).strip()
-
-    # Parsiamo JSON e filtriamo duplicati
-    new_mutations = []
-    for line in generated_text.split("\n"):
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            mutation_json = json.loads(line)
-            original = mutation_json.get("original_code", "").strip()
-            mutated = mutation_json.get("mutated_code", "").strip()
-
-            # ignore invalid
-            if original not in valid_lines:
+    def _append(self, text):
+        """Extend the cached prompt with new tokens."""
+        new_ids = tokenizer(text, add_special_tokens=False, return_tensors="pt").input_ids.to(model.device)
+        with torch.no_grad():
+            model(new_ids, past_key_values=self.cache, use_cache=True)
+        self.cached_ids = torch.cat([self.cached_ids, new_ids], dim=1)
+
+    def padded_cache(self, length):
+        """Copy of the cached layers, left-padded with zeros to `length` tokens."""
+        layers = []
+        for key, value in self.cache.to_legacy_cache():
+            pad = length - key.shape[2]
+            layers.append((torch.nn.functional.pad(key, (0, 0, pad, 0)),
+                           torch.nn.functional.pad(value, (0, 0, pad, 0))))
+        return layers
+
+    def accept(self, generated_text):
+        """
+        Keep the valid, unseen mutations of a generated answer and extend
+        the cached prompt with them.
+
+        Returns:
+            list: New mutation lines.
+        """
+        # Parsiamo JSON e filtriamo duplicati
+        new_mutations = []
+        new_history = ""
+        for line in generated_text.split("\n"):
+            line = line.strip()
+            if not line:
                 continue
+            try:
+                mutation_json = json.loads(line)
+                original = mutation_json.get("original_code", "").strip()
+                mutated = mutation_json.get("mutated_code", "").strip()
 
-            signature = (original, mutated)
+                # ignore invalid
+                if original not in self.valid_lines:
+                    continue
 
-            # filter duplicates properly
-            if signature not in memory_mutations:
-                new_mutations.append(line)
-                memory_mutations.add(signature)
-        except:
-            continue
+                signature = (original, mutated)
 
-    return new_mutations
+                # filter duplicates properly
+                if signature not in self.seen:
+                    new_mutations.append(line)
+                    self.seen.add(signature)
+                    self.history.append(signature)
+                    new_history += json.dumps({"original_code": original, "mutated_code": mutated}) + "\n"
+            except:
+                continue
 
-# Esempio
-memory_mutations = set()
+        if new_history:
+            self._append(new_history)
+        return new_mutations
 
-java_code = """
+    def mutate(self, num_mutations=3):
+        """
+        Run one generation round.
+
+        Returns:
+            tuple: (new mutation lines, stats dict with latency and token counts)
+        """
+        return mutate_batch([self], num_mutations)[0]
+
+
+def mutate_batch(mutators, num_mutations=3):
+    """
+    Run one generation round for several classes in a single generate call.
+
+    The cached prompts are left-padded to the longest one (padding masked
+    out) and stacked into one cache; all rows share the same suffix, so only
+    the suffix and the outputs are computed, for every class at once.
+
+    Returns:
+        list: (new mutation lines, stats dict) per mutator, in order.
+    """
+    start = time.time()
+    suffix_ids = tokenizer(build_suffix(num_mutations), add_special_tokens=False,
+                           return_tensors="pt").input_ids.to(model.device)
+    cached_len = max(mutator.cached_ids.shape[1] for mutator in mutators)
+
+    rows, masks, caches = [], [], []
+    for mutator in mutators:
+        pad = cached_len - mutator.cached_ids.shape[1]
+        padding = torch.full((1, pad), tokenizer.eos_token_id, dtype=suffix_ids.dtype, device=model.device)
+        rows.append(torch.cat([padding, mutator.cached_ids, suffix_ids], dim=1))
+        masks.append(torch.cat([torch.zeros_like(padding), torch.ones_like(rows[-1][:, pad:])], dim=1))
+        caches.append(mutator.padded_cache(cached_len))
+    input_ids = torch.cat(rows, dim=0)
+    cache = DynamicCache.from_legacy_cache(tuple(
+        (torch.cat([layers[i][0] for layers in caches], dim=0), torch.cat([layers[i][1] for layers in caches], dim=0))
+        for i in range(len(caches[0]))))
+
+    outputs = model.generate(
+        input_ids,
+        attention_mask=torch.cat(masks, dim=0),
+        past_key_values=cache,
+        max_new_tokens=1000,
+        pad_token_id=tokenizer.eos_token_id
+    )
+
+    prompt_len = input_ids.shape[1]
+    seconds = time.time() - start
+    results = []
+    for mutator, output in zip(mutators, outputs):
+        generated_text = tokenizer.decode(output[prompt_len:], skip_special_tokens=True).strip()
+        stats = {
+            "seconds": seconds,
+            "batch_size": len(mutators),
+            "prompt_tokens": mutator.cached_ids.shape[1] + suffix_ids.shape[1],
+            "evaluated_tokens": suffix_ids.shape[1],
+        }
+        results.append((mutator.accept(generated_text), stats))
+    return results
+
+# Esempio
+if __name__ == "__main__":
+    java_code = """
 class Calculator {
     public int add(int a, int b) {
         return a + b;
@@ -128,17 +226,41 @@ class Calculator {
 }
 """
 
-iteration = 1
-while True:
-    print(f"\nIterazione {iteration}")
-    mutations = mutate_java_class(java_code, memory_mutations, num_mutations=3)
-    if not mutations:
-        print("⚠ Nessuna nuova mutazione disponibile, termine.")
-        break
-    print(f"Mutazioni generate ({mutations}:")
-    iteration += 1
-
-# Stampa finale ordinata
-print("\nTutte le mutazioni generate:")
-for i, m in enumerate(memory_mutations, 1):
-    print(f"{i}: {m}")
+    java_classes = {"Calculator": java_code, "Counter": """
+class Counter {
+    private int count = 0;
+
+    public void increment() {
+        count++;
+    }
+
+    public boolean isPositive() {
+        return count > 0;
+    }
+}
+"""}
+
+    mutators = {name: IncrementalMutator(code) for name, code in java_classes.items()}
+    active = list(mutators)
+    iteration = 1
+    while active:
+        print(f"\nIterazione {iteration}")
+        finished = set()
+        for i in range(0, len(active), BATCH_SIZE):
+            names = active[i:i + BATCH_SIZE]
+            for name, (mutations, stats) in zip(names, mutate_batch([mutators[n] for n in names], num_mutations=3)):
+                if not mutations:
+                    print(f"⚠ {name}: nessuna nuova mutazione disponibile, termine.")
+                    finished.add(name)
+                    continue
+                print(f"{name}: mutazioni generate ({mutations}:")
+                print(f"Latenza: {stats['seconds']:.2f}s (batch di {stats['batch_size']}) - token nel prompt: "
+                      f"{stats['prompt_tokens']}, token valutati: {stats['evaluated_tokens']}")
+        active = [name for name in active if name not in finished]
+        iteration += 1
+
+    # Stampa finale ordinata
+    print("\nTutte le mutazioni generate:")
+    for name, mutator in mutators.items():
+        for i, m in enumerate(mutator.history, 1):
+            print(f"{name} {i}: {m}")
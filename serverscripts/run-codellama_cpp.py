@@ -1,12 +1,15 @@
 import json
+import time
 from llama_cpp import Llama
 
 # ====== 1️⃣ Caricamento modello GGUF ======
-llm = Llama.from_pretrained(
-    repo_id="TheBloke/CodeLlama-7B-Instruct-GGUF",
-    filename="codellama-7b-instruct.Q2_K.gguf",
-    n_gpu_layers=50,
-)
+def load_model():
+    return Llama.from_pretrained(
+        repo_id="TheBloke/CodeLlama-7B-Instruct-GGUF",
+        filename="codellama-7b-instruct.Q2_K.gguf",
+        n_gpu_layers=50,
+        n_ctx=4096,
+    )
 
 # ====== 2️⃣ Descrizione dei mutatori ======
 mutators_description = """
@@ -22,27 +25,15 @@ mutators_description = """
 - MTD (Method Call Replacement): replace a method call with another valid one
 """
 
-# ====== 3️⃣ Funzione per generare mutazioni ======
-def mutate_java_class(java_class: str, memory_mutations, num_mutations=3):
-    valid_lines = {line.strip() for line in java_class.split("\n") if line.strip()}
-
-    previous_mutations_str = (
-        "\n".join(
-            json.dumps({"original_code": orig, "mutated_code": mut})
-            for (orig, mut) in memory_mutations
-        )
-        if memory_mutations
-        else "None so far."
-    )
-
-    prompt = f"""
-Generate {num_mutations} mutations of different lines in the following Java class for PIT mutation testing.
+# ====== 3️⃣ Prompt: prefisso fisso + storico in coda ======
+# The fixed part (rules + class) comes first and the mutation history is only
+# ever appended, so every round shares the tokens of the previous one.
+def build_prefix(java_class: str) -> str:
+    return f"""
+Generate mutations of different lines in the following Java class for PIT mutation testing.
 Use only the following mutators:
 {mutators_description}
 
-PREVIOUS MUTATIONS:
-{previous_mutations_str}
-
 Each mutation MUST modify exactly ONE LINE of the following original Java class:
 {java_class}
 
@@ -52,70 +43,144 @@ RULES:
 - Do NOT add operators, mutate only existing ones.
 - The mutated line MUST be different from the original.
 - Each mutation must be different from previous ones.
-- Return exactly {num_mutations} JSON objects, one per line:
+- Output JSON objects, one per line:
 {{"original_code": "<original_code>", "mutated_code": "<mutated_code>"}}
 - No extra text.
 
+PREVIOUS MUTATIONS:
+"""
+
+
+def build_suffix(num_mutations: int) -> str:
+    return f"""
+Return exactly {num_mutations} NEW mutations.
 Start output now:
 """
 
-    # ====== 4️⃣ Generazione testo con llama_cpp ======
-    response = llm(
-        prompt,
-        max_tokens=800,
-        temperature=0.0,
-        stop=["\n\n"]
-    )
 
-    # ====== 5️⃣ Estrazione testo generato ======
-    try:
-        generated_text = response['choices'][0]['text'].strip()
-    except (KeyError, IndexError):
-        print("⚠ Errore: output del modello non valido")
-        return []
-
-    # ====== 6️⃣ Parsiamo JSON e filtriamo duplicati ======
-    new_mutations = []
-    for line in generated_text.split("\n"):
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            mutation_json = json.loads(line)
-            original = mutation_json.get("original_code", "").strip()
-            mutated = mutation_json.get("mutated_code", "").strip()
+def common_prefix_length(a, b):
+    """Number of leading tokens shared by two token sequences."""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class IncrementalMutator:
+    """
+    Iterative mutation generation for one class that keeps the model state
+    of the fixed prefix (rules + class) across rounds.
+
+    The prefix is evaluated once and saved with save_state; each round
+    appends only the tokens of the new mutations and the short suffix, and
+    llama_cpp reuses the matching prefix of its KV cache for the rest. The
+    saved state is restored when the model was used for another prompt in
+    the meantime.
+    """
+
+    def __init__(self, llm, java_class: str):
+        self.llm = llm
+        self.valid_lines = {line.strip() for line in java_class.split("\n") if line.strip()}
+        # Ordered history, the set only answers membership checks
+        self.history = []
+        self.seen = set()
+        self.history_tokens = []
+
+        self.prefix_tokens = llm.tokenize(build_prefix(java_class).encode("utf-8"), add_bos=True)
+        llm.reset()
+        llm.eval(self.prefix_tokens)
+        self.prefix_state = llm.save_state()
+
+    def _ensure_prefix(self):
+        cached = list(self.llm.input_ids[:len(self.prefix_tokens)])
+        if cached != self.prefix_tokens:
+            self.llm.load_state(self.prefix_state)
+
+    def mutate(self, num_mutations=3):
+        """
+        Run one generation round.
+
+        Returns:
+            tuple: (new mutation lines, stats dict with latency and token counts)
+        """
+        start = time.time()
+        self._ensure_prefix()
+
+        suffix_tokens = self.llm.tokenize(build_suffix(num_mutations).encode("utf-8"), add_bos=False)
+        tokens = self.prefix_tokens + self.history_tokens + suffix_tokens
+        reused = common_prefix_length(list(self.llm.input_ids), tokens)
+
+        # ====== 4️⃣ Generazione testo con llama_cpp ======
+        response = self.llm.create_completion(
+            tokens,
+            max_tokens=800,
+            temperature=0.0,
+            stop=["\n\n"]
+        )
 
-            if original not in valid_lines:
+        # ====== 5️⃣ Estrazione testo generato ======
+        try:
+            generated_text = response['choices'][0]['text'].strip()
+        except (KeyError, IndexError):
+            print("⚠ Errore: output del modello non valido")
+            return [], {}
+
+        # ====== 6️⃣ Parsiamo JSON e filtriamo duplicati ======
+        new_mutations = []
+        for line in generated_text.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                mutation_json = json.loads(line)
+                original = mutation_json.get("original_code", "").strip()
+                mutated = mutation_json.get("mutated_code", "").strip()
+
+                if original not in self.valid_lines:
+                    continue
+
+                signature = (original, mutated)
+                if signature not in self.seen:
+                    new_mutations.append(line)
+                    self.seen.add(signature)
+                    self.history.append(signature)
+                    entry = json.dumps({"original_code": original, "mutated_code": mutated}) + "\n"
+                    self.history_tokens += self.llm.tokenize(entry.encode("utf-8"), add_bos=False)
+            except json.JSONDecodeError:
                 continue
 
-            signature = (original, mutated)
-            if signature not in memory_mutations:
-                new_mutations.append(line)
-                memory_mutations.add(signature)
-        except json.JSONDecodeError:
-            continue
-
-    return new_mutations
+        stats = {
+            "seconds": time.time() - start,
+            "prompt_tokens": len(tokens),
+            "evaluated_tokens": len(tokens) - reused,
+        }
+        return new_mutations, stats
 
 # ====== 7️⃣ Esempio di utilizzo ======
-memory_mutations = set()
+if __name__ == "__main__":
+    llm = load_model()
 
-java_code = """
+    java_code = """
     private static boolean isLineBreak(char c) {
         return c == '\n' || c == '\r';
     }
 """
 
-iteration = 1
-while True:
-    print(f"\nIterazione {iteration}")
-    mutations = mutate_java_class(java_code, memory_mutations, num_mutations=3)
-    if not mutations:
-        print("⚠ Nessuna nuova mutazione disponibile, termine.")
-        break
-    print(f"Mutazioni generate: {mutations}")
-    iteration += 1
-
-print("\nTutte le mutazioni generate:")
-for i, m in enumerate(memory_mutations, 1):
-    print(f"{i}: {m}")
+    mutator = IncrementalMutator(llm, java_code)
+    iteration = 1
+    while True:
+        print(f"\nIterazione {iteration}")
+        mutations, stats = mutator.mutate(num_mutations=3)
+        if not mutations:
+            print("⚠ Nessuna nuova mutazione disponibile, termine.")
+            break
+        print(f"Mutazioni generate: {mutations}")
+        print(f"Latenza: {stats['seconds']:.2f}s - token nel prompt: {stats['prompt_tokens']}, "
+              f"token valutati: {stats['evaluated_tokens']}")
+        iteration += 1
+
+    print("\nTutte le mutazioni generate:")
+    for i, m in enumerate(mutator.history, 1):
+        print(f"{i}: {m}")
@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules are imported from the repository root, as main.py and cli.py do
+sys.path.insert(0, REPO_ROOT)
+
+# Without a local environment/config.py, the placeholder values of the example configuration
+try:
+    import environment.config  # noqa: F401
+except ImportError:
+    spec = importlib.util.spec_from_file_location("environment.config",
+                                                  os.path.join(REPO_ROOT, "environment", "config.example.py"))
+    sys.modules["environment.config"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["environment.config"])
@@ -0,0 +1,115 @@
+from modules.group_testing import GroupTester, attribute_failures, dorfman_batch_size
+
+
+def mutant(name, class_name, member, line):
+    return {"file": name, "class": class_name, "member": member, "line": line, "schema_id": name}
+
+
+# Mutant on the call `total = calc.add(a, b)` in Report.total, and mutant in the body of Calc.add it calls
+CALL_SITE = mutant("call_site", "org.Report", "total", 10)
+CALLEE = mutant("callee", "org.Calc", "add", 21)
+# Failure thrown by the callee mutant, two lines below it, reached through the call site
+CALLEE_FAILURE = [("org.Calc", "add", 23), ("org.Report", "total", 10), ("org.ReportTest", "testTotal", 5)]
+
+OTHER = mutant("other", "org.Parser", "parse", 40)
+
+
+class FakeTester(GroupTester):
+    """GroupTester whose test runs come from `behaviour(active mutant files)`: traces, or None on timeout."""
+
+    def __init__(self, behaviour):
+        super().__init__("unused")
+        self.behaviour = behaviour
+        self.batches = []
+
+    def _run(self, batch):
+        self.test_runs += 1
+        active = {m["file"] for m in batch}
+        self.batches.append(sorted(active))
+        return self.behaviour(active)
+
+
+def resolve(tester, batch):
+    results = {}
+    tester._resolve(batch, results)
+    return {name: outcome for name, (outcome, _) in results.items()}
+
+
+def test_attribute_failures_reports_every_matching_mutant():
+    attributed = attribute_failures({"org.ReportTest::testTotal": CALLEE_FAILURE}, [CALL_SITE, CALLEE, OTHER])
+    # The call site has a frame on its line, the callee one in its method; the parser none
+    assert attributed == {"org.ReportTest::testTotal": {0: 0, 1: 1}}
+
+
+def test_attribute_failures_falls_back_to_test_names():
+    attributed = attribute_failures({"org.ParserTest::testEmpty": [("org.Other", "run", 3)]}, [CALL_SITE, OTHER])
+    assert attributed == {"org.ParserTest::testEmpty": {1: 3}}
+
+
+def test_call_site_is_not_killed_by_its_callee_failure():
+    def behaviour(active):
+        return {"org.ReportTest::testTotal": CALLEE_FAILURE} if "callee" in active else {}
+
+    tester = FakeTester(behaviour)
+    assert resolve(tester, [CALL_SITE, CALLEE]) == {"callee": "killed", "call_site": "survived"}
+
+
+def test_sole_frame_on_mutated_line_resolves_the_batch_in_one_run():
+    def behaviour(active):
+        traces = {}
+        if "callee" in active:
+            traces["org.CalcTest::testAdd"] = [("org.Calc", "add", 21), ("org.CalcTest", "testAdd", 9)]
+        if "other" in active:
+            traces["org.ParserTest::testParse"] = [("org.Parser", "parse", 40)]
+        return traces
+
+    tester = FakeTester(behaviour)
+    assert resolve(tester, [CALLEE, OTHER]) == {"callee": "killed", "other": "killed"}
+    assert tester.test_runs == 1
+
+
+def test_timeout_splits_the_batch_down_to_the_looping_mutant():
+    batch = [mutant(f"m{i}", f"org.C{i}", "run", 1) for i in range(4)]
+
+    def behaviour(active):
+        return None if "m2" in active else {}
+
+    tester = FakeTester(behaviour)
+    assert resolve(tester, batch) == {"m0": "survived", "m1": "survived", "m2": "timeout", "m3": "survived"}
+    assert tester.batches == [["m0", "m1", "m2", "m3"], ["m0", "m1"], ["m2", "m3"], ["m2"], ["m3"]]
+
+
+def test_masked_failure_is_found_by_rerunning_the_rest():
+    def behaviour(active):
+        # The test stops at the first failure: the callee's hides the parser's
+        if "callee" in active:
+            return {"org.SuiteTest::test": [("org.Calc", "add", 21)]}
+        if "other" in active:
+            return {"org.SuiteTest::test": [("org.Parser", "parse", 40)]}
+        return {}
+
+    tester = FakeTester(behaviour)
+    assert resolve(tester, [CALLEE, OTHER]) == {"callee": "killed", "other": "killed"}
+    assert tester.batches == [["callee", "other"], ["other"]]
+
+
+def test_evaluate_reports_every_mutant_once():
+    tester = FakeTester(lambda active: {"org.ReportTest::testTotal": CALLEE_FAILURE} if "callee" in active else {})
+    tester.mutants = [CALL_SITE, CALLEE, OTHER]
+    seen = []
+    assert tester.evaluate(lambda name, result, tests: seen.append((name, result))) == []
+    assert sorted(seen) == [("call_site", "survived"), ("callee", "killed"), ("other", "survived")]
+    assert tester.killed == 1
+
+
+def test_batch_size_shrinks_as_batches_stay_unresolved():
+    assert dorfman_batch_size(0.01) > dorfman_batch_size(0.1) > 1
+    assert dorfman_batch_size(0.5) == 1
+
+
+def test_batches_hold_one_mutant_per_class():
+    tester = FakeTester(lambda active: {})
+    same_class = mutant("sub", "org.Calc", "sub", 30)
+    pending = [CALLEE, same_class, OTHER]
+    assert tester._next_batch(pending) == [CALLEE, OTHER]
+    assert pending == [same_class]
@@ -0,0 +1,55 @@
+from llm.java_lexer import build_line_index, normalize_code_line, strip_java_comments
+
+
+def test_line_comment_only_lines_are_dropped_and_mapped():
+    source = "class A {\n    // note\n    int x = 1; // trailing\n}\n"
+    cleaned, line_map = strip_java_comments(source)
+    assert cleaned.split("\n") == ["class A {", "    int x = 1;", "}", ""]
+    assert line_map == [1, 3, 4, 5]
+
+
+def test_block_comment_keeps_following_line_numbers():
+    source = "int a = 1;\n/* one\n   two\n*/\nint b = 2; /* inline */ int c = 3;\n"
+    cleaned, line_map = strip_java_comments(source)
+    lines = cleaned.split("\n")
+    assert lines[:2] == ["int a = 1;", "int b = 2;  int c = 3;"]
+    assert line_map[:2] == [1, 5]
+
+
+def test_block_comment_after_code_keeps_the_code():
+    source = "int a = 1; /* starts\nends */ int b = 2;\n"
+    cleaned, line_map = strip_java_comments(source)
+    assert cleaned.split("\n")[:2] == ["int a = 1;", " int b = 2;"]
+    assert line_map[:2] == [1, 2]
+
+
+def test_comment_markers_inside_literals_are_kept():
+    source = ('String url = "http://example.com/*x*/"; // comment\n'
+              "char c = '/';\n"
+              'String block = """\n    // not a comment\n    """;\n')
+    cleaned, line_map = strip_java_comments(source)
+    lines = cleaned.split("\n")
+    assert lines[0] == 'String url = "http://example.com/*x*/";'
+    assert lines[1] == "char c = '/';"
+    assert lines[3] == "    // not a comment"
+    assert line_map[:5] == [1, 2, 3, 4, 5]
+
+
+def test_escaped_quote_does_not_end_string():
+    source = 'String s = "a\\"//b"; // c\n'
+    cleaned, _ = strip_java_comments(source)
+    assert cleaned.split("\n")[0] == 'String s = "a\\"//b";'
+
+
+def test_unterminated_block_comment_runs_to_end():
+    cleaned, line_map = strip_java_comments("int a;\n/* open\nint b;")
+    assert cleaned == "int a;"
+    assert line_map == [1]
+
+
+def test_line_index_finds_original_line_numbers():
+    source = "class A {\n    /** doc */\n    int  x = 1; // why\n    int x = 1;\n}\n"
+    cleaned, line_map = strip_java_comments(source)
+    index = build_line_index(cleaned, line_map)
+    assert index[normalize_code_line("int x = 1;")] == [3, 4]
+    assert index["class A {"] == [1]
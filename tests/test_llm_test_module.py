@@ -0,0 +1,49 @@
+import pytest
+
+from modules import llm_test_module
+from modules.llm_test_module import FAIL_FAST_MIN_TEST_CLASSES, FAIL_FAST_SINGLE_RUNS, TEST_MODE_FAIL_FAST, \
+    evaluate_mutant
+
+
+@pytest.fixture
+def test_runs(monkeypatch):
+    """Surviving mutant: every test run passes; returns the single_test of each run (None for the full suite)."""
+    runs = []
+
+    def test_with_timeout(working_dir, timeout, single_test=None):
+        runs.append(single_test)
+        return "passed"
+
+    monkeypatch.setattr(llm_test_module, "defects4j_compile", lambda working_dir: True)
+    monkeypatch.setattr(llm_test_module, "defects4j_test_with_timeout", test_with_timeout)
+    monkeypatch.setattr(llm_test_module, "read_failing_tests", lambda working_dir: [])
+    monkeypatch.setattr(llm_test_module, "read_test_outcome", lambda working_dir: "survived")
+    return runs
+
+
+def suite(monkeypatch, size):
+    tests = [f"org.Foo{i}Test" for i in range(size)]
+    monkeypatch.setattr(llm_test_module, "list_test_classes", lambda working_dir: (tests, tests[:2]))
+    return tests
+
+
+def test_small_suite_goes_straight_to_the_full_suite_whatever_the_order(test_runs, monkeypatch):
+    tests = suite(monkeypatch, FAIL_FAST_MIN_TEST_CLASSES - 1)
+    # A caller's order padded past the threshold does not make the suite any larger
+    order = tests * 2
+    assert evaluate_mutant("wd", "org.Foo", TEST_MODE_FAIL_FAST, order) == ("survived", [])
+    assert test_runs == [None]
+
+
+def test_large_suite_runs_single_classes_even_with_a_short_order(test_runs, monkeypatch):
+    suite(monkeypatch, FAIL_FAST_MIN_TEST_CLASSES)
+    order = ["org.Foo1Test", "org.Foo0Test"]
+    assert evaluate_mutant("wd", "org.Foo", TEST_MODE_FAIL_FAST, order) == ("survived", [])
+    assert test_runs == order + [None]
+
+
+def test_surviving_mutant_costs_at_most_one_run_more_than_the_single_runs(test_runs, monkeypatch):
+    suite(monkeypatch, FAIL_FAST_MIN_TEST_CLASSES * 2)
+    evaluate_mutant("wd", "org.Foo", TEST_MODE_FAIL_FAST)
+    assert len(test_runs) == FAIL_FAST_SINGLE_RUNS + 1
+    assert test_runs[-1] is None
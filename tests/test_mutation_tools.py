@@ -0,0 +1,93 @@
+import csv
+
+import pytest
+
+import cli
+from modules import mutation_tools
+from modules.mutation_tools import MajorTool, PitTool
+
+PROJECTS = [
+    {"project_id": "Lang", "bug_id": "1", "fixed_version": "f", "project_path": "lang"},
+    {"project_id": "Lang", "bug_id": "2", "fixed_version": "f", "project_path": "lang"},
+]
+
+
+@pytest.fixture
+def results_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(mutation_tools, "RESULTS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(mutation_tools, "KILL_MATRIX_FOLDER", str(tmp_path / "kill_matrix"))
+    return tmp_path
+
+
+@pytest.fixture
+def projects_csv(tmp_path):
+    path = tmp_path / "projects.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(PROJECTS[0]))
+        writer.writeheader()
+        writer.writerows(PROJECTS)
+    return str(path)
+
+
+def write_pit_report(project, statuses):
+    with open(PitTool().report_path(project), "w", newline="") as f:
+        writer = csv.writer(f)
+        for i, status in enumerate(statuses):
+            writer.writerow(["Foo.java", "org.Foo", "MathMutator", "add", str(i + 1), status, "org.FooTest"])
+
+
+def write_major_kill_csv(project, statuses):
+    with open(MajorTool().kill_csv_path(project), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["MutantNo", "[FAIL | TIME | EXC | LIVE | UNCOV]"])
+        for i, status in enumerate(statuses):
+            writer.writerow([str(i + 1), status])
+
+
+def test_reports_are_kept_per_bug(results_folder):
+    for tool in (PitTool(), MajorTool()):
+        assert tool.report_path(PROJECTS[0]) != tool.report_path(PROJECTS[1])
+        assert tool.kill_matrix_path(PROJECTS[0]) != tool.kill_matrix_path(PROJECTS[1])
+    assert MajorTool().kill_csv_path(PROJECTS[0]) != MajorTool().kill_csv_path(PROJECTS[1])
+
+
+def test_outcomes_of_each_bug_come_from_its_own_report(results_folder):
+    write_pit_report(PROJECTS[0], ["KILLED", "KILLED", "SURVIVED"])
+    write_pit_report(PROJECTS[1], ["SURVIVED", "NO_COVERAGE"])
+    assert PitTool().outcomes(PROJECTS[0]) == ["killed", "killed", "survived"]
+    assert PitTool().outcomes(PROJECTS[1]) == ["survived", "uncovered"]
+
+
+def test_compare_scores_two_bugs_of_one_project_separately(results_folder, projects_csv, capsys, monkeypatch):
+    write_pit_report(PROJECTS[0], ["KILLED", "KILLED", "KILLED", "SURVIVED"])
+    write_pit_report(PROJECTS[1], ["KILLED", "SURVIVED"])
+    write_major_kill_csv(PROJECTS[0], ["FAIL", "LIVE"])
+    write_major_kill_csv(PROJECTS[1], ["TIME", "EXC", "FAIL", "LIVE", "LIVE"])
+
+    compared = {}
+    monkeypatch.setattr("modules.stats_module.compare_groups",
+                        lambda results, *args: compared.update(results))
+    cli.main(["compare", "--projects", projects_csv, "--tools", "pit", "major", "--stats", "--resamples", "100"])
+
+    rows = {tuple(line.split()[:3]): line.split()[-1] for line in capsys.readouterr().out.splitlines()[1:]}
+    assert rows == {("Lang", "1", "pit"): "75.0%", ("Lang", "2", "pit"): "50.0%",
+                    ("Lang", "1", "major"): "50.0%", ("Lang", "2", "major"): "60.0%"}
+    assert compared == {"pit": {"Lang-1": (3, 4), "Lang-2": (1, 2)},
+                        "major": {"Lang-1": (1, 2), "Lang-2": (3, 5)}}
+
+
+def test_compare_keeps_models_of_one_vendor_apart(results_folder, projects_csv, monkeypatch):
+    from main_llm import append_result
+
+    models = ["anthropic/claude-opus-4.5", "anthropic/claude-sonnet-4.5"]
+    for model, results in zip(models, (["killed", "killed", "survived"], ["survived", "timeout"])):
+        for i, result in enumerate(results):
+            append_result(model, "Lang", "1", f"Foo_Mutant_{i}.java", "org.Foo", result)
+
+    compared = {}
+    monkeypatch.setattr("modules.stats_module.compare_groups",
+                        lambda results, *args: compared.update(results))
+    cli.main(["compare", "--projects", projects_csv, "--tools", "llm", "--stats"]
+             + [option for model in models for option in ("--model", model)])
+
+    assert compared == {f"llm:{models[0]}": {"Lang-1": (2, 3)}, f"llm:{models[1]}": {"Lang-1": (1, 2)}}
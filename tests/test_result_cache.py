@@ -0,0 +1,32 @@
+import main_llm
+from modules.result_cache import ResultCache
+
+KEY = ("Lang", "1", "source", "mutant", "suite")
+
+
+def test_results_are_cached_per_evaluation_mode(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(main_llm, "USE_TCE", True)
+    with_tce = main_llm.evaluation_mode()
+    cache.put(KEY + (with_tce,), "equivalent")
+
+    monkeypatch.setattr(main_llm, "USE_TCE", False)
+    without_tce = main_llm.evaluation_mode()
+    assert without_tce != with_tce
+    # Without TCE the mutant must be tested
+    assert cache.get(KEY + (without_tce,)) is None
+    assert cache.get(KEY + (with_tce,)) == ("equivalent", [])
+    cache.close()
+
+
+def test_evaluation_mode_names_every_setting(monkeypatch):
+    monkeypatch.setattr(main_llm, "TEST_MODE", main_llm.TEST_MODE_FULL_MATRIX)
+    monkeypatch.setattr(main_llm, "USE_TCE", False)
+    monkeypatch.setattr(main_llm, "USE_MUTANT_SCHEMATA", False)
+    monkeypatch.setattr(main_llm, "USE_GROUP_TESTING", False)
+    modes = {main_llm.evaluation_mode()}
+    for name, value in (("USE_MUTANT_SCHEMATA", True), ("USE_GROUP_TESTING", True), ("USE_TCE", True),
+                        ("TEST_MODE", main_llm.TEST_MODE_FAIL_FAST)):
+        monkeypatch.setattr(main_llm, name, value)
+        modes.add(main_llm.evaluation_mode())
+    assert len(modes) == 5
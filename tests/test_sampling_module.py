@@ -0,0 +1,67 @@
+from collections import Counter
+
+import pytest
+
+from modules.sampling_module import SequentialEstimate, sampling_order, wilson_interval
+
+
+def test_wilson_interval_matches_reference_values():
+    assert wilson_interval(8, 10) == pytest.approx((0.4902, 0.9433), abs=1e-4)
+    assert wilson_interval(0, 10) == pytest.approx((0.0, 0.2775), abs=1e-4)
+    assert wilson_interval(10, 10) == pytest.approx((0.7225, 1.0), abs=1e-4)
+
+
+def test_wilson_interval_without_samples_is_uninformative():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_finite_population_correction_narrows_the_interval():
+    low, high = wilson_interval(8, 10)
+    corrected_low, corrected_high = wilson_interval(8, 10, population=20)
+    assert low < corrected_low < 0.8 < corrected_high < high
+    # The whole population was sampled: the score is exact
+    assert wilson_interval(8, 10, population=10) == pytest.approx((0.8, 0.8))
+
+
+def test_estimate_waits_for_min_scored_mutants():
+    estimate = SequentialEstimate(population=1000, target_half_width=0.5, min_scored=30)
+    for _ in range(29):
+        estimate.add("killed")
+    assert estimate.half_width() <= 0.5
+    assert not estimate.done()
+    estimate.add("survived")
+    assert estimate.done()
+
+
+def test_estimate_stops_once_precise_enough():
+    estimate = SequentialEstimate(population=10_000, target_half_width=0.05)
+    sampled = 0
+    while not estimate.done():
+        estimate.add("killed" if sampled % 4 else "survived")
+        sampled += 1
+    # About 1.96^2 * 0.75 * 0.25 / 0.05^2 = 288 mutants for +/-5% around 75%
+    assert 250 < sampled < 320
+    assert estimate.half_width() <= 0.05
+    assert estimate.report()["stopped_early"]
+
+
+def test_unscored_outcomes_are_sampled_but_not_scored():
+    estimate = SequentialEstimate(population=3, target_half_width=0.01)
+    estimate.add("build_failed")
+    estimate.add("equivalent")
+    assert (estimate.sampled, estimate.scored) == (2, 0)
+    assert not estimate.done()
+    estimate.add("timeout")
+    assert (estimate.scored, estimate.killed) == (1, 1)
+    # Every mutant was sampled, however wide the interval
+    assert estimate.done()
+    assert not estimate.report()["stopped_early"]
+
+
+def test_stratified_order_spreads_every_stratum():
+    items = [("A", i) for i in range(60)] + [("B", i) for i in range(30)] + [("C", i) for i in range(10)]
+    order = sampling_order(items, stratum=lambda item: item[0], seed=1)
+    assert sorted(order) == sorted(items)
+    assert order == sampling_order(items, stratum=lambda item: item[0], seed=1)
+    shares = Counter(stratum for stratum, _ in order[:20])
+    assert shares == {"A": pytest.approx(12, abs=1), "B": pytest.approx(6, abs=1), "C": pytest.approx(2, abs=1)}
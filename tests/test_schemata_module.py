@@ -0,0 +1,105 @@
+from llm.source_file import SourceFile
+from modules.schemata_module import build_schema, schema_line, statement_lines
+
+GUARD = "S.ACTIVE"
+
+SOURCE = """package org;
+
+public class Calc {
+    private static final int LIMIT = 10;
+    private int[] weights = {
+        1, 2 };
+
+    public int add(int a, int b) {
+        int total = a + b; // sum
+        if (total > LIMIT) {
+            total = LIMIT;
+        }
+        long scaled = total
+            * 2L;
+        Runnable r = new Runnable() {
+            int calls = 0;
+            public void run() {
+                calls++;
+            }
+        };
+        return total;
+    }
+}
+"""
+
+
+def mutant(schema_id, line, original, mutated):
+    return {"schema_id": schema_id, "line": line, "original_code": original, "mutated_code": mutated}
+
+
+def test_condition_swaps_only_the_condition():
+    assert schema_line("if (a > b) {", [(1, "if (a >= b) {"), (2, "if (a < b) {")], GUARD) == \
+        "if (S.ACTIVE.get(1) ? (a >= b) : S.ACTIVE.get(2) ? (a < b) : (a > b)) {"
+    # A variant changing the statement kind is not a condition swap
+    assert schema_line("if (a > b) {", [(1, "while (a > b) {")], GUARD) is None
+
+
+def test_returns_and_statements_are_guarded_by_if_else():
+    assert schema_line("return a + b;", [(1, "return a - b;")], GUARD) == \
+        "if (S.ACTIVE.get(1)) { return a - b; } else { return a + b; }"
+    assert schema_line("x += 1;", [(1, "x -= 1;"), (2, "x *= 1;")], GUARD) == \
+        "if (S.ACTIVE.get(1)) { x -= 1; } else if (S.ACTIVE.get(2)) { x *= 1; } else { x += 1; }"
+
+
+def test_local_declaration_is_split_from_its_initializer():
+    assert schema_line("int x = a + b;", [(1, "int x = a - b;")], GUARD) == \
+        "int x; if (S.ACTIVE.get(1)) { x = a - b; } else { x = a + b; }"
+    assert schema_line("final int x = a + b;", [(1, "final int x = a - b;")], GUARD) == \
+        "final int x; if (S.ACTIVE.get(1)) { x = a - b; } else { x = a + b; }"
+    # The variant must declare the same variable
+    assert schema_line("int x = a + b;", [(1, "long x = a + b;")], GUARD) is None
+
+
+def test_unsupported_shapes_are_left_to_individual_compilation():
+    unsupported = [
+        ("private static final int X = 1;", "private static final int X = 2;"),  # field
+        ("var x = 1;", "var x = 2;"),
+        ("int[] a = {1, 2};", "int[] a = {1, 3};"),
+        ("int a = 1, b = 2;", "int a = 2, b = 2;"),
+        ("int y;", "long y;"),
+        ("return x;", "x++;"),  # the code after a jump would become reachable
+        ("} while (a > 0);", "} while (a >= 0);"),
+        ("int total = a", "int total = b"),  # multi-line statement
+    ]
+    for original, mutated in unsupported:
+        assert schema_line(original, [(1, mutated)], GUARD) is None, original
+
+
+def test_statement_lines_skip_fields_and_continuations():
+    starts = statement_lines(SourceFile(SOURCE))
+    assert {9, 10, 11, 13, 15, 18, 21} <= starts
+    # Fields, array initializer rows, continuation lines and anonymous class fields
+    assert not starts & {4, 5, 6, 14, 16}
+
+
+def test_build_schema_keeps_line_numbers():
+    source = SourceFile(SOURCE)
+    mutants = [
+        mutant(1, 9, "int total = a + b;", "int total = a - b;"),
+        mutant(2, 10, "if (total > LIMIT) {", "if (total >= LIMIT) {"),
+        mutant(3, 21, "return total;", "return total + 1;"),
+    ]
+    schema, unsupported = build_schema(source, mutants, GUARD)
+    lines = schema.split("\n")
+    assert unsupported == []
+    assert len(lines) == len(SOURCE.split("\n"))
+    assert lines[8] == "        int total; if (S.ACTIVE.get(1)) { total = a - b; } else { total = a + b; }"
+    assert lines[9] == "        if (S.ACTIVE.get(2) ? (total >= LIMIT) : (total > LIMIT)) {"
+    assert lines[20] == "        if (S.ACTIVE.get(3)) { return total + 1; } else { return total; }"
+
+
+def test_build_schema_leaves_out_fields_continuations_and_stale_mutants():
+    source = SourceFile(SOURCE)
+    field = mutant(1, 4, "private static final int LIMIT = 10;", "private static final int LIMIT = 11;")
+    continuation = mutant(2, 14, "* 2L;", "/ 2L;")
+    anonymous_field = mutant(3, 16, "int calls = 0;", "int calls = 1;")
+    stale = mutant(4, 11, "total = 0;", "total = 1;")
+    schema, unsupported = build_schema(source, [field, continuation, anonymous_field, stale], GUARD)
+    assert unsupported == [field, stale, continuation, anonymous_field]
+    assert schema == SOURCE
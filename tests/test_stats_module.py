@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from modules.stats_module import bootstrap_scores, count_matrices, paired_comparison
+
+RESULTS = {
+    "pit": {"Lang_1": (8, 10), "Lang_2": (5, 10), "Lang_3": (9, 10)},
+    "major": {"Lang_1": (4, 10), "Lang_2": (2, 10)},
+}
+
+
+def test_count_matrices_fills_missing_bugs_with_zero():
+    groups, bugs, killed, covered = count_matrices(RESULTS)
+    assert groups == ["pit", "major"]
+    assert bugs == ["Lang_1", "Lang_2", "Lang_3"]
+    assert killed.tolist() == [[8, 5, 9], [4, 2, 0]]
+    assert covered.tolist() == [[10, 10, 10], [10, 10, 0]]
+
+
+def test_bootstrap_scores_pool_the_bugs():
+    _, _, killed, covered = count_matrices(RESULTS)
+    score, low, high = bootstrap_scores(killed, covered, resamples=2_000)
+    assert score == pytest.approx([22 / 30 * 100, 30.0])
+    assert (low <= score).all() and (score <= high).all()
+    # Resampled bug sets stay within the per-bug scores
+    assert low[0] >= 50 and high[0] <= 90
+
+
+def test_bootstrap_is_reproducible_with_a_seed():
+    _, _, killed, covered = count_matrices(RESULTS)
+    first = bootstrap_scores(killed, covered, resamples=500, seed=3)
+    second = bootstrap_scores(killed, covered, resamples=500, seed=3)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_paired_comparison_uses_common_bugs_only():
+    _, _, killed, covered = count_matrices(RESULTS)
+    comparison = paired_comparison(killed, covered, 0, 1, resamples=2_000)
+    assert comparison["bugs"] == 2
+    assert comparison["difference"] == pytest.approx(65 - 30)
+    assert comparison["low"] <= comparison["difference"] <= comparison["high"]
+
+
+def test_paired_comparison_detects_a_consistent_difference():
+    killed = np.array([[9] * 20, [3] * 20])
+    covered = np.full((2, 20), 10)
+    comparison = paired_comparison(killed, covered, 0, 1, resamples=2_000)
+    assert comparison["difference"] == pytest.approx(60)
+    assert comparison["p_value"] < 0.01
+
+
+def test_paired_comparison_of_identical_groups():
+    killed = np.full((2, 6), 5)
+    covered = np.full((2, 6), 10)
+    comparison = paired_comparison(killed, covered, 0, 1, resamples=500)
+    assert comparison["difference"] == 0
+    assert comparison["p_value"] == 1.0
+
+
+def test_paired_comparison_without_common_bug():
+    killed = np.array([[5, 0], [0, 5]])
+    covered = np.array([[10, 0], [0, 10]])
+    assert paired_comparison(killed, covered, 0, 1) is None
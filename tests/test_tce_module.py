@@ -0,0 +1,92 @@
+import os
+import shutil
+
+import pytest
+
+from modules import tce_module
+from modules.tce_module import (ClassFileError, RESULT_EQUIVALENT, TrivialCompilerEquivalence, bytecode_hash,
+                                strip_debug_info)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Calc.class is Calc.java in the layout javac -g gives it (class file version 55): line and
+# local variable tables, SourceFile attribute
+with open(os.path.join(FIXTURES, "Calc.class"), "rb") as f:
+    CALC = f.read()
+
+# LineNumberTable of add(): one entry, pc 0 on line 3
+ADD_LINE_TABLE = bytes.fromhex("0007 00000006 0001 0000 0003")
+# add() body: iload_1, iload_2, iadd, ireturn
+ADD_CODE = bytes.fromhex("1b 1c 60 ac")
+
+
+def moved_to_line_4(data):
+    """The class with `return a + b;` one line lower, e.g. after reformatting."""
+    assert data.count(ADD_LINE_TABLE) == 1
+    return data.replace(ADD_LINE_TABLE, ADD_LINE_TABLE[:-2] + b"\x00\x04")
+
+
+def with_isub(data):
+    """The class with the AOR mutant `return a - b;`."""
+    assert data.count(ADD_CODE) == 1
+    return data.replace(ADD_CODE, bytes.fromhex("1b 1c 64 ac"))
+
+
+def write_class(classes_dir, data, name="Calc.class"):
+    os.makedirs(classes_dir, exist_ok=True)
+    with open(os.path.join(classes_dir, name), "wb") as f:
+        f.write(data)
+
+
+def test_line_numbers_do_not_change_the_stripped_class():
+    assert strip_debug_info(moved_to_line_4(CALC)) == strip_debug_info(CALC)
+    assert moved_to_line_4(CALC) != CALC
+
+
+def test_changed_bytecode_changes_the_stripped_class():
+    assert strip_debug_info(with_isub(CALC)) != strip_debug_info(CALC)
+
+
+def test_stripped_class_drops_debug_attributes():
+    stripped = strip_debug_info(CALC)
+    assert len(stripped) < len(CALC)
+    assert ADD_LINE_TABLE not in stripped
+    assert ADD_CODE in stripped
+
+
+def test_malformed_class_files_are_rejected(tmp_path):
+    with pytest.raises(ClassFileError):
+        strip_debug_info(b"\x00" * 16)
+    with pytest.raises(ClassFileError):
+        strip_debug_info(CALC[:100])
+    write_class(str(tmp_path), CALC[:100])
+    assert bytecode_hash(str(tmp_path), "Calc") is None
+
+
+def test_hash_covers_inner_classes(tmp_path):
+    classes_dir = str(tmp_path)
+    write_class(classes_dir, CALC)
+    alone = bytecode_hash(classes_dir, "Calc")
+    write_class(classes_dir, CALC, "Calc$1.class")
+    assert bytecode_hash(classes_dir, "Calc") != alone
+    assert bytecode_hash(classes_dir, "Missing") is None
+
+
+def test_mutants_are_classified_against_the_original_and_each_other(tmp_path, monkeypatch):
+    monkeypatch.setattr(tce_module, "defects4j_export", lambda working_dir, prop: "classes")
+    original_dir = str(tmp_path / "original")
+    write_class(os.path.join(original_dir, "classes"), CALC)
+    tce = TrivialCompilerEquivalence(original_dir, ["Calc"])
+
+    mutant_dir = str(tmp_path / "mutant")
+    write_class(os.path.join(mutant_dir, "classes"), moved_to_line_4(CALC))
+    assert tce.check(mutant_dir, "Calc", "m1") == RESULT_EQUIVALENT
+
+    write_class(os.path.join(mutant_dir, "classes"), with_isub(CALC))
+    assert tce.check(mutant_dir, "Calc", "m2") is None
+    write_class(os.path.join(mutant_dir, "classes"), moved_to_line_4(with_isub(CALC)))
+    assert tce.check(mutant_dir, "Calc", "m3") == "duplicate_of:m2"
+
+    shutil.rmtree(os.path.join(mutant_dir, "classes"))
+    assert tce.check(mutant_dir, "Calc", "m4") is None
+    assert (tce.equivalent, tce.duplicates) == (1, 1)
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from modules.work_queue import STATUS_DONE, STATUS_FAILED, STATUS_LEASED, STATUS_PENDING, WorkQueue
+
+# Short enough for a test to let a lease expire
+LEASE = 0.2
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease_seconds=LEASE, max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def test_enqueue_ignores_known_keys(queue):
+    assert queue.enqueue("s", [("a", {"n": 1}), ("b", {"n": 2})]) == 2
+    assert queue.enqueue("s", [("a", {"n": 3}), ("c", {"n": 4})]) == 1
+    assert queue.enqueue("other", [("a", {})]) == 1
+    assert queue.counts("s")[STATUS_PENDING] == 3
+
+
+def test_lease_takes_oldest_pending_job_once(queue):
+    queue.enqueue("s", [("a", {"n": 1}), ("b", {"n": 2})])
+    first = queue.lease("w1", "s")
+    second = queue.lease("w2", "s")
+    assert (first["key"], first["payload"]) == ("a", {"n": 1})
+    assert second["key"] == "b"
+    assert queue.lease("w3", "s") is None
+    assert queue.counts("s")[STATUS_LEASED] == 2
+
+
+def test_complete_stores_result_for_lease_holder_only(queue):
+    queue.enqueue("s", [("a", {})])
+    job = queue.lease("w1", "s")
+    assert not queue.complete(job["id"], "w2", {"result": "killed"})
+    assert queue.complete(job["id"], "w1", {"result": "killed"})
+    assert not queue.complete(job["id"], "w1", {"result": "survived"})
+    assert queue.finished("s") == [(job["id"], "a", STATUS_DONE, {"result": "killed"})]
+
+
+def test_expired_lease_goes_back_to_pending_then_fails(queue):
+    queue.enqueue("s", [("a", {})])
+    job = queue.lease("w1", "s")
+    time.sleep(2 * LEASE)
+
+    retried = queue.lease("w2", "s")
+    assert retried["id"] == job["id"]
+    # The first worker lost its lease: its late result is refused
+    assert not queue.heartbeat(job["id"], "w1")
+    assert not queue.complete(job["id"], "w1", {"result": "killed"})
+
+    time.sleep(2 * LEASE)
+    assert queue.lease("w3", "s") is None
+    (job_id, key, status, result), = queue.finished("s")
+    assert (status, result) == (STATUS_FAILED, {"error": "lease expired"})
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    queue.enqueue("s", [("a", {})])
+    job = queue.lease("w1", "s")
+    for _ in range(4):
+        time.sleep(LEASE / 2)
+        assert queue.heartbeat(job["id"], "w1")
+    assert queue.lease("w2", "s") is None
+    assert queue.complete(job["id"], "w1", {})
+
+
+def test_release_retries_until_max_attempts(queue):
+    queue.enqueue("s", [("a", {})])
+    job = queue.lease("w1", "s")
+    assert queue.release(job["id"], "w1", "boom")
+    assert queue.counts("s")[STATUS_PENDING] == 1
+    job = queue.lease("w1", "s")
+    assert queue.release(job["id"], "w1", "boom")
+    assert queue.finished("s")[0][2:] == (STATUS_FAILED, {"error": "boom"})
+
+
+def test_cancel_drops_pending_jobs_only(queue):
+    queue.enqueue("s", [("a", {}), ("b", {})])
+    job = queue.lease("w1", "s")
+    assert queue.cancel("s") == 1
+    assert queue.complete(job["id"], "w1", {})
+    assert queue.counts("s") == {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 1, STATUS_FAILED: 0}
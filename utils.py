@@ -1,14 +1,239 @@
+import fcntl
 import os
+import re
+import signal
 import subprocess
 import shutil
+import threading
+import time
 
-def run_command(command, cwd=None):
+# Bytes of stdout and stderr kept in memory per command (the rest is only in the logs)
+TAIL_BYTES = 64 * 1024
+
+# Folder of the per-stage command logs, RESULTS_FOLDER/logs by default
+COMMAND_LOG_FOLDER = os.environ.get("COMMAND_LOG_FOLDER")
+
+# A stage log is rotated past this size, keeping this many older files
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 3
+
+# Resource limits applied to every command unless overridden per call: "cpu" (seconds
+# of CPU time), "memory" (bytes of address space; JVMs reserve much more than they
+# use, so keep it generous) and "files" (open file descriptors)
+COMMAND_LIMITS = {}
+
+# Seconds between SIGTERM and SIGKILL when a command's process group is stopped
+KILL_GRACE_SECONDS = 5
+
+# Seconds to wait for the output of killed leftovers before abandoning their readers
+READER_KILL_WAIT_SECONDS = 1
+
+ULIMIT_FLAGS = {"cpu": ("-t", 1), "memory": ("-v", 1024), "files": ("-n", 1)}
+
+
+class RotatingLog:
+    """
+    Append-only log file of a stage, shared by the threads of this process
+    and by other processes: writes append, and the file is rotated to
+    .1 ... .N under a file lock once it passes LOG_MAX_BYTES.
+    """
+
+    _logs = {}
+    _logs_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab")
+
+    @classmethod
+    def for_stage(cls, stage):
+        folder = COMMAND_LOG_FOLDER
+        if folder is None:
+            from environment.config import RESULTS_FOLDER
+            folder = os.path.join(RESULTS_FOLDER, "logs")
+        path = os.path.join(folder, f"{stage}.log")
+        with cls._logs_lock:
+            if path not in cls._logs:
+                cls._logs[path] = cls(path)
+            return cls._logs[path]
+
+    def _reopen_if_rotated(self):
+        try:
+            if os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                return
+        except FileNotFoundError:
+            pass
+        self._file.close()
+        self._file = open(self.path, "ab")
+
+    def _rotate(self):
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process may have rotated it while we waited
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= LOG_MAX_BYTES:
+                for i in range(LOG_BACKUPS - 1, 0, -1):
+                    if os.path.exists(f"{self.path}.{i}"):
+                        os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self._reopen_if_rotated()
+
+    def write(self, data):
+        with self._lock:
+            self._reopen_if_rotated()
+            self._file.write(data)
+            self._file.flush()
+            if self._file.tell() >= LOG_MAX_BYTES:
+                self._rotate()
+
+
+class _Tail:
+    """Last `limit` bytes written (everything when `limit` is None)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.chunks = []
+        self.size = 0
+        self.total = 0
+
+    def add(self, data):
+        self.total += len(data)
+        if self.limit == 0:
+            return
+        self.chunks.append(data)
+        self.size += len(data)
+        while self.limit is not None and self.size - len(self.chunks[0]) >= self.limit:
+            self.size -= len(self.chunks.pop(0))
+
+    def text(self, log_path):
+        data = b"".join(self.chunks)
+        if self.limit is not None and len(data) > self.limit:
+            data = data[-self.limit:]
+        text = data.decode("utf-8", errors="replace")
+        if self.total > len(data):
+            text = f"[{self.total - len(data)} earlier bytes in {log_path}]\n" + text
+        return text
+
+
+def _stage_name(command):
+    """Log name of a command: its first two words, e.g. "defects4j_compile"."""
+    words = [os.path.basename(w) for w in command.split() if "=" not in w][:2]
+    return re.sub(r"[^\w.-]", "_", "_".join(words)) or "command"
+
+
+def _with_limits(command, limits):
+    """Prefix a shell command with the ulimit calls of `limits`."""
+    prefix = []
+    for name, value in limits.items():
+        if value is None:
+            continue
+        if name not in ULIMIT_FLAGS:
+            raise ValueError(f"Unknown resource limit: {name}")
+        flag, unit = ULIMIT_FLAGS[name]
+        prefix.append(f"ulimit {flag} {max(int(value) // unit, 1)}")
+    return "; ".join(prefix + [command]) if prefix else command
+
+
+def _kill_group(process):
+    """Stop a command and everything it started: SIGTERM, then SIGKILL after a grace period."""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            process.wait(KILL_GRACE_SECONDS)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _join_all(threads, seconds):
+    """Join threads against one shared deadline; True if all of them finished."""
+    deadline = time.time() + seconds
+    for thread in threads:
+        thread.join(max(deadline - time.time(), 0))
+    return not any(thread.is_alive() for thread in threads)
+
+
+def _drain(process, readers, log):
+    """
+    Wait for the output readers of a finished command. Processes left
+    behind in its group are killed; a process that left the group (e.g. a
+    daemon) may keep the pipes open, and its readers are then abandoned
+    (they end with the pipe) rather than waited for.
+    """
+    if _join_all(readers, KILL_GRACE_SECONDS):
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    if not _join_all(readers, READER_KILL_WAIT_SECONDS):
+        log.write(b"=== output still held open by a process outside the command's group, not waited for\n")
+
+
+def run_command(command, cwd=None, env=None, stage=None, timeout=None, limits=None, tail_bytes=TAIL_BYTES):
     """
     Execute a shell command in an optional working directory.
-    Returns stdout, stderr, and the exit code.
+
+    Output is streamed to the rotating log of its stage
+    (COMMAND_LOG_FOLDER/<stage>.log) and only the last `tail_bytes` of
+    stdout and stderr are kept in memory. The command runs in its own
+    process group, which is killed as a whole on timeout or interruption,
+    so no JVM outlives it.
+
+    Args:
+        command (str): Shell command.
+        cwd (str): Working directory.
+        env (dict): Environment replacing the current one.
+        stage (str): Log name, derived from the command by default.
+        timeout (float): Seconds before the command is killed and
+            subprocess.TimeoutExpired raised.
+        limits (dict): Resource limits ("cpu", "memory", "files"), added to
+            COMMAND_LIMITS.
+        tail_bytes (int): Output kept per stream; None keeps everything
+            (for commands whose output is parsed).
+
+    Returns:
+        tuple: stdout tail, stderr tail, exit code.
     """
-    result = subprocess.run(command, shell=True, cwd=cwd, capture_output=True, text=True)
-    return result.stdout, result.stderr, result.returncode
+    log = RotatingLog.for_stage(stage or _stage_name(command))
+    start = time.time()
+    log.write(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} [{os.getpid()}] {command} (cwd: {cwd or os.getcwd()})\n"
+              .encode("utf-8"))
+
+    process = subprocess.Popen(_with_limits(command, {**COMMAND_LIMITS, **(limits or {})}), shell=True, cwd=cwd,
+                               env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+    tails = {"stdout": _Tail(tail_bytes), "stderr": _Tail(tail_bytes)}
+
+    def pump(stream, tail):
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            tail.add(chunk)
+            log.write(chunk)
+        stream.close()
+
+    readers = [threading.Thread(target=pump, args=(process.stdout, tails["stdout"]), daemon=True),
+               threading.Thread(target=pump, args=(process.stderr, tails["stderr"]), daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    try:
+        returncode = process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        _kill_group(process)
+        log.write(f"=== killed after {time.time() - start:.1f}s (timeout {timeout}s)\n".encode("utf-8"))
+        raise
+    except BaseException:
+        _kill_group(process)
+        raise
+    finally:
+        _drain(process, readers, log)
+
+    log.write(f"=== exit {returncode} after {time.time() - start:.1f}s\n".encode("utf-8"))
+    return tails["stdout"].text(log.path), tails["stderr"].text(log.path), returncode
 
 def copy_mutation_report(working_dir, dest_file, pit=True):
     """
@@ -32,3 +257,17 @@ def copy_mutation_report(working_dir, dest_file, pit=True):
     else:
         print(f"File {source_file} not found for destination {dest_file}")
         return False
+
+def setup_environment(d4j_bin_path, java_home):
+    """
+    Put Defects4J and the given JDK on the PATH of this process and of the
+    tools it launches. Safe to call more than once.
+    """
+    path = os.environ.get("PATH", "").split(os.pathsep)
+    java_bin = os.path.join(java_home, "bin")
+    if d4j_bin_path not in path:
+        path.append(d4j_bin_path)
+    if java_bin not in path:
+        path.insert(0, java_bin)
+    os.environ["JAVA_HOME"] = java_home
+    os.environ["PATH"] = os.pathsep.join(path)